@@ -7,15 +7,14 @@ Modules:
     - Module Médecin: Analyse statistique (univariée, bivariée, corrélations)
 """
 
+from demarrage import lancer_initialisation, avec_point_pret
 from shiny import App, render, ui, reactive
 import pandas as pd
 import numpy as np
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, MetaData, Table, Column, Integer, String, Numeric, Date, DateTime, Text, func
 from urllib.parse import quote_plus
 import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
+from bibliotheques import definir_style, graphiques, statistiques, prechauffer
 
 # Configuration de la connexion à PostgreSQL
 # ⚠️ ATTENTION: Modifiez ces valeurs selon votre configuration
@@ -30,51 +29,76 @@ encoded_password = quote_plus(POSTGRES_PASSWORD)
 DATABASE_URL = f"postgresql+psycopg2://{POSTGRES_USER}:{encoded_password}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 engine = create_engine(DATABASE_URL, echo=False)
 
-# Test de connexion au démarrage
-print("🔌 Test de connexion à PostgreSQL...")
-try:
-    with engine.connect() as conn:
-        result = conn.execute(text("SELECT version();"))
-        version = result.fetchone()[0]
-        print(f"✅ Connexion PostgreSQL réussie! Version: {version[:50]}...")
-        
-        # Vérifier que la table existe
-        result = conn.execute(text("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_name = 'dossiers_patients'
-            );
-        """))
-        table_exists = result.fetchone()[0]
-        if table_exists:
-            print("✅ Table 'dossiers_patients' existe")
-            
-            # Vérifier les colonnes
+# Table dossiers_patients en SQLAlchemy Core (miroir de create_table.sql):
+# l'instruction d'insertion est construite une fois et réutilisée à chaque envoi
+metadata = MetaData()
+dossiers_patients = Table(
+    "dossiers_patients", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("patient_ref_id", String(100), nullable=False, unique=True),
+    Column("date_naissance", Date, nullable=False),
+    Column("sexe", String(10), nullable=False),
+    Column("date_visite", DateTime, server_default=func.current_timestamp()),
+    Column("poids_kg", Numeric(5, 2)),
+    Column("taille_cm", Numeric(5, 1)),
+    Column("tension_systolique", Integer),
+    Column("tension_diastolique", Integer),
+    Column("temperature_celsius", Numeric(4, 2)),
+    Column("imc", Numeric(5, 2)),
+    Column("diagnostic_primaire", Text),
+    Column("notes_medecin", Text),
+)
+INSERTION_PATIENT = dossiers_patients.insert().returning(dossiers_patients.c.id)
+
+# Test de connexion au démarrage (thread d'arrière-plan: l'import n'attend pas la base)
+def verifier_base():
+    """Vérifie la connexion et la table dossiers_patients (True si la base est utilisable)"""
+    print("🔌 Test de connexion à PostgreSQL...")
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(text("SELECT version();"))
+            version = result.fetchone()[0]
+            print(f"✅ Connexion PostgreSQL réussie! Version: {version[:50]}...")
+        
+            # Vérifier que la table existe
             result = conn.execute(text("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = 'dossiers_patients'
-                ORDER BY ordinal_position;
+                SELECT EXISTS (
+                    SELECT FROM information_schema.tables 
+                    WHERE table_name = 'dossiers_patients'
+                );
             """))
-            columns = [row[0] for row in result.fetchall()]
-            print(f"✅ Colonnes disponibles: {columns}")
+            table_exists = result.fetchone()[0]
+            if table_exists:
+                print("✅ Table 'dossiers_patients' existe")
+            
+                # Vérifier les colonnes
+                result = conn.execute(text("""
+                    SELECT column_name 
+                    FROM information_schema.columns 
+                    WHERE table_name = 'dossiers_patients'
+                    ORDER BY ordinal_position;
+                """))
+                columns = [row[0] for row in result.fetchall()]
+                print(f"✅ Colonnes disponibles: {columns}")
             
-            # Vérifier si la colonne imc existe
-            if 'imc' in columns:
-                print("✅ Colonne 'imc' existe")
+                # Vérifier si la colonne imc existe
+                if 'imc' in columns:
+                    print("✅ Colonne 'imc' existe")
+                else:
+                    print("⚠️  Colonne 'imc' MANQUANTE - Veuillez exécuter add_column_imc.sql")
             else:
-                print("⚠️  Colonne 'imc' MANQUANTE - Veuillez exécuter add_column_imc.sql")
-        else:
-            print("❌ Table 'dossiers_patients' N'EXISTE PAS - Veuillez exécuter create_table.sql")
-except Exception as e:
-    print(f"❌ ERREUR DE CONNEXION: {e}")
-    print("⚠️  Vérifiez vos identifiants PostgreSQL et que le serveur est démarré")
-    import traceback
-    traceback.print_exc()
+                print("❌ Table 'dossiers_patients' N'EXISTE PAS - Veuillez exécuter create_table.sql")
+        return True
+    except Exception as e:
+        print(f"❌ ERREUR DE CONNEXION: {e}")
+        print("⚠️  Vérifiez vos identifiants PostgreSQL et que le serveur est démarré")
+        return False
+
+lancer_initialisation(verifier_base)
 
 # Configuration du style des graphiques
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_theme(style="darkgrid", palette="husl")
+# (appliquée au premier chargement de matplotlib, voir bibliotheques.py)
+definir_style('seaborn-v0_8-darkgrid', style="darkgrid", palette="husl")
 
 # ============================================================================
 # INTERFACE UTILISATEUR (UI) - Module Infirmière
@@ -254,16 +278,13 @@ def server(input, output, session):
             
             print(f"📦 Données préparées: {new_data}")
             
-            # Conversion en DataFrame Pandas
-            df = pd.DataFrame([new_data])
-            
             print("💾 Tentative d'écriture dans PostgreSQL...")
             
-            # Écriture dans PostgreSQL (corrigé pour SQLAlchemy 2.0)
+            # Écriture dans PostgreSQL: INSERT ... RETURNING id précompilé
             with engine.begin() as conn:
-                df.to_sql('dossiers_patients', conn, if_exists='append', index=False)
+                patient_id = conn.execute(INSERTION_PATIENT, new_data).scalar_one()
             
-            print("✅ DONNÉES ENREGISTRÉES AVEC SUCCÈS DANS POSTGRESQL!")
+            print(f"✅ DONNÉES ENREGISTRÉES AVEC SUCCÈS DANS POSTGRESQL! (id {patient_id})")
             
             # Message de succès
             msg = f"✅ Patient {input.patient_ref_id()} enregistré avec succès !"
@@ -352,6 +373,7 @@ def server(input, output, session):
     @render.plot
     def plot_univar():
         """Graphique d'analyse univariée (distribution)"""
+        plt, sns = graphiques()
         df = charger_donnees()
         var_choisie = input.var_univar()
         
@@ -394,6 +416,7 @@ def server(input, output, session):
     @render.plot
     def plot_bivar():
         """Graphique d'analyse bivariée (corrélation)"""
+        plt, sns = graphiques()
         df = charger_donnees()
         var1 = input.var_bivar1()
         var2 = input.var_bivar2()
@@ -432,6 +455,7 @@ def server(input, output, session):
     @render.text
     def correlation_output():
         """Calcule et affiche les tests de corrélation"""
+        stats = statistiques()
         df = charger_donnees()
         var1 = input.var_bivar1()
         var2 = input.var_bivar2()
@@ -496,6 +520,8 @@ Nombre d'observations utilisées: {len(data_clean)}
 # ============================================================================
 
 if __name__ == "__main__":
-    app = App(app_ui, server)
-    app.run(port=8000, reload=False)
+    import uvicorn
+    app = avec_point_pret(App(app_ui, server))
+    prechauffer()
+    uvicorn.run(app, port=8000)
 
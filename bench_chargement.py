@@ -0,0 +1,155 @@
+"""
+Benchmark du chargement des projets: colonnes Decimal (object) vs colonnes typées
+
+Compare, pour N projets (1 000 000 par défaut), la mémoire du DataFrame et la
+durée des calculs de l'onglet Analyste (mean, sum, dropna, np.polyfit,
+pearsonr, spearmanr) entre:
+    - avant: colonnes NUMERIC en Decimal dans des colonnes object (pd.read_sql)
+    - après: colonnes typées d'après le schéma (requetes.lire_type):
+      float32/float64 et category
+
+Sans --base, les lignes sont générées telles que le pilote les renverrait;
+avec --base, elles sont lues dans projets_beton (les deux chargements).
+
+Usage:
+    python bench_chargement.py
+    python bench_chargement.py --lignes 200000
+    python bench_chargement.py --base
+"""
+
+import argparse
+import decimal
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from schema import type_pandas
+
+# Colonnes mesurées: (type PostgreSQL, précision) comme dans create_table_genie_civil.sql
+COLONNES = {
+    "volume_beton_m3": ("numeric", 10),
+    "resistance_mpa": ("numeric", 6),
+    "cout_total_eur": ("numeric", 10),
+    "marge_securite": ("numeric", 6),
+    "type_structure": ("character varying", None),
+    "statut": ("character varying", None),
+}
+CATEGORIELLES = {"type_structure", "statut"}
+X, Y = "volume_beton_m3", "cout_total_eur"
+
+
+def generer(n, graine=0):
+    """Colonnes brutes (numpy) d'un jeu de projets réaliste"""
+    rng = np.random.default_rng(graine)
+    volume = np.round(rng.uniform(1, 500, n), 3)
+    return {
+        "volume_beton_m3": volume,
+        "resistance_mpa": np.round(rng.choice([25.0, 30.0, 35.0, 40.0], n), 2),
+        "cout_total_eur": np.round(volume * rng.uniform(140, 180, n), 2),
+        "marge_securite": np.round(rng.uniform(1, 4, n), 2),
+        "type_structure": rng.choice(["Bâtiment", "Pont", "Route", "Barrage"], n),
+        "statut": rng.choice(["En conception", "Validé", "Terminé"], n),
+    }
+
+
+def lignes_decimal(brut):
+    """Lignes comme psycopg2 les renvoie pour des colonnes NUMERIC: des Decimal"""
+    colonnes = [
+        [decimal.Decimal(f"{v}") for v in brut[nom]] if COLONNES[nom][0] == "numeric" else list(brut[nom])
+        for nom in COLONNES
+    ]
+    return list(zip(*colonnes))
+
+
+def lignes_float(brut):
+    """Lignes lues en DOUBLE PRECISION: des float"""
+    return list(zip(*(brut[nom].tolist() for nom in COLONNES)))
+
+
+def charger_avant(lignes):
+    return pd.DataFrame.from_records(lignes, columns=list(COLONNES))
+
+
+def charger_apres(lignes):
+    from requetes import _cadre_type
+    types = {nom: type_pandas(*COLONNES[nom], categorielle=nom in CATEGORIELLES) for nom in COLONNES}
+    return _cadre_type(lignes, types).astype({nom: "category" for nom in CATEGORIELLES})
+
+
+def calculs(df):
+    """Calculs de l'onglet Analyste; retourne {nom: durée en ms}"""
+    from scipy import stats
+    durees = {}
+
+    def mesurer(nom, fonction):
+        debut = time.perf_counter()
+        fonction()
+        durees[nom] = (time.perf_counter() - debut) * 1000
+
+    mesurer("mean", lambda: df[X].mean())
+    mesurer("sum", lambda: df[Y].sum())
+    mesurer("dropna", lambda: df[[X, Y]].dropna())
+    propre = df[[X, Y]].dropna()
+    mesurer("polyfit", lambda: np.polyfit(propre[X].astype(float), propre[Y].astype(float), 1))
+    mesurer("pearsonr", lambda: stats.pearsonr(propre[X].astype(float), propre[Y].astype(float)))
+    mesurer("spearmanr", lambda: stats.spearmanr(propre[X].astype(float), propre[Y].astype(float)))
+    mesurer("groupby", lambda: df.groupby("type_structure", observed=True)[Y].mean())
+    return durees
+
+
+def depuis_base(n):
+    """(DataFrame avant, durée, DataFrame après, durée) lus dans projets_beton"""
+    from sqlalchemy import text
+    from base_donnees import engine
+    from requetes import lire_type, selection_typee
+
+    with engine.connect() as conn:
+        debut = time.perf_counter()
+        avant = pd.read_sql(text(f"SELECT {', '.join(COLONNES)} FROM projets_beton LIMIT :n"), conn, params={"n": n})
+        duree_avant = time.perf_counter() - debut
+        types, selection = selection_typee(engine, list(COLONNES))
+        debut = time.perf_counter()
+        apres = lire_type(conn, f"SELECT {', '.join(selection)} FROM projets_beton LIMIT :n", {"n": n}, types,
+                          par_blocs=True)
+        duree_apres = time.perf_counter() - debut
+    return avant, duree_avant, apres, duree_apres
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chargement Decimal/object vs colonnes typées")
+    parser.add_argument("--lignes", type=int, default=1_000_000, help="Projets chargés (défaut: 1 000 000)")
+    parser.add_argument("--base", action="store_true", help="Lire projets_beton au lieu de lignes générées")
+    args = parser.parse_args(argv)
+
+    if args.base:
+        avant, duree_avant, apres, duree_apres = depuis_base(args.lignes)
+    else:
+        brut = generer(args.lignes)
+        lignes = lignes_decimal(brut)
+        debut = time.perf_counter()
+        avant = charger_avant(lignes)
+        duree_avant = time.perf_counter() - debut
+        del lignes
+        lignes = lignes_float(brut)
+        debut = time.perf_counter()
+        apres = charger_apres(lignes)
+        duree_apres = time.perf_counter() - debut
+        del lignes
+
+    print(f"{len(avant)} projets")
+    print(f"{'':<14} {'avant (Decimal)':>16} {'après (typé)':>14}")
+    memoire_avant = avant.memory_usage(deep=True).sum() / 1e6
+    memoire_apres = apres.memory_usage(deep=True).sum() / 1e6
+    print(f"{'mémoire (Mo)':<14} {memoire_avant:16.1f} {memoire_apres:14.1f}")
+    print(f"{'chargement ms':<14} {duree_avant * 1000:16.0f} {duree_apres * 1000:14.0f}")
+    calculs_avant, calculs_apres = calculs(avant), calculs(apres)
+    for nom in calculs_avant:
+        print(f"{nom + ' ms':<14} {calculs_avant[nom]:16.1f} {calculs_apres[nom]:14.1f}")
+    print("Types après:", ", ".join(f"{nom}={t}" for nom, t in apres.dtypes.astype(str).items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
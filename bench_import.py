@@ -0,0 +1,93 @@
+"""
+Mesure du temps d'import à froid d'une application (python -X importtime)
+
+Importe le module dans un processus neuf (préchauffage des bibliothèques
+désactivé), regroupe le temps propre de chaque module importé par paquet
+racine et affiche les paquets les plus coûteux. Chaque mesure est ajoutée à un historique CSV
+(date, commit, temps par paquet suivi) pour suivre l'évolution d'une version à l'autre.
+
+Usage:
+    python bench_import.py
+    python bench_import.py --module app --repetitions 5 --historique mesures_import.csv
+"""
+
+import argparse
+import collections
+import csv
+import datetime
+import os
+import statistics
+import subprocess
+import sys
+
+# Paquets dont le temps d'import est suivi dans l'historique
+PAQUETS_SUIVIS = ["shiny", "pandas", "numpy", "sqlalchemy", "matplotlib", "seaborn", "scipy"]
+
+
+def mesurer(module):
+    """Un import à froid: (durée totale en ms, {paquet: temps d'import en ms})"""
+    env = dict(os.environ, PRECHAUFFAGE_BIBLIOTHEQUES="0", PYTHONDONTWRITEBYTECODE="1")
+    resultat = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if resultat.returncode != 0:
+        raise RuntimeError(f"Import de {module} impossible:\n{resultat.stderr[-2000:]}")
+    par_paquet = collections.Counter()
+    for ligne in resultat.stderr.splitlines():
+        if not ligne.startswith("import time:") or "imported package" in ligne:
+            continue
+        propre, _, nom = ligne[len("import time:"):].split("|")
+        # Temps propre de chaque module, rattaché à son paquet racine (sous-modules compris)
+        par_paquet[nom.strip().split(".")[0]] += int(propre) / 1000
+    return sum(par_paquet.values()), par_paquet
+
+
+def version_courante():
+    """Commit courant (git), ou "inconnue" hors dépôt"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "inconnue"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Temps d'import à froid d'une application")
+    parser.add_argument("--module", default="app_genie_civil", help="Module à importer (défaut: app_genie_civil)")
+    parser.add_argument("--repetitions", type=int, default=3, help="Imports mesurés (médiane, défaut: 3)")
+    parser.add_argument("--top", type=int, default=15, help="Paquets affichés (défaut: 15)")
+    parser.add_argument("--historique", default="mesures_import.csv",
+                        help="Fichier CSV où ajouter la mesure ('' pour ne rien écrire)")
+    args = parser.parse_args(argv)
+
+    mesures = [mesurer(args.module) for _ in range(args.repetitions)]
+    totaux = [total for total, _ in mesures]
+    paquets = collections.Counter({
+        nom: statistics.median(m[1].get(nom, 0.0) for m in mesures)
+        for nom in set().union(*(m[1] for m in mesures))
+    })
+    total = statistics.median(totaux)
+
+    print(f"Import de {args.module}: {total:.0f} ms (médiane de {args.repetitions}, "
+          f"min {min(totaux):.0f} ms, max {max(totaux):.0f} ms)")
+    print(f"{'Paquet':<28} {'ms':>8} {'part':>7}")
+    for nom, duree in paquets.most_common(args.top):
+        print(f"{nom:<28} {duree:8.0f} {duree / total:7.1%}")
+
+    if args.historique:
+        nouveau = not os.path.exists(args.historique)
+        with open(args.historique, "a", newline="", encoding="utf-8") as f:
+            ecrivain = csv.writer(f)
+            if nouveau:
+                ecrivain.writerow(["date", "version", "module", "total_ms"] + [f"{p}_ms" for p in PAQUETS_SUIVIS])
+            ecrivain.writerow(
+                [datetime.datetime.now().isoformat(timespec="seconds"), version_courante(), args.module,
+                 round(total)] + [round(paquets.get(p, 0.0)) for p in PAQUETS_SUIVIS]
+            )
+        print(f"📈 Mesure ajoutée à {args.historique}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
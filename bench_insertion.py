@@ -0,0 +1,99 @@
+"""
+Micro-benchmark de l'enregistrement d'un projet: DataFrame.to_sql vs INSERT ... RETURNING id précompilé
+
+Simule N sessions qui enregistrent des projets en parallèle (un thread par
+session) et affiche les latences p50/p95/p99 et le débit de chaque méthode.
+Les lignes créées (nom_projet commençant par "__bench__") sont supprimées à la fin.
+
+Usage:
+    python bench_insertion.py
+    python bench_insertion.py --sessions 50 --envois 40
+"""
+
+import argparse
+import concurrent.futures
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from base_donnees import DATABASE_URL, inserer_projet
+from calculs_beton import COLONNES_ENTREE, calculer_projet, arrondir_resultat
+
+PREFIXE = "__bench__"
+
+PROJET_TYPE = {
+    "type_structure": "Bâtiment", "forme_structure": "Rectangulaire",
+    "longueur_m": 10.0, "largeur_m": 8.0, "hauteur_m": 3.0, "epaisseur_m": 0.2,
+    "charge_statique_kn": 5000.0, "charge_dynamique_kn": 50.0, "charge_vent_kn": 20.0,
+    "charge_neige_kn": 10.0, "charge_seisme_kn": 5.0, "resistance_mpa": 30.0,
+    "dosage_ciment_kg_m3": 350.0, "dosage_eau_kg_m3": 175.0, "dosage_sable_kg_m3": 700.0,
+    "dosage_gravier_kg_m3": 1100.0, "coefficient_securite": 1.5,
+}
+
+
+def donnees_projet(numero):
+    valeurs = {nom: PROJET_TYPE[nom] for nom in COLONNES_ENTREE}
+    return {
+        "nom_projet": f"{PREFIXE}{numero}",
+        **valeurs,
+        "type_beton": "Ordinaire",
+        **arrondir_resultat(calculer_projet(valeurs)),
+        "statut": "En conception",
+    }
+
+
+def envoi_to_sql(engine, numero):
+    with engine.begin() as conn:
+        pd.DataFrame([donnees_projet(numero)]).to_sql("projets_beton", conn, if_exists="append", index=False)
+
+
+def envoi_insert(engine, numero):
+    with engine.begin() as conn:
+        inserer_projet(conn, donnees_projet(numero))
+
+
+def mesurer(engine, envoi, sessions, envois):
+    """Lance sessions × envois enregistrements; retourne (latences en ms, durée totale en s)"""
+    def session(indice):
+        latences = []
+        for k in range(envois):
+            debut = time.perf_counter()
+            envoi(engine, indice * envois + k)
+            latences.append((time.perf_counter() - debut) * 1000)
+        return latences
+
+    debut = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=sessions) as pool:
+        latences = [l for resultat in pool.map(session, range(sessions)) for l in resultat]
+    return np.array(latences), time.perf_counter() - debut
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de l'insertion d'un projet sous charge concurrente")
+    parser.add_argument("--sessions", type=int, default=50, help="Sessions simultanées (défaut: 50)")
+    parser.add_argument("--envois", type=int, default=20, help="Enregistrements par session (défaut: 20)")
+    args = parser.parse_args(argv)
+
+    # Un pool assez grand pour mesurer le coût de l'instruction, pas l'attente d'une connexion
+    engine = create_engine(DATABASE_URL, pool_size=args.sessions, max_overflow=0)
+    try:
+        for nom, envoi in [("DataFrame.to_sql", envoi_to_sql), ("INSERT ... RETURNING id", envoi_insert)]:
+            envoi(engine, -1)  # préchauffage (connexions, caches)
+            latences, duree = mesurer(engine, envoi, args.sessions, args.envois)
+            p50, p95, p99 = np.percentile(latences, [50, 95, 99])
+            print(f"{nom:<26} p50 {p50:7.2f} ms   p95 {p95:7.2f} ms   p99 {p99:7.2f} ms   "
+                  f"{len(latences) / duree:8.0f} insertions/s")
+    finally:
+        with engine.begin() as conn:
+            supprimees = conn.execute(text("DELETE FROM projets_beton WHERE nom_projet LIKE :motif"),
+                                      {"motif": PREFIXE + "%"}).rowcount
+        print(f"🧹 {supprimees} ligne(s) de test supprimée(s)")
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Benchmark de la file d'écriture groupée (soumissions.py) sous écritures concurrentes
+
+Pour 1, 10 et 100 écrivains simultanés (coroutines de la même boucle, comme les
+sessions Shiny), compare l'enregistrement direct (une transaction par projet,
+executer_db(enregistrer_projet)) à la file groupée (soumettre_projet) et affiche
+les latences p50/p95/p99, le débit et la taille moyenne des lots.
+Les lignes créées (nom_projet commençant par "__bench__") sont supprimées à la fin.
+
+Usage:
+    python bench_soumissions.py
+    python bench_soumissions.py --ecrivains 1 10 100 --envois 50
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+import soumissions
+from base_donnees import engine, enregistrer_projet, executer_db
+from bench_insertion import PREFIXE, donnees_projet
+
+
+async def envoi_direct(valeurs):
+    return await executer_db(enregistrer_projet, valeurs)
+
+
+async def mesurer(envoi, ecrivains, envois):
+    """Lance ecrivains × envois enregistrements; retourne (latences en ms, durée totale en s)"""
+    async def ecrivain(indice):
+        latences = []
+        for k in range(envois):
+            valeurs = donnees_projet(indice * envois + k)
+            debut = time.perf_counter()
+            await envoi(valeurs)
+            latences.append((time.perf_counter() - debut) * 1000)
+        return latences
+
+    debut = time.perf_counter()
+    resultats = await asyncio.gather(*(ecrivain(i) for i in range(ecrivains)))
+    return np.array([l for latences in resultats for l in latences]), time.perf_counter() - debut
+
+
+async def comparer(liste_ecrivains, envois):
+    for nom, envoi in [("Direct", envoi_direct), ("File groupée", soumissions.soumettre_projet)]:
+        await envoi(donnees_projet(-1))  # préchauffage (connexions, caches)
+        for ecrivains in liste_ecrivains:
+            avant = soumissions.statistiques()
+            latences, duree = await mesurer(envoi, ecrivains, envois)
+            apres = soumissions.statistiques()
+            p50, p95, p99 = np.percentile(latences, [50, 95, 99])
+            lots = apres["lots"] - avant["lots"]
+            detail = f"   lots de {(apres['projets'] - avant['projets']) / lots:6.1f}" if lots else ""
+            print(f"{nom:<13} {ecrivains:>4} écrivain(s)   p50 {p50:7.2f} ms   p95 {p95:7.2f} ms   "
+                  f"p99 {p99:7.2f} ms   {len(latences) / duree:8.0f} insertions/s{detail}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de la file d'écriture groupée des projets")
+    parser.add_argument("--ecrivains", type=int, nargs="+", default=[1, 10, 100],
+                        help="Nombres d'écrivains simultanés (défaut: 1 10 100)")
+    parser.add_argument("--envois", type=int, default=20, help="Enregistrements par écrivain (défaut: 20)")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(comparer(args.ecrivains, args.envois))
+    finally:
+        with engine.begin() as conn:
+            supprimees = conn.execute(text("DELETE FROM projets_beton WHERE nom_projet LIKE :motif"),
+                                      {"motif": PREFIXE + "%"}).rowcount
+        print(f"🧹 {supprimees} ligne(s) de test supprimée(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
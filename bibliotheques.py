@@ -0,0 +1,69 @@
+"""
+Chargement différé des bibliothèques lourdes (matplotlib, seaborn, scipy)
+
+Ces bibliothèques représentent l'essentiel du temps d'import des applications:
+elles ne sont plus importées au démarrage mais au premier graphique ou test
+statistique, ou préchauffées dans un thread d'arrière-plan une fois
+l'application importée (prechauffer). Une session qui n'utilise que la saisie
+de projets ne les attend jamais.
+
+PRECHAUFFAGE_BIBLIOTHEQUES=0 désactive le préchauffage (chargement au premier usage).
+Mesure du temps d'import: python bench_import.py
+"""
+
+import importlib
+import os
+import threading
+import time
+
+PRECHAUFFAGE = os.getenv("PRECHAUFFAGE_BIBLIOTHEQUES", "1") == "1"
+DELAI_PRECHAUFFAGE_S = 1.0
+
+_verrou = threading.Lock()
+_style = {"matplotlib": "seaborn-v0_8-whitegrid", "seaborn": {"style": "whitegrid", "palette": "Blues"}}
+_graphiques = {}
+
+
+def definir_style(style_matplotlib, **theme_seaborn):
+    """Style appliqué aux graphiques au chargement de matplotlib/seaborn (sans les importer)"""
+    _style["matplotlib"] = style_matplotlib
+    _style["seaborn"] = theme_seaborn
+
+
+def graphiques():
+    """(matplotlib.pyplot, seaborn), importés et configurés au premier appel"""
+    with _verrou:
+        if not _graphiques:
+            debut = time.perf_counter()
+            import matplotlib.pyplot as plt
+            import seaborn as sns
+            plt.style.use(_style["matplotlib"])
+            sns.set_theme(**_style["seaborn"])
+            _graphiques.update(plt=plt, sns=sns)
+            print(f"[BIBLIOTHEQUES] matplotlib et seaborn chargés en {time.perf_counter() - debut:.2f} s")
+        return _graphiques["plt"], _graphiques["sns"]
+
+
+def statistiques():
+    """Module scipy.stats, importé au premier appel"""
+    from scipy import stats
+    return stats
+
+
+def _prechauffer():
+    time.sleep(DELAI_PRECHAUFFAGE_S)  # laisser l'application répondre aux premières requêtes
+    debut = time.perf_counter()
+    try:
+        graphiques()
+        statistiques()
+        importlib.import_module("scipy.optimize")  # optimisation des mélanges (optimisation.py)
+    except Exception as e:
+        print(f"[BIBLIOTHEQUES] ⚠️ Préchauffage impossible: {str(e)[:150]}")
+        return
+    print(f"[BIBLIOTHEQUES] Préchauffage terminé en {time.perf_counter() - debut:.2f} s")
+
+
+def prechauffer():
+    """Importe les bibliothèques lourdes en arrière-plan (si PRECHAUFFAGE_BIBLIOTHEQUES=1)"""
+    if PRECHAUFFAGE:
+        threading.Thread(target=_prechauffer, name="prechauffage", daemon=True).start()
@@ -0,0 +1,160 @@
+"""
+Cache partagé des lectures de projets_beton, commun à toutes les sessions
+
+Les résultats des requêtes de lecture (page de projets, statistiques, colonnes
+analysées) sont gardés une seule fois pour tout le processus, par clé
+(requête, paramètres): 100 tableaux de bord ouverts sur le même filtre partagent
+la même copie et une seule requête.
+
+Chaque entrée porte la version des données au moment de sa lecture. Un trigger
+sur projets_beton envoie une notification (NOTIFY) à chaque modification; le
+thread d'écoute (evenements.py) incrémente alors la version: les entrées sont
+périmées, ou mises à jour sur place pour de simples insertions quand elles savent
+intégrer les nouvelles lignes. Tant que l'écoute n'est pas active (base inaccessible,
+reconnexion), le cache est contourné: aucune donnée périmée n'est servie.
+
+La mémoire occupée est bornée (CACHE_DONNEES_MO, 256 Mo par défaut): les
+entrées les moins récemment lues sont évincées en premier.
+"""
+
+import collections
+import os
+import sys
+import threading
+
+import pandas as pd
+
+CANAL = "projets_beton_modifies"
+BUDGET_OCTETS = int(float(os.getenv("CACHE_DONNEES_MO", "256")) * 1024 * 1024)
+
+_entrees = collections.OrderedDict()  # clé -> (version, valeur, taille en octets, insertion)
+_etat = {"version": 0, "octets": 0, "ecoute": False, "lectures": 0, "succes": 0}
+_verrou = threading.Lock()
+_verrous_cles = [threading.Lock() for _ in range(64)]  # une lecture en base à la fois par clé
+
+
+def taille_octets(valeur):
+    """Estimation de la mémoire occupée par une valeur du cache"""
+    if isinstance(valeur, pd.DataFrame):
+        return int(valeur.memory_usage(deep=True).sum())
+    if isinstance(valeur, tuple):
+        return sum(taille_octets(v) for v in valeur)
+    return sys.getsizeof(valeur)
+
+
+def version():
+    """Version courante des données"""
+    with _verrou:
+        return _etat["version"]
+
+
+def nouvelle_version():
+    """Marque toutes les entrées comme périmées (modification de projets_beton)"""
+    with _verrou:
+        _etat["version"] += 1
+        _entrees.clear()
+        _etat["octets"] = 0
+
+
+def etat_cache():
+    """Copie de l'état du cache {version, octets, entrees, ecoute, lectures, succes}"""
+    with _verrou:
+        return {**_etat, "entrees": len(_entrees)}
+
+
+def _lire(cle, version_courante):
+    with _verrou:
+        entree = _entrees.get(cle)
+        if entree is None or entree[0] != version_courante:
+            return None
+        _entrees.move_to_end(cle)
+        _etat["succes"] += 1
+        return entree
+
+
+def appliquer_insertions(lignes):
+    """
+    Nouvelle version après l'insertion de lignes (DataFrame des projets insérés).
+
+    Chaque entrée qui a une fonction d'insertion est mise à jour
+    (insertion(valeur, lignes) -> nouvelle valeur, ou None pour l'évincer);
+    les autres sont évincées. Les fusions sont faites hors du verrou: pendant
+    ce temps les lectures voient la nouvelle version et lisent la base.
+    """
+    with _verrou:
+        ancienne_version = _etat["version"]
+        _etat["version"] += 1
+        version_courante = _etat["version"]
+        a_fusionner = [(cle, valeur, insertion) for cle, (version_entree, valeur, _, insertion) in _entrees.items()
+                       if version_entree == ancienne_version and insertion is not None]
+    fusions = {}
+    for cle, valeur, insertion in a_fusionner:
+        nouvelle = insertion(valeur, lignes)
+        if nouvelle is not None:
+            fusions[cle] = (version_courante, nouvelle, taille_octets(nouvelle), insertion)
+    with _verrou:
+        if _etat["version"] != version_courante:
+            return  # autre modification pendant la fusion: entrées déjà périmées
+        for cle, entree in list(_entrees.items()):
+            if entree[0] == version_courante:
+                continue  # relue en base pendant la fusion
+            if cle in fusions:
+                _etat["octets"] += fusions[cle][2] - entree[2]
+                _entrees[cle] = fusions[cle]  # même rang dans l'ordre d'éviction
+            else:
+                _etat["octets"] -= _entrees.pop(cle)[2]
+        while _etat["octets"] > BUDGET_OCTETS:
+            _, (_, _, taille_evincee, _) = _entrees.popitem(last=False)
+            _etat["octets"] -= taille_evincee
+
+
+def _ranger(cle, version_lue, valeur, insertion):
+    taille = taille_octets(valeur)
+    if taille > BUDGET_OCTETS:
+        return
+    with _verrou:
+        if version_lue != _etat["version"]:
+            return  # données modifiées pendant la lecture
+        ancienne = _entrees.pop(cle, None)
+        if ancienne is not None:
+            _etat["octets"] -= ancienne[2]
+        _entrees[cle] = (version_lue, valeur, taille, insertion)
+        _etat["octets"] += taille
+        # Éviction des entrées les moins récemment lues
+        while _etat["octets"] > BUDGET_OCTETS:
+            _, (_, _, taille_evincee, _) = _entrees.popitem(last=False)
+            _etat["octets"] -= taille_evincee
+
+
+def lire_en_cache(cle, charger, insertion=None):
+    """
+    Valeur en cache pour cle, ou résultat de charger() rangé dans le cache.
+
+    insertion: fonction optionnelle (valeur, lignes insérées) -> valeur à jour ou None,
+    qui évite de relire la base après une simple insertion (voir appliquer_insertions).
+    Les valeurs sont partagées entre sessions: ne jamais les modifier sur place.
+    """
+    with _verrou:
+        _etat["lectures"] += 1
+        ecoute = _etat["ecoute"]
+    if not ecoute:
+        return charger()
+    version_courante = version()
+    entree = _lire(cle, version_courante)
+    if entree is not None:
+        return entree[1]
+    # Une seule session lit la base pour une clé donnée; les autres attendent son résultat
+    with _verrous_cles[hash(cle) % len(_verrous_cles)]:
+        version_courante = version()
+        entree = _lire(cle, version_courante)
+        if entree is not None:
+            return entree[1]
+        valeur = charger()
+        _ranger(cle, version_courante, valeur, insertion)
+        return valeur
+
+
+def marquer_ecoute(active):
+    """Active (écoute des notifications en place) ou contourne le cache"""
+    with _verrou:
+        _etat["ecoute"] = active
@@ -0,0 +1,287 @@
+"""
+Noyau de calcul vectorisé des projets béton
+
+Toutes les formules de conception (volume selon la forme, quantités de matériaux,
+charges, contrainte, marge de sécurité, coûts, durée, dimensions des éléments,
+résistance structurelle, déformation et déplacement) sont évaluées en une seule
+passe NumPy sur N projets à la fois.
+
+Utilisé par:
+    - le formulaire "Saisie Projet" (N = 1)
+    - les imports en masse et les recalculs de la table projets_beton
+"""
+
+import numpy as np
+import pandas as pd
+
+# Prix unitaires des matériaux (en euros)
+PRIX_CIMENT = 0.15  # €/kg
+PRIX_SABLE = 0.05   # €/kg
+PRIX_GRAVIER = 0.04 # €/kg
+PRIX_MAIN_OEUVRE = 80  # €/m³
+
+# Tarif par défaut (clés = colonnes de la table prix_materiaux, voir prix.py)
+PRIX_PAR_DEFAUT = {
+    "prix_ciment": PRIX_CIMENT,
+    "prix_sable": PRIX_SABLE,
+    "prix_gravier": PRIX_GRAVIER,
+    "prix_main_oeuvre": PRIX_MAIN_OEUVRE,
+}
+
+# Constantes pour les calculs structurels
+MODULE_ELASTICITE_BETON = 30000  # MPa (module d'élasticité du béton)
+POISSON_BETON = 0.2  # Coefficient de Poisson
+RENDEMENT_MAIN_OEUVRE = 2.5  # m³/jour par ouvrier (productivité)
+
+# Facteurs de forme appliqués à la résistance structurelle
+FACTEUR_FORME_RECTANGULAIRE = 0.85
+FACTEUR_FORME_AUTRE = 0.75
+
+# Facteur de correction du volume pour les formes irrégulières
+FACTEUR_IRREGULIER = 0.8
+
+# Marge de sécurité retenue quand aucune contrainte n'est appliquée
+MARGE_SANS_CONTRAINTE = 999
+
+# Types de structure dimensionnés comme des bâtiments (poutres/colonnes légères)
+TYPES_BATIMENT = ["Bâtiment", "Fondation"]
+
+# Colonnes saisies par l'ingénieur et nécessaires au calcul
+COLONNES_NUMERIQUES = [
+    "longueur_m", "largeur_m", "hauteur_m", "epaisseur_m",
+    "charge_statique_kn", "charge_dynamique_kn", "charge_vent_kn",
+    "charge_neige_kn", "charge_seisme_kn",
+    "resistance_mpa", "coefficient_securite",
+    "dosage_ciment_kg_m3", "dosage_eau_kg_m3",
+    "dosage_sable_kg_m3", "dosage_gravier_kg_m3",
+]
+COLONNES_TEXTE = ["type_structure", "forme_structure"]
+
+# Bornes (min, max) des champs de saisie, partagées par le formulaire et la validation
+BORNES = {
+    "longueur_m": (0.1, 1000),
+    "largeur_m": (0.1, 1000),
+    "hauteur_m": (0.1, 500),
+    "epaisseur_m": (0.05, 5),
+    "charge_statique_kn": (0, 100000),
+    "charge_dynamique_kn": (0, 100000),
+    "charge_vent_kn": (0, 10000),
+    "charge_neige_kn": (0, 10000),
+    "charge_seisme_kn": (0, 10000),
+    "resistance_mpa": (10, 150),
+    "coefficient_securite": (1.0, 3.0),
+    "dosage_ciment_kg_m3": (200, 600),
+    "dosage_eau_kg_m3": (100, 300),
+    "dosage_sable_kg_m3": (400, 1200),
+    "dosage_gravier_kg_m3": (800, 1800),
+}
+
+# Types de structure proposés par le formulaire (et acceptés à l'import)
+TYPES_STRUCTURE = ["Bâtiment", "Pont", "Route", "Barrage", "Fondation", "Mur de soutènement", "Autre"]
+
+# Formes reconnues par le calcul du volume
+FORMES_STRUCTURE = ["Rectangulaire", "Circulaire", "Trapézoïdale", "Irregulière"]
+COLONNES_ENTREE = COLONNES_TEXTE + COLONNES_NUMERIQUES
+
+# Colonnes calculées et nombre de décimales stockées dans projets_beton
+ARRONDIS = {
+    "volume_beton_m3": 3,
+    "quantite_ciment_kg": 2,
+    "quantite_eau_kg": 2,
+    "quantite_sable_kg": 2,
+    "quantite_gravier_kg": 2,
+    "cout_ciment_eur": 2,
+    "cout_sable_eur": 2,
+    "cout_gravier_eur": 2,
+    "cout_main_oeuvre_eur": 2,
+    "cout_total_eur": 2,
+    "charge_totale_kn": 2,
+    "contrainte_mpa": 2,
+    "marge_securite": 2,
+    "duree_projet_jours": 0,
+    "largeur_poutre_m": 2,
+    "hauteur_poutre_m": 2,
+    "largeur_colonne_m": 2,
+    "epaisseur_dalle_m": 2,
+    "resistance_structure_mpa": 2,
+    "deformation": 6,
+    "deplacement_mm": 2,
+    "cout_materiaux_eur": 2,
+}
+COLONNES_CALCULEES = list(ARRONDIS)
+
+
+def facteur_forme(forme_structure):
+    """Facteur de forme (0.85 si rectangulaire, 0.75 sinon), scalaire ou vectoriel"""
+    forme = np.asarray(forme_structure, dtype=object)
+    resultat = np.where(forme == "Rectangulaire", FACTEUR_FORME_RECTANGULAIRE, FACTEUR_FORME_AUTRE)
+    return float(resultat) if resultat.ndim == 0 else resultat
+
+
+def calculer_contrainte_marge(charge_totale, surface_plan, resistance):
+    """
+    Contrainte appliquée (MPa) et marge de sécurité, en vectoriel.
+
+    Contrainte = charge / surface (kN/m² -> MPa), nulle si la surface est nulle;
+    marge = résistance / contrainte, MARGE_SANS_CONTRAINTE sans contrainte.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        contrainte_mpa = np.where(surface_plan > 0, (charge_totale * 1000) / (surface_plan * 1000000), 0.0)
+        marge_securite = np.where(contrainte_mpa > 0, resistance / contrainte_mpa, MARGE_SANS_CONTRAINTE)
+    return contrainte_mpa, marge_securite
+
+
+def calculer_colonnes(colonnes, prix=None):
+    """
+    Calcule toutes les colonnes dérivées pour N projets en une passe vectorisée.
+
+    colonnes: mapping (dict ou DataFrame) contenant COLONNES_ENTREE, chaque valeur
+    étant un scalaire ou un tableau de longueur N.
+    prix: mapping optionnel des prix unitaires (clés de PRIX_PAR_DEFAUT),
+    par défaut PRIX_PAR_DEFAUT.
+
+    Retourne un dict {nom_colonne: np.ndarray} pour chaque colonne de
+    COLONNES_CALCULEES (valeurs non arrondies, duree_projet_jours en entier).
+    """
+    def num(nom):
+        return np.asarray(colonnes[nom], dtype=np.float64)
+
+    prix = PRIX_PAR_DEFAUT if prix is None else prix
+
+    longueur = num("longueur_m")
+    largeur = num("largeur_m")
+    hauteur = num("hauteur_m")
+    epaisseur = num("epaisseur_m")
+    forme = np.asarray(colonnes["forme_structure"], dtype=object)
+    type_structure = np.asarray(colonnes["type_structure"], dtype=object)
+
+    # 1. Volume de béton selon la forme
+    rectangulaire = forme == "Rectangulaire"
+    surface_plan = longueur * largeur
+    volume_beton = np.select(
+        [rectangulaire, forme == "Circulaire", forme == "Trapézoïdale"],
+        [
+            surface_plan * epaisseur,
+            # Pour une structure circulaire, la longueur est le diamètre
+            np.pi * (longueur / 2) ** 2 * epaisseur,
+            # Approximation : moyenne des bases
+            ((longueur + largeur) / 2) * largeur * epaisseur,
+        ],
+        default=surface_plan * epaisseur * FACTEUR_IRREGULIER,
+    )
+
+    # 2. Quantités de matériaux
+    quantite_ciment = volume_beton * num("dosage_ciment_kg_m3")
+    quantite_eau = volume_beton * num("dosage_eau_kg_m3")
+    quantite_sable = volume_beton * num("dosage_sable_kg_m3")
+    quantite_gravier = volume_beton * num("dosage_gravier_kg_m3")
+
+    # 3. Charge totale
+    charge_totale = (
+        num("charge_statique_kn") + num("charge_dynamique_kn") + num("charge_vent_kn")
+        + num("charge_neige_kn") + num("charge_seisme_kn")
+    )
+
+    # 4-5. Contrainte appliquée et marge de sécurité
+    resistance = num("resistance_mpa")
+    contrainte_mpa, marge_securite = calculer_contrainte_marge(charge_totale, surface_plan, resistance)
+    sous_contrainte = contrainte_mpa > 0
+
+    # 6. Coûts
+    cout_ciment = quantite_ciment * prix["prix_ciment"]
+    cout_sable = quantite_sable * prix["prix_sable"]
+    cout_gravier = quantite_gravier * prix["prix_gravier"]
+    cout_main_oeuvre = volume_beton * prix["prix_main_oeuvre"]
+    cout_materiaux = cout_ciment + cout_sable + cout_gravier
+    cout_total = cout_materiaux + cout_main_oeuvre
+
+    # 7. Durée du projet (jours), au moins 1 jour
+    duree_projet_jours = np.maximum(1, np.ceil(volume_beton / RENDEMENT_MAIN_OEUVRE)).astype(np.int64)
+
+    # 8. Dimensions des éléments structurels
+    batiment = np.isin(type_structure, TYPES_BATIMENT)
+    largeur_poutre = np.where(batiment, np.maximum(0.2, epaisseur * 1.5), np.maximum(0.3, epaisseur * 2))
+    hauteur_poutre = np.where(batiment, np.maximum(0.3, epaisseur * 2), np.maximum(0.5, epaisseur * 3))
+    largeur_colonne = np.where(batiment, np.maximum(0.3, epaisseur * 1.5), np.maximum(0.4, epaisseur * 2))
+    epaisseur_dalle = epaisseur
+
+    # 9. Résistance structurelle = résistance × facteur de forme / coefficient de sécurité
+    facteur = np.where(rectangulaire, FACTEUR_FORME_RECTANGULAIRE, FACTEUR_FORME_AUTRE)
+    resistance_structure = resistance * facteur / num("coefficient_securite")
+
+    # 10. Déformation et déplacement (longueur caractéristique = plus grande dimension)
+    deformation = np.where(sous_contrainte, contrainte_mpa / MODULE_ELASTICITE_BETON, 0.0)
+    longueur_caracteristique = np.maximum(np.maximum(longueur, largeur), hauteur)
+    deplacement_mm = deformation * longueur_caracteristique * 1000
+
+    resultats = {
+        "volume_beton_m3": volume_beton,
+        "quantite_ciment_kg": quantite_ciment,
+        "quantite_eau_kg": quantite_eau,
+        "quantite_sable_kg": quantite_sable,
+        "quantite_gravier_kg": quantite_gravier,
+        "cout_ciment_eur": cout_ciment,
+        "cout_sable_eur": cout_sable,
+        "cout_gravier_eur": cout_gravier,
+        "cout_main_oeuvre_eur": cout_main_oeuvre,
+        "cout_total_eur": cout_total,
+        "charge_totale_kn": charge_totale,
+        "contrainte_mpa": contrainte_mpa,
+        "marge_securite": marge_securite,
+        "duree_projet_jours": duree_projet_jours,
+        "largeur_poutre_m": largeur_poutre,
+        "hauteur_poutre_m": hauteur_poutre,
+        "largeur_colonne_m": largeur_colonne,
+        "epaisseur_dalle_m": epaisseur_dalle,
+        "resistance_structure_mpa": resistance_structure,
+        "deformation": deformation,
+        "deplacement_mm": deplacement_mm,
+        "cout_materiaux_eur": cout_materiaux,
+    }
+    # Aligner toutes les colonnes sur N (certaines entrées peuvent être scalaires)
+    taille = np.broadcast_shapes(*(np.shape(valeurs) for valeurs in resultats.values()))
+    return {nom: np.broadcast_to(valeurs, taille) for nom, valeurs in resultats.items()}
+
+
+def arrondir(resultats):
+    """Arrondit les colonnes calculées au nombre de décimales stockées en base"""
+    return {
+        nom: (valeurs if nom == "duree_projet_jours" else np.round(valeurs, ARRONDIS[nom]))
+        for nom, valeurs in resultats.items()
+    }
+
+
+def arrondir_resultat(resultat):
+    """Arrondit un résultat scalaire (dict retourné par calculer_projet)"""
+    return {
+        nom: (valeur if nom == "duree_projet_jours" else round(valeur, ARRONDIS[nom]))
+        for nom, valeur in resultat.items()
+    }
+
+
+def calculer_projets(donnees, arrondi=True, prix=None):
+    """
+    Calcule les colonnes dérivées d'un lot de projets.
+
+    donnees: DataFrame (ou dict de colonnes) contenant au moins COLONNES_ENTREE.
+    Retourne un nouveau DataFrame: colonnes d'origine + COLONNES_CALCULEES.
+    """
+    df = donnees if isinstance(donnees, pd.DataFrame) else pd.DataFrame(donnees)
+    resultats = calculer_colonnes(df, prix)
+    if arrondi:
+        resultats = arrondir(resultats)
+    calcule = pd.DataFrame(resultats, index=df.index)
+    return pd.concat([df.drop(columns=COLONNES_CALCULEES, errors="ignore"), calcule], axis=1)
+
+
+def calculer_projet(valeurs, arrondi=False, prix=None):
+    """
+    Calcule un seul projet (formulaire de saisie).
+
+    valeurs: dict {colonne: scalaire} contenant COLONNES_ENTREE.
+    Retourne un dict {colonne_calculée: float/int}.
+    """
+    resultats = calculer_colonnes({nom: [valeurs[nom]] for nom in COLONNES_ENTREE}, prix)
+    if arrondi:
+        resultats = arrondir(resultats)
+    return {nom: valeurs_col[0].item() for nom, valeurs_col in resultats.items()}
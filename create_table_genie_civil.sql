@@ -4,6 +4,22 @@
 -- Créer la base de données si elle n'existe pas
 -- CREATE DATABASE db_genie_civil;
 
+-- Tarifs versionnés des matériaux (la version la plus récente est le tarif courant)
+CREATE TABLE IF NOT EXISTS prix_materiaux (
+    version SERIAL PRIMARY KEY,
+    prix_ciment NUMERIC(10, 4) NOT NULL, -- €/kg
+    prix_sable NUMERIC(10, 4) NOT NULL, -- €/kg
+    prix_gravier NUMERIC(10, 4) NOT NULL, -- €/kg
+    prix_main_oeuvre NUMERIC(10, 2) NOT NULL, -- €/m³
+    date_effet TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    commentaire TEXT
+);
+
+-- Tarif initial
+INSERT INTO prix_materiaux (prix_ciment, prix_sable, prix_gravier, prix_main_oeuvre, commentaire)
+SELECT 0.15, 0.05, 0.04, 80, 'Tarif initial'
+WHERE NOT EXISTS (SELECT 1 FROM prix_materiaux);
+
 -- Table principale des projets
 CREATE TABLE IF NOT EXISTS projets_beton (
     id SERIAL PRIMARY KEY,
@@ -71,12 +87,18 @@ CREATE TABLE IF NOT EXISTS projets_beton (
     -- Planification
     duree_projet_jours INTEGER, -- Durée estimée du projet en jours
     cout_materiaux_eur NUMERIC(10, 2), -- Coût total des matériaux en euros
+    version_prix INTEGER REFERENCES prix_materiaux(version), -- Tarif utilisé pour les coûts
     
     -- Notes et observations
     notes TEXT,
     statut VARCHAR(50) DEFAULT 'En conception' -- (En conception, Approuvé, En construction, Terminé)
 );
 
+-- Index (les tables existantes sont migrées par migrations.py avec CREATE INDEX CONCURRENTLY)
+CREATE INDEX IF NOT EXISTS idx_projets_nom ON projets_beton (nom_projet);
+CREATE INDEX IF NOT EXISTS idx_projets_type ON projets_beton (type_structure);
+CREATE INDEX IF NOT EXISTS idx_projets_date_id ON projets_beton (date_creation DESC NULLS LAST, id DESC);
+
 -- Commentaires sur les colonnes
 COMMENT ON TABLE projets_beton IS 'Table de stockage des projets de génie civil en béton';
 COMMENT ON COLUMN projets_beton.volume_beton_m3 IS 'Volume de béton calculé automatiquement';
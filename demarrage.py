@@ -0,0 +1,90 @@
+"""
+Démarrage non bloquant des applications Shiny
+
+L'application est importable et sert ses pages tout de suite: la vérification
+de la connexion, la création des tables et les migrations sont faites dans un
+thread d'arrière-plan, réessayées toutes les DELAI_REESSAI_S secondes tant que
+la base est inaccessible. Le point /ready (avec_point_pret) répond 200 quand la
+base est utilisable, 503 avant: à utiliser comme contrôle de santé (Railway).
+
+Les durées de démarrage à froid (import du module, base prête) sont mesurées
+depuis l'import de ce module et affichées dans les journaux.
+
+DEMARRAGE_SYNCHRONE=1 rétablit l'initialisation bloquante à l'import (scripts, débogage).
+"""
+
+import os
+import threading
+import time
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+DEBUT = time.perf_counter()
+DELAI_REESSAI_S = 10
+SYNCHRONE = os.getenv("DEMARRAGE_SYNCHRONE", "0") == "1"
+
+_etat = {"pret": False, "etape": "démarrage", "tentatives": 0, "erreur": None,
+         "import_s": None, "base_prete_s": None}
+_verrou = threading.Lock()
+
+
+def _maj_etat(**valeurs):
+    with _verrou:
+        _etat.update(valeurs)
+
+
+def etat_demarrage():
+    """Copie de l'état du démarrage {pret, etape, tentatives, erreur, import_s, base_prete_s}"""
+    with _verrou:
+        return dict(_etat)
+
+
+def marquer_importe():
+    """À appeler en fin de module de l'application: durée d'import à froid"""
+    duree = time.perf_counter() - DEBUT
+    _maj_etat(import_s=round(duree, 3))
+    print(f"[DEMARRAGE] Application importable en {duree:.2f} s")
+
+
+def _initialiser(initialisation):
+    while True:
+        tentatives = etat_demarrage()["tentatives"] + 1
+        _maj_etat(etape="initialisation de la base", tentatives=tentatives)
+        try:
+            pret = initialisation()
+            erreur = None if pret else "base inaccessible"
+        except Exception as e:
+            pret, erreur = False, str(e)[:200]
+        if pret:
+            duree = time.perf_counter() - DEBUT
+            _maj_etat(pret=True, etape="prêt", erreur=None, base_prete_s=round(duree, 3))
+            print(f"[DEMARRAGE] ✅ Base prête {duree:.2f} s après le démarrage ({tentatives} tentative(s))")
+            return
+        _maj_etat(etape="en attente de la base", erreur=erreur)
+        if SYNCHRONE:
+            return
+        print(f"[DEMARRAGE] ⚠️ Base non prête ({erreur}), nouvel essai dans {DELAI_REESSAI_S} s")
+        time.sleep(DELAI_REESSAI_S)
+
+
+def lancer_initialisation(initialisation):
+    """
+    Exécute initialisation() (True quand la base est utilisable) en arrière-plan,
+    jusqu'au succès; de façon bloquante si DEMARRAGE_SYNCHRONE=1 (un seul essai).
+    """
+    if SYNCHRONE:
+        _initialiser(initialisation)
+        return
+    threading.Thread(target=_initialiser, args=(initialisation,), name="demarrage", daemon=True).start()
+
+
+async def point_pret(request):
+    etat = etat_demarrage()
+    return JSONResponse(etat, status_code=200 if etat["pret"] else 503)
+
+
+def avec_point_pret(app_shiny):
+    """Application ASGI: /ready (état du démarrage) puis l'application Shiny pour tout le reste"""
+    return Starlette(routes=[Route("/ready", point_pret), Mount("/", app=app_shiny)])
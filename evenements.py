@@ -0,0 +1,145 @@
+"""
+Bus d'événements: diffusion des modifications de projets_beton à toutes les sessions
+
+Un thread d'écoute (LISTEN) reçoit les notifications envoyées par les triggers
+de projets_beton, y compris celles des autres processus (import en ligne de
+commande, recalcul, autres instances de l'application). Chaque notification
+est un delta: opération (INSERT, UPDATE, DELETE, TRUNCATE) et, pour une insertion
+d'au plus 500 lignes, les id insérés (triggers: migration 8, migrations.py).
+
+Pour une insertion, seules les nouvelles lignes sont lues (une requête pour tout
+le processus) et intégrées au cache partagé (cache_donnees.py); les autres
+opérations périment le cache. L'événement est ensuite poussé dans la file de
+chaque session abonnée, qui rafraîchit son graphe réactif depuis le cache.
+
+Sans écoute (base inaccessible), l'application publie elle-même ses propres
+modifications (publier_local): seules les sessions de ce processus sont prévenues.
+"""
+
+import asyncio
+import json
+import select
+import threading
+import time
+
+from base_donnees import noter_ecriture
+from cache_donnees import CANAL, appliquer_insertions, marquer_ecoute, nouvelle_version
+from requetes import projets_par_ids
+
+DELAI_RECONNEXION_S = 10
+
+_abonnes = []  # (boucle d'événements, asyncio.Queue) par session
+_verrou = threading.Lock()
+_etat = {"ecoute": False}
+_fil = None
+
+
+def abonner():
+    """File (asyncio.Queue) des événements pour la session appelante; à appeler dans sa boucle"""
+    file = asyncio.Queue()
+    with _verrou:
+        _abonnes.append((asyncio.get_running_loop(), file))
+    return file
+
+
+def desabonner(file):
+    """Retire la file d'une session terminée"""
+    with _verrou:
+        _abonnes[:] = [(boucle, f) for boucle, f in _abonnes if f is not file]
+
+
+def _diffuser(evenement):
+    with _verrou:
+        abonnes = list(_abonnes)
+    for boucle, file in abonnes:
+        try:
+            boucle.call_soon_threadsafe(file.put_nowait, evenement)
+        except RuntimeError:
+            pass  # boucle fermée
+
+
+def publier_local(evenement):
+    """Publie une modification faite par ce processus, si l'écoute PostgreSQL ne le fait pas déjà"""
+    with _verrou:
+        ecoute = _etat["ecoute"]
+    if not ecoute:
+        _diffuser(evenement)
+
+
+def _traiter(engine, evenement):
+    """Met à jour le cache partagé selon le delta, puis le diffuse aux sessions"""
+    ids = evenement.get("ids")
+    try:
+        noter_ecriture()  # les relectures sur la réplique attendront cette modification
+    except Exception:
+        pass
+    if evenement.get("operation") == "INSERT" and ids:
+        try:
+            appliquer_insertions(projets_par_ids(engine, ids))
+        except Exception as e:
+            print(f"[EVENEMENTS] ⚠️ Lecture des projets insérés impossible: {str(e)[:150]}")
+            nouvelle_version()
+    else:
+        nouvelle_version()
+    _diffuser(evenement)
+
+
+def _marquer_ecoute(active):
+    with _verrou:
+        _etat["ecoute"] = active
+    marquer_ecoute(active)
+
+
+def _ecouter(engine):
+    """Boucle du thread d'écoute: LISTEN sur une connexion dédiée, reconnexion automatique"""
+    signale = False
+    while True:
+        connexion = None
+        try:
+            brute = engine.raw_connection()
+            brute.detach()  # connexion dédiée, hors du pool
+            connexion = brute.dbapi_connection
+            connexion.autocommit = True
+            with connexion.cursor() as curseur:
+                curseur.execute(f"LISTEN {CANAL}")
+            _marquer_ecoute(True)
+            signale = False
+            print(f"[EVENEMENTS] Écoute des modifications active (canal {CANAL})")
+            # Des modifications ont pu être manquées pendant la déconnexion
+            _traiter(engine, {"operation": "RECONNEXION", "ids": None})
+            while True:
+                if select.select([connexion], [], [], 60) == ([], [], []):
+                    # Aucune notification: vérifier que la connexion est toujours vivante
+                    with connexion.cursor() as curseur:
+                        curseur.execute("SELECT 1")
+                connexion.poll()
+                while connexion.notifies:
+                    notification = connexion.notifies.pop(0)
+                    try:
+                        evenement = json.loads(notification.payload)
+                    except ValueError:
+                        evenement = {"operation": notification.payload, "ids": None}
+                    _traiter(engine, evenement)
+        except Exception as e:
+            _marquer_ecoute(False)
+            nouvelle_version()
+            if not signale:
+                print(f"[EVENEMENTS] ⚠️ Écoute indisponible, cache contourné: {str(e)[:150]}")
+                signale = True
+        finally:
+            if connexion is not None:
+                try:
+                    connexion.close()
+                except Exception:
+                    pass
+        time.sleep(DELAI_RECONNEXION_S)
+
+
+def demarrer_ecoute(engine):
+    """Démarre le thread d'écoute des notifications (une seule fois par processus)"""
+    global _fil
+    with _verrou:
+        if _fil is not None:
+            return
+        _fil = threading.Thread(target=_ecouter, args=(engine,), name="evenements-ecoute", daemon=True)
+    _fil.start()
@@ -0,0 +1,155 @@
+"""
+Exploration paramétrique de l'espace de conception
+
+À partir d'un projet de base (les valeurs de la Saisie Projet), une grille de
+valeurs est balayée pour l'épaisseur, la résistance et les quatre dosages.
+La grille est évaluée par blocs avec le noyau vectorisé (calculs_beton.py):
+seul un bloc est en mémoire à la fois, et seul le front de Pareto
+(coût total minimal / marge de sécurité maximale) est conservé entre les blocs.
+Aucune écriture en base.
+"""
+
+import numpy as np
+import pandas as pd
+
+from calculs_beton import COLONNES_ENTREE, calculer_colonnes
+
+# Paramètres pouvant être balayés
+PARAMETRES_BALAYES = [
+    "epaisseur_m",
+    "resistance_mpa",
+    "dosage_ciment_kg_m3",
+    "dosage_eau_kg_m3",
+    "dosage_sable_kg_m3",
+    "dosage_gravier_kg_m3",
+]
+
+# Budget mémoire par bloc évalué (octets) et coût approximatif d'une ligne:
+# 6 paramètres + ~22 colonnes calculées + temporaires NumPy, en float64
+BUDGET_MEMOIRE_OCTETS = 256 * 1024 * 1024
+OCTETS_PAR_LIGNE = 60 * 8
+
+# Taille maximale d'une grille (garde-fou contre les explorations de plusieurs heures)
+TAILLE_GRILLE_MAX = 100_000_000
+
+# Plages proposées par défaut dans l'onglet Exploration: (min, max, nb_points)
+PLAGES_PAR_DEFAUT = {
+    "epaisseur_m": (0.1, 0.5, 5),
+    "resistance_mpa": (20, 60, 5),
+    "dosage_ciment_kg_m3": (300, 450, 4),
+    "dosage_eau_kg_m3": (150, 200, 3),
+    "dosage_sable_kg_m3": (600, 800, 3),
+    "dosage_gravier_kg_m3": (1000, 1300, 3),
+}
+
+# Nombre de points tirés au hasard pour le nuage affiché (mémoire bornée)
+TAILLE_ECHANTILLON = 5000
+
+
+def taille_bloc_pour_budget(budget_octets=BUDGET_MEMOIRE_OCTETS):
+    """Nombre de lignes évaluées par bloc pour rester dans le budget mémoire"""
+    return max(1000, int(budget_octets // OCTETS_PAR_LIGNE))
+
+
+def axes_grille(plages):
+    """
+    Convertit les plages {parametre: (min, max, nb_points)} en axes de valeurs.
+    Un paramètre absent ou avec nb_points <= 1 n'est pas balayé (valeur min).
+    """
+    axes = {}
+    for nom, (mini, maxi, nb_points) in plages.items():
+        nb_points = max(1, int(nb_points))
+        axes[nom] = np.linspace(mini, maxi, nb_points) if nb_points > 1 else np.array([float(mini)])
+    return axes
+
+
+def taille_grille(plages):
+    """Nombre total de combinaisons de la grille"""
+    return int(np.prod([len(valeurs) for valeurs in axes_grille(plages).values()], dtype=np.int64))
+
+
+def iterer_grille(base, plages, taille_bloc):
+    """
+    Génère la grille par blocs de taille_bloc combinaisons.
+
+    base: dict {colonne: valeur} d'un projet (COLONNES_ENTREE).
+    Chaque bloc est un dict de colonnes: les paramètres balayés sont des tableaux,
+    les autres entrées restent scalaires (le noyau les diffuse).
+    La grille complète n'est jamais matérialisée.
+    """
+    axes = axes_grille(plages)
+    noms = list(axes)
+    dimensions = tuple(len(axes[nom]) for nom in noms)
+    total = int(np.prod(dimensions, dtype=np.int64))
+    for debut in range(0, total, taille_bloc):
+        indices = np.unravel_index(np.arange(debut, min(debut + taille_bloc, total)), dimensions)
+        bloc = {nom: base[nom] for nom in COLONNES_ENTREE}
+        for nom, indice in zip(noms, indices):
+            bloc[nom] = axes[nom][indice]
+        yield bloc
+
+
+def front_pareto(cout, marge):
+    """
+    Indices des points non dominés: coût minimal pour une marge de sécurité donnée.
+    Un point est conservé si aucun point moins cher (ou de même coût) n'a une marge
+    supérieure ou égale. Tri O(n log n).
+    """
+    cout = np.asarray(cout)
+    marge = np.asarray(marge)
+    if cout.size == 0:
+        return np.array([], dtype=np.int64)
+    ordre = np.lexsort((-marge, cout))
+    marge_triee = marge[ordre]
+    meilleure_avant = np.concatenate(([-np.inf], np.maximum.accumulate(marge_triee)[:-1]))
+    return ordre[marge_triee > meilleure_avant]
+
+
+def balayer(base, plages, taille_bloc=None, graine=0, prix=None):
+    """
+    Évalue la grille par blocs et produit l'état courant après chaque bloc.
+
+    Yield un dict {evalues, total, conformes, front (DataFrame), echantillon (DataFrame)}:
+    - front: points du front de Pareto coût/marge parmi les combinaisons déjà évaluées
+    - echantillon: tirage aléatoire borné (TAILLE_ECHANTILLON) pour le nuage de points
+    - conformes: nombre de combinaisons avec marge_securite >= coefficient_securite
+    prix: tarif des matériaux (défaut: calculs_beton.PRIX_PAR_DEFAUT)
+    """
+    taille_bloc = taille_bloc or taille_bloc_pour_budget()
+    total = taille_grille(plages)
+    taux_echantillon = min(1.0, TAILLE_ECHANTILLON / max(total, 1))
+    rng = np.random.default_rng(graine)
+    colonnes_front = list(axes_grille(plages)) + ["cout_total_eur", "marge_securite", "volume_beton_m3"]
+
+    front = pd.DataFrame(columns=colonnes_front, dtype=np.float64)
+    echantillons = []
+    evalues = 0
+    conformes = 0
+    n_echantillon = 0
+
+    for bloc in iterer_grille(base, plages, taille_bloc):
+        resultats = calculer_colonnes(bloc, prix)
+        n = len(resultats["cout_total_eur"])
+        valeurs = {nom: np.broadcast_to(bloc[nom], n) if nom in bloc else resultats[nom] for nom in colonnes_front}
+        evalues += n
+        conformes += int(np.count_nonzero(resultats["marge_securite"] >= base["coefficient_securite"]))
+
+        # Front du bloc puis fusion avec le front courant
+        indices = front_pareto(valeurs["cout_total_eur"], valeurs["marge_securite"])
+        front_bloc = pd.DataFrame({nom: np.asarray(v)[indices] for nom, v in valeurs.items()})
+        candidats = pd.concat([front, front_bloc], ignore_index=True) if len(front) else front_bloc
+        front = candidats.iloc[front_pareto(candidats["cout_total_eur"], candidats["marge_securite"])]
+        front = front.sort_values("cout_total_eur").reset_index(drop=True)
+
+        # Au plus TAILLE_ECHANTILLON points au total (le tirage n'atteint la taille visée qu'en moyenne)
+        tirage = np.flatnonzero(rng.random(n) < taux_echantillon)[:TAILLE_ECHANTILLON - n_echantillon]
+        n_echantillon += len(tirage)
+        echantillons.append(pd.DataFrame({nom: np.asarray(v)[tirage] for nom, v in valeurs.items()}))
+
+        yield {
+            "evalues": evalues,
+            "total": total,
+            "conformes": conformes,
+            "front": front,
+            "echantillon": pd.concat(echantillons, ignore_index=True),
+        }
@@ -0,0 +1,328 @@
+"""
+Export de projets_beton: colonnaire (Parquet, Arrow IPC) ou tableur (CSV, Excel)
+
+Les projets (filtrés par type de structure, statut, plage de dates de création)
+sont lus par un curseur côté serveur et écrits lot par lot (TAILLE_LOT_EXPORT
+lignes par record batch): la mémoire reste constante quelle que soit la taille
+de la table. Les colonnes sont typées d'après le schéma comme dans l'application
+(NUMERIC en float32/float64, entiers, horodatages, textes).
+
+Instantanés: chaque modification de projets_beton incrémente sa version dans
+versions_tables (trigger par instruction). Un export est écrit dans
+DOSSIER_EXPORTS sous un nom qui porte cette version: tant que la table n'a pas
+changé, un export identique (mêmes filtres, même format) réutilise le fichier
+déjà écrit, y compris depuis un autre processus. La version et les données sont
+lues dans la même transaction REPEATABLE READ: un instantané correspond toujours
+à sa version. Les instantanés des versions précédentes sont supprimés dès
+qu'une nouvelle version est écrite: avec ouvrir=True, le fichier est ouvert
+sous le verrou de l'export, avant toute suppression, et le descripteur retourné
+reste lisible même si le fichier est supprimé ensuite.
+
+Exports tableur (flux_csv, ecrire_xlsx): les projets filtrés (mêmes filtres,
+plus la recherche sur le nom de l'onglet Consultation) sont lus par lots de
+TAILLE_LOT_TABLEUR lignes et convertis au fil de l'eau, jamais réunis dans un
+DataFrame: la mémoire du processus ne dépend pas du nombre de projets.
+
+Nécessite pyarrow (Parquet, Arrow) et xlsxwriter (Excel).
+
+Usage:
+    python export_projets.py projets.parquet
+    python export_projets.py projets.arrow --type Pont --statut Terminé --debut 2024-01-01 --fin 2024-12-31
+    python export_projets.py projets.parquet --sans-instantane
+    python export_projets.py projets.csv --recherche pont
+    python export_projets.py projets.xlsx --type Bâtiment
+"""
+
+import argparse
+import csv
+import datetime
+import glob
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import text
+
+try:
+    import resource  # mesure de la mémoire du processus (indisponible sous Windows)
+except ImportError:
+    resource = None
+
+from requetes import filtre_projets, selection_typee
+from schema import colonnes
+
+FORMATS_EXPORT = {"parquet": ".parquet", "arrow": ".arrow"}
+TAILLE_LOT_EXPORT = 10000
+DOSSIER_EXPORTS = os.getenv("DOSSIER_EXPORTS", os.path.join(tempfile.gettempdir(), "exports_projets_beton"))
+
+# Version de projets_beton incrémentée à chaque modification (clé des instantanés):
+# table versions_tables et trigger trg_version_projets_beton, migration 10 (migrations.py)
+
+# Ordre des lignes exportées: par id, ou celui de la liste de l'onglet Consultation
+ORDRES_EXPORT = {"id": "id", "liste": "date_creation DESC NULLS LAST, id DESC"}
+
+# Exports tableur (CSV, Excel): lots plus petits, une ligne texte par projet
+FORMATS_TABLEUR = {"csv": ".csv", "xlsx": ".xlsx"}
+TAILLE_LOT_TABLEUR = 5000
+LIGNES_MAX_FEUILLE = 1048576  # limite d'une feuille Excel, en-tête compris
+
+_verrous = [threading.Lock() for _ in range(16)]  # un export à la fois par instantané
+
+
+def _type_arrow(type_pandas):
+    import pyarrow as pa
+    return {
+        "float32": pa.float32(), "float64": pa.float64(), "Int32": pa.int32(), "Int64": pa.int64(),
+        "datetime64[ns]": pa.timestamp("us"),
+    }.get(type_pandas, pa.string())
+
+
+def _requete_projets(engine, filtres, typee=True, ordre="id"):
+    """
+    (types, requête, paramètres) de la lecture des projets filtrés, toutes colonnes.
+
+    typee: colonnes flottantes lues en DOUBLE PRECISION (sinon NUMERIC, valeurs Decimal exactes).
+    ordre: clé de ORDRES_EXPORT.
+    """
+    types, selection = selection_typee(engine, list(colonnes(engine, "projets_beton")))
+    if not types:
+        raise RuntimeError("Table projets_beton introuvable")
+    if not typee:
+        selection = list(types)
+    conditions, parametres = filtre_projets(**filtres)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    requete = f"SELECT {', '.join(selection)} FROM projets_beton {where} ORDER BY {ORDRES_EXPORT[ordre]}"
+    return types, requete, parametres
+
+
+def _empreinte(format_export, filtres, noms):
+    """Identifiant stable d'un export: format, filtres et colonnes de la table"""
+    description = json.dumps([format_export, sorted(filtres.items()), noms], default=str)
+    return hashlib.sha1(description.encode("utf-8")).hexdigest()[:16]
+
+
+def _version_table(conn):
+    """Version de projets_beton, ou None sans la table versions_tables (pas d'instantané)"""
+    existe = conn.execute(text("SELECT to_regclass('versions_tables') IS NOT NULL")).scalar()
+    if not existe:
+        return None
+    return conn.execute(text("SELECT version FROM versions_tables WHERE nom = 'projets_beton'")).scalar()
+
+
+def _ecrire(conn, chemin, format_export, requete, parametres, schema_arrow):
+    """Écrit le résultat de la requête lot par lot; retourne le nombre de lignes"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if format_export == "parquet":
+        ecrivain = pq.ParquetWriter(chemin, schema_arrow, compression="zstd")
+    else:
+        ecrivain = pa.ipc.new_file(chemin, schema_arrow)
+    lignes_ecrites = 0
+    try:
+        resultat = conn.execution_options(stream_results=True, max_row_buffer=TAILLE_LOT_EXPORT).execute(
+            text(requete), parametres
+        )
+        for lignes in resultat.partitions(TAILLE_LOT_EXPORT):
+            valeurs = list(zip(*lignes))
+            lot = pa.record_batch(
+                [pa.array(valeurs[k], type=champ.type) for k, champ in enumerate(schema_arrow)],
+                schema=schema_arrow,
+            )
+            ecrivain.write_batch(lot)
+            lignes_ecrites += len(lignes)
+    finally:
+        ecrivain.close()
+    return lignes_ecrites
+
+
+def _ouvrir(chemin):
+    """Fichier ouvert en lecture binaire, ou None s'il a été supprimé (autre processus)"""
+    try:
+        return open(chemin, "rb")
+    except FileNotFoundError:
+        return None
+
+
+def exporter_projets(engine, format_export="parquet", type_structure="Tous", statut="Tous",
+                     date_debut=None, date_fin=None, destination=None, ouvrir=False):
+    """
+    Exporte les projets filtrés au format Parquet ou Arrow IPC.
+
+    Sans destination, le fichier est un instantané de DOSSIER_EXPORTS, réutilisé
+    tant que projets_beton n'a pas changé; avec destination, il y est écrit directement.
+    ouvrir: le fichier est aussi ouvert en lecture (à fermer par l'appelant), à l'abri
+    de la suppression des instantanés périmés par un export concurrent.
+    Retourne {chemin, lignes (None si instantané réutilisé), version, reutilise, fichier (None sans ouvrir)}.
+    """
+    if format_export not in FORMATS_EXPORT:
+        raise ValueError(f"Format d'export inconnu: {format_export} ({', '.join(FORMATS_EXPORT)})")
+    import pyarrow as pa
+
+    filtres = {"type_structure": type_structure, "statut": statut, "date_debut": date_debut, "date_fin": date_fin}
+    types, requete, parametres = _requete_projets(engine, filtres)
+    schema_arrow = pa.schema([(nom, _type_arrow(t)) for nom, t in types.items()])
+    empreinte = _empreinte(format_export, filtres, list(types))
+    extension = FORMATS_EXPORT[format_export]
+
+    debut = time.perf_counter()
+    with _verrous[hash(empreinte) % len(_verrous)]:
+        # Version et données lues dans le même instantané MVCC
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="REPEATABLE READ")
+            with conn.begin():
+                version = _version_table(conn)
+                if destination is None:
+                    os.makedirs(DOSSIER_EXPORTS, exist_ok=True)
+                    suffixe = f"v{version}" if version is not None else "courant"
+                    chemin = os.path.join(DOSSIER_EXPORTS, f"projets_beton_{empreinte}_{suffixe}{extension}")
+                    if version is not None and os.path.exists(chemin):
+                        fichier = _ouvrir(chemin) if ouvrir else None
+                        if fichier is not None or not ouvrir:
+                            print(f"[EXPORT] Instantané réutilisé (version {version}): {os.path.basename(chemin)}")
+                            return {"chemin": chemin, "lignes": None, "version": version, "reutilise": True,
+                                    "fichier": fichier}
+                else:
+                    chemin = destination
+                # Fichier temporaire renommé à la fin: jamais d'export partiel visible
+                temporaire = f"{chemin}.{os.getpid()}.{threading.get_ident()}.tmp"
+                try:
+                    lignes = _ecrire(conn, temporaire, format_export, requete, parametres, schema_arrow)
+                    os.replace(temporaire, chemin)
+                    fichier = open(chemin, "rb") if ouvrir else None
+                finally:
+                    if os.path.exists(temporaire):
+                        os.remove(temporaire)
+        if destination is None:
+            # Instantanés des versions précédentes du même export: périmés
+            for ancien in glob.glob(os.path.join(DOSSIER_EXPORTS, f"projets_beton_{empreinte}_*{extension}")):
+                if ancien != chemin:
+                    try:
+                        os.remove(ancien)
+                    except OSError:
+                        pass
+    print(f"[EXPORT] {lignes} projet(s) exporté(s) en {format_export} en {time.perf_counter() - debut:.2f} s "
+          f"(version {version}): {os.path.basename(chemin)}")
+    return {"chemin": chemin, "lignes": lignes, "version": version, "reutilise": False, "fichier": fichier}
+
+
+def _lots(engine, requete, parametres, taille=TAILLE_LOT_TABLEUR):
+    """Lignes de la requête, par lots de taille lignes (curseur côté serveur; connexion rendue à la fermeture)"""
+    with engine.connect() as conn:
+        resultat = conn.execution_options(stream_results=True, max_row_buffer=taille).execute(
+            text(requete), parametres
+        )
+        yield from resultat.partitions(taille)
+
+
+def flux_csv(engine, ordre="id", **filtres):
+    """
+    Projets filtrés en CSV (UTF-8 avec BOM, séparateur virgule), un bloc d'octets par lot.
+
+    Générateur: les lignes sont lues et converties lot par lot, sans DataFrame;
+    fermer le générateur (close) libère le curseur et la connexion.
+    filtres: arguments de requetes.filtre_projets.
+    """
+    types, requete, parametres = _requete_projets(engine, filtres, typee=False, ordre=ordre)
+    tampon = io.StringIO()
+    ecrivain = csv.writer(tampon, lineterminator="\n")
+    ecrivain.writerow(list(types))
+    yield ("\ufeff" + tampon.getvalue()).encode("utf-8")
+    for lignes in _lots(engine, requete, parametres):
+        tampon.seek(0)
+        tampon.truncate()
+        ecrivain.writerows(lignes)
+        yield tampon.getvalue().encode("utf-8")
+
+
+def ecrire_xlsx(engine, chemin, ordre="id", **filtres):
+    """
+    Écrit les projets filtrés dans un classeur Excel; retourne le nombre de lignes.
+
+    xlsxwriter en mode constant_memory: chaque ligne est écrite sur disque dès
+    sa lecture. Au-delà de LIGNES_MAX_FEUILLE, les projets continuent sur une nouvelle feuille.
+    Nécessite xlsxwriter.
+    """
+    import xlsxwriter
+
+    types, requete, parametres = _requete_projets(engine, filtres, ordre=ordre)
+    noms = list(types)
+    classeur = xlsxwriter.Workbook(chemin, {
+        "constant_memory": True, "default_date_format": "dd/mm/yyyy hh:mm", "nan_inf_to_errors": True,
+    })
+    gras = classeur.add_format({"bold": True})
+    feuille, ligne, total = None, 0, 0
+    try:
+        for lignes in _lots(engine, requete, parametres):
+            for valeurs in lignes:
+                if feuille is None or ligne == LIGNES_MAX_FEUILLE:
+                    numero = len(classeur.worksheets()) + 1
+                    feuille = classeur.add_worksheet("Projets" if numero == 1 else f"Projets {numero}")
+                    feuille.write_row(0, 0, noms, gras)
+                    ligne = 1
+                feuille.write_row(ligne, 0, valeurs)
+                ligne += 1
+            total += len(lignes)
+        if feuille is None:
+            classeur.add_worksheet("Projets").write_row(0, 0, noms, gras)
+    finally:
+        classeur.close()
+    return total
+
+
+def _date(valeur):
+    return datetime.date.fromisoformat(valeur)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export de projets_beton en Parquet, Arrow IPC, CSV ou Excel")
+    parser.add_argument("fichier", help="Fichier de sortie (.parquet, .arrow, .csv ou .xlsx)")
+    parser.add_argument("--format", choices=list(FORMATS_EXPORT) + list(FORMATS_TABLEUR),
+                        help="Format (défaut: d'après l'extension, parquet sinon)")
+    parser.add_argument("--type", dest="type_structure", default="Tous", help="Type de structure (défaut: Tous)")
+    parser.add_argument("--statut", default="Tous", help="Statut (défaut: Tous)")
+    parser.add_argument("--debut", type=_date, help="Date de création minimale AAAA-MM-JJ (incluse)")
+    parser.add_argument("--fin", type=_date, help="Date de création maximale AAAA-MM-JJ (incluse)")
+    parser.add_argument("--recherche", default="", help="Texte contenu dans nom_projet (CSV, Excel)")
+    parser.add_argument("--sans-instantane", action="store_true",
+                        help="Écrire directement le fichier sans passer par les instantanés (Parquet, Arrow)")
+    args = parser.parse_args(argv)
+
+    extension = os.path.splitext(args.fichier)[1].lower()
+    formats = {ext: nom for nom, ext in {**FORMATS_EXPORT, **FORMATS_TABLEUR}.items()}
+    format_export = args.format or formats.get(extension, "parquet")
+
+    from base_donnees import engine
+
+    debut = time.perf_counter()
+    memoire_avant = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    filtres = {"type_structure": args.type_structure, "statut": args.statut,
+               "date_debut": args.debut, "date_fin": args.fin}
+    if format_export == "csv":
+        with open(args.fichier, "wb") as f:
+            for bloc in flux_csv(engine, recherche=args.recherche, **filtres):
+                f.write(bloc)
+        print(f"[EXPORT] Projets exportés en csv en {time.perf_counter() - debut:.2f} s")
+    elif format_export == "xlsx":
+        lignes = ecrire_xlsx(engine, args.fichier, recherche=args.recherche, **filtres)
+        print(f"[EXPORT] {lignes} projet(s) exporté(s) en xlsx en {time.perf_counter() - debut:.2f} s")
+    else:
+        resultat = exporter_projets(engine, format_export, **filtres,
+                                    destination=args.fichier if args.sans_instantane else None)
+        if resultat["chemin"] != args.fichier:
+            shutil.copyfile(resultat["chemin"], args.fichier)
+    print(f"✅ Export écrit dans {args.fichier}")
+    if resource:
+        # ru_maxrss en kilo-octets (Linux): croissance du pic de mémoire du processus pendant l'export
+        croissance = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - memoire_avant) / 1024
+        print(f"   Mémoire max du processus: +{croissance:.0f} Mo")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
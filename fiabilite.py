@@ -0,0 +1,195 @@
+"""
+Analyse de fiabilité Monte Carlo de la marge de sécurité
+
+Des lois de probabilité sont associées aux charges et à la résistance du béton
+(la moyenne est la valeur saisie, la dispersion un coefficient de variation).
+La probabilité de défaillance P(marge_securite < coefficient_securite) est
+estimée par tirage vectorisé, réparti en blocs sur un pool de processus.
+
+Le pool est partagé par toutes les sessions; le calcul est lancé depuis une
+tâche asynchrone pour que la session Shiny reste réactive.
+"""
+
+import asyncio
+import concurrent.futures
+import math
+import multiprocessing
+import os
+from statistics import NormalDist
+
+import numpy as np
+
+from calculs_beton import calculer_contrainte_marge
+
+# Variables auxquelles une loi de probabilité peut être associée
+VARIABLES_ALEATOIRES = [
+    "charge_statique_kn",
+    "charge_dynamique_kn",
+    "charge_vent_kn",
+    "charge_neige_kn",
+    "charge_seisme_kn",
+    "resistance_mpa",
+]
+CHARGES = VARIABLES_ALEATOIRES[:5]
+
+# Lois disponibles (paramétrées par moyenne et coefficient de variation)
+LOIS = {
+    "fixe": "Déterministe",
+    "normale": "Normale",
+    "lognormale": "Log-normale",
+    "gumbel": "Gumbel (valeurs extrêmes)",
+    "uniforme": "Uniforme",
+}
+
+# Lois et coefficients de variation proposés par défaut
+LOIS_PAR_DEFAUT = {
+    "charge_statique_kn": ("normale", 0.10),
+    "charge_dynamique_kn": ("gumbel", 0.25),
+    "charge_vent_kn": ("gumbel", 0.30),
+    "charge_neige_kn": ("gumbel", 0.30),
+    "charge_seisme_kn": ("lognormale", 0.50),
+    "resistance_mpa": ("lognormale", 0.15),
+}
+
+NB_TIRAGES_MIN = 10_000_000
+TAILLE_TACHE = 1_000_000  # tirages par tâche envoyée au pool
+TAILLE_ECHANTILLON_TACHE = 500  # marges conservées par tâche pour l'histogramme
+NB_PROCESSUS = int(os.getenv("MC_PROCESSUS", str(os.cpu_count() or 2)))
+
+_pool = None
+
+CONSTANTE_EULER = 0.5772156649
+
+
+def obtenir_pool():
+    """Pool de processus partagé (démarrage 'spawn': sûr avec les threads du serveur)"""
+    global _pool
+    if _pool is None:
+        contexte = multiprocessing.get_context("spawn")
+        _pool = concurrent.futures.ProcessPoolExecutor(max_workers=NB_PROCESSUS, mp_context=contexte)
+        print(f"[FIABILITE] Pool de {NB_PROCESSUS} processus démarré")
+    return _pool
+
+
+def tirer(loi, moyenne, cv, n, rng):
+    """Tire n valeurs d'une loi de moyenne et coefficient de variation donnés"""
+    ecart_type = abs(moyenne) * cv
+    if loi == "fixe" or ecart_type == 0:
+        return np.full(n, float(moyenne))
+    if loi == "normale":
+        return rng.normal(moyenne, ecart_type, n)
+    if loi == "lognormale":
+        sigma2 = math.log(1 + cv ** 2)
+        return rng.lognormal(math.log(moyenne) - sigma2 / 2, math.sqrt(sigma2), n)
+    if loi == "gumbel":
+        echelle = math.sqrt(6) * ecart_type / math.pi
+        return rng.gumbel(moyenne - CONSTANTE_EULER * echelle, echelle, n)
+    if loi == "uniforme":
+        demi_largeur = math.sqrt(3) * ecart_type
+        return rng.uniform(moyenne - demi_largeur, moyenne + demi_largeur, n)
+    raise ValueError(f"Loi inconnue: {loi}")
+
+
+def simuler_bloc(base, lois, n, graine):
+    """
+    Simule n tirages (exécuté dans un processus du pool).
+
+    Retourne {n, echecs, sans_contrainte, n_charges, moyenne, m2, echantillon} où
+    echecs est le nombre de tirages avec marge_securite < coefficient_securite.
+    Les tirages sans contrainte (marge MARGE_SANS_CONTRAINTE, conventionnelle) sont
+    seulement comptés: moyenne, m2 (somme des carrés des écarts à la moyenne) et
+    échantillon portent sur les tirages sous charge.
+    """
+    rng = np.random.default_rng(graine)
+    charge_totale = np.zeros(n)
+    for nom in CHARGES:
+        loi, cv = lois.get(nom, ("fixe", 0.0))
+        # Une charge ne peut pas changer de signe
+        charge_totale += np.maximum(tirer(loi, base[nom], cv, n, rng), 0.0)
+    loi, cv = lois.get("resistance_mpa", ("fixe", 0.0))
+    resistance = np.maximum(tirer(loi, base["resistance_mpa"], cv, n, rng), 0.0)
+
+    surface_plan = base["longueur_m"] * base["largeur_m"]
+    contrainte, marge = calculer_contrainte_marge(charge_totale, surface_plan, resistance)
+    chargees = marge[contrainte > 0]
+    moyenne = float(chargees.mean()) if chargees.size else 0.0
+    return {
+        "n": n,
+        "echecs": int(np.count_nonzero(marge < base["coefficient_securite"])),
+        "sans_contrainte": n - chargees.size,
+        "n_charges": chargees.size,
+        "moyenne": moyenne,
+        "m2": float(np.square(chargees - moyenne).sum()),
+        "echantillon": chargees[:TAILLE_ECHANTILLON_TACHE].copy(),
+    }
+
+
+def combiner_moments(blocs):
+    """Moyenne et variance des marges de plusieurs blocs (combinaison par paires de Chan et al.)"""
+    n, moyenne, m2 = 0, 0.0, 0.0
+    for bloc in blocs:
+        if not bloc["n_charges"]:
+            continue
+        total = n + bloc["n_charges"]
+        delta = bloc["moyenne"] - moyenne
+        moyenne += delta * bloc["n_charges"] / total
+        m2 += bloc["m2"] + delta ** 2 * n * bloc["n_charges"] / total
+        n = total
+    if not n:
+        return math.nan, math.nan
+    return moyenne, m2 / n
+
+
+def combiner(blocs, coefficient_securite):
+    """Agrège les résultats des blocs: probabilité de défaillance, IC 95 %, indice de fiabilité"""
+    n = sum(bloc["n"] for bloc in blocs)
+    echecs = sum(bloc["echecs"] for bloc in blocs)
+    moyenne, variance = combiner_moments(blocs)
+    pf = echecs / n
+    erreur = math.sqrt(pf * (1 - pf) / n)
+    if 0 < pf < 1:
+        beta = -NormalDist().inv_cdf(pf)
+    else:
+        beta = math.inf if pf == 0 else -math.inf
+    return {
+        "n": n,
+        "echecs": echecs,
+        "probabilite_defaillance": pf,
+        "ic95": (max(pf - 1.96 * erreur, 0.0), min(pf + 1.96 * erreur, 1.0)),
+        "indice_fiabilite": beta,
+        "marge_moyenne": moyenne,
+        "marge_ecart_type": math.sqrt(variance),
+        "sans_contrainte": sum(bloc["sans_contrainte"] for bloc in blocs),
+        "coefficient_securite": coefficient_securite,
+        "echantillon": np.concatenate([bloc["echantillon"] for bloc in blocs]),
+    }
+
+
+async def analyser(base, lois, nb_tirages=NB_TIRAGES_MIN, progression=None, graine=None):
+    """
+    Lance l'analyse sur le pool de processus sans bloquer la boucle d'événements.
+
+    base: dict des valeurs du projet (charges, résistance, dimensions, coefficient_securite)
+    lois: {variable: (loi, coefficient_de_variation)}
+    progression: dict optionnel mis à jour en place {"faits", "total"}
+    """
+    tailles = [TAILLE_TACHE] * (nb_tirages // TAILLE_TACHE)
+    if nb_tirages % TAILLE_TACHE:
+        tailles.append(nb_tirages % TAILLE_TACHE)
+    graines = np.random.SeedSequence(graine).spawn(len(tailles))
+    if progression is not None:
+        progression.update(faits=0, total=nb_tirages)
+
+    boucle = asyncio.get_running_loop()
+    pool = obtenir_pool()
+    taches = [
+        boucle.run_in_executor(pool, simuler_bloc, base, lois, taille, graine_bloc)
+        for taille, graine_bloc in zip(tailles, graines)
+    ]
+    blocs = []
+    for tache in asyncio.as_completed(taches):
+        bloc = await tache
+        blocs.append(bloc)
+        if progression is not None:
+            progression["faits"] += bloc["n"]
+    return combiner(blocs, base["coefficient_securite"])
@@ -0,0 +1,285 @@
+"""
+Import en masse de projets béton depuis un fichier CSV ou Parquet
+
+Les colonnes calculées sont obtenues en une passe avec le noyau vectorisé
+(calculs_beton.py), puis les lignes valides sont chargées dans projets_beton
+avec COPY, par lots, chaque lot dans sa propre transaction.
+
+La validation vérifie aussi les limites du schéma (longueur des VARCHAR, valeurs
+des colonnes calculées dans leur NUMERIC(p, s)): une ligne qui ferait échouer le
+COPY de tout son lot est refusée seule, avec son numéro de ligne.
+
+Usage:
+    python import_projets.py projets.csv
+    python import_projets.py projets.parquet --taille-lot 20000 --rapport erreurs.csv
+    python import_projets.py projets.csv --verifier   (validation seule, sans écriture)
+"""
+
+import argparse
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from calculs_beton import (
+    BORNES, COLONNES_NUMERIQUES, COLONNES_CALCULEES, FORMES_STRUCTURE, TYPES_STRUCTURE, calculer_colonnes,
+    calculer_projets,
+)
+from prix import obtenir_prix
+
+# Taille par défaut d'un lot COPY (une transaction par lot)
+TAILLE_LOT = 10000
+
+# Colonnes facultatives reprises telles quelles si présentes dans le fichier
+COLONNES_OPTIONNELLES = ["type_beton", "notes", "statut", "date_creation"]
+STATUT_PAR_DEFAUT = "En conception"
+LONGUEUR_MAX_NOM = 200
+
+
+def lire_fichier(chemin_ou_flux, format_fichier=None):
+    """Lit un fichier CSV ou Parquet dans un DataFrame (format déduit de l'extension)"""
+    if format_fichier is None:
+        nom = chemin_ou_flux if isinstance(chemin_ou_flux, str) else getattr(chemin_ou_flux, "name", "")
+        format_fichier = "parquet" if str(nom).lower().endswith((".parquet", ".pq")) else "csv"
+    if format_fichier == "parquet":
+        # Nécessite pyarrow (ou fastparquet)
+        return pd.read_parquet(chemin_ou_flux)
+    return pd.read_csv(chemin_ou_flux, sep=None, engine="python", encoding="utf-8-sig")
+
+
+def _limites_schema():
+    """
+    Limites des colonnes de projets_beton (base_donnees.projets_beton, miroir du schéma SQL):
+    ({colonne VARCHAR: longueur max}, {colonne NUMERIC: (précision, échelle)})
+    """
+    from sqlalchemy import Numeric, String
+
+    from base_donnees import projets_beton
+
+    longueurs = {c.name: c.type.length for c in projets_beton.columns
+                 if isinstance(c.type, String) and c.type.length}
+    numeriques = {c.name: (c.type.precision, c.type.scale) for c in projets_beton.columns
+                  if isinstance(c.type, Numeric) and c.type.precision}
+    return longueurs, numeriques
+
+
+def valider_projets(df, tarif=None):
+    """
+    Valide les lignes d'un fichier d'import.
+
+    Les colonnes calculées (avec le tarif, prix par défaut si None) doivent tenir
+    dans leur NUMERIC(p, s), sinon la ligne est refusée.
+    Retourne (df_valide, erreurs) où erreurs est un DataFrame
+    [ligne, colonne, valeur, message]; ligne = numéro de ligne de données
+    (1 = première ligne après l'en-tête).
+    """
+    df = df.rename(columns=lambda c: str(c).strip()).reset_index(drop=True)
+    erreurs = []
+
+    def signaler(masque, colonne, message, valeurs):
+        masque = pd.Series(masque, index=df.index).fillna(False).to_numpy(dtype=bool)
+        if masque.any():
+            erreurs.append(pd.DataFrame({
+                "ligne": np.flatnonzero(masque) + 1,
+                "colonne": colonne,
+                "valeur": valeurs.to_numpy()[masque].astype(str),
+                "message": message,
+            }))
+
+    colonnes_requises = ["nom_projet", "type_structure", "forme_structure"] + COLONNES_NUMERIQUES
+    manquantes = [c for c in colonnes_requises if c not in df.columns]
+    if manquantes:
+        erreurs_colonnes = pd.DataFrame({
+            "ligne": 0, "colonne": manquantes, "valeur": "", "message": "colonne absente du fichier",
+        })
+        return df.iloc[0:0], erreurs_colonnes
+
+    propre = pd.DataFrame(index=df.index)
+
+    # Colonnes texte
+    for colonne in ["nom_projet", "type_structure", "forme_structure"]:
+        valeurs = df[colonne].astype("string").str.strip()
+        signaler(valeurs.isna() | (valeurs == ""), colonne, "valeur manquante", df[colonne])
+        propre[colonne] = valeurs
+    signaler(propre["nom_projet"].str.len() > LONGUEUR_MAX_NOM, "nom_projet",
+             f"nom trop long (> {LONGUEUR_MAX_NOM} caractères)", df["nom_projet"])
+    longueurs, numeriques = _limites_schema()
+    type_inconnu = propre["type_structure"].notna() & ~propre["type_structure"].isin(TYPES_STRUCTURE)
+    signaler(type_inconnu, "type_structure", f"type inconnu (attendu: {', '.join(TYPES_STRUCTURE)})",
+             df["type_structure"])
+    forme_inconnue = propre["forme_structure"].notna() & ~propre["forme_structure"].isin(FORMES_STRUCTURE)
+    signaler(forme_inconnue, "forme_structure", f"forme inconnue (attendu: {', '.join(FORMES_STRUCTURE)})",
+             df["forme_structure"])
+
+    # Colonnes numériques: conversion puis bornes du formulaire
+    for colonne in COLONNES_NUMERIQUES:
+        brut = df[colonne]
+        if pd.api.types.is_numeric_dtype(brut):
+            valeurs = brut.astype(np.float64)
+            absent = brut.isna()
+        else:
+            # Texte (ex: décimales à virgule ou cellules non numériques)
+            texte = brut.astype("string").str.strip()
+            absent = texte.isna() | (texte == "")
+            valeurs = pd.to_numeric(texte.str.replace(",", ".", regex=False), errors="coerce")
+        signaler(absent, colonne, "valeur manquante", df[colonne])
+        signaler(valeurs.isna() & ~absent, colonne, "valeur non numérique", df[colonne])
+        mini, maxi = BORNES[colonne]
+        hors_bornes = valeurs.notna() & ((valeurs < mini) | (valeurs > maxi))
+        signaler(hors_bornes, colonne, f"hors bornes [{mini}, {maxi}]", df[colonne])
+        propre[colonne] = valeurs.astype(np.float64)
+
+    # Colonnes facultatives
+    for colonne in COLONNES_OPTIONNELLES:
+        if colonne in df.columns:
+            propre[colonne] = df[colonne]
+            if colonne in longueurs:
+                signaler(df[colonne].astype("string").str.len() > longueurs[colonne], colonne,
+                         f"texte trop long (> {longueurs[colonne]} caractères)", df[colonne])
+    if "date_creation" in propre.columns:
+        dates = pd.to_datetime(propre["date_creation"], errors="coerce")
+        signaler(dates.isna() & propre["date_creation"].notna(), "date_creation",
+                 "date invalide", df["date_creation"])
+        # Date vide: date de l'import, comme la valeur par défaut de la colonne
+        # (date_creation est NOT NULL dans une table partitionnée, partitions.py)
+        propre["date_creation"] = dates.fillna(pd.Timestamp.now().floor("s"))
+    statut = propre["statut"] if "statut" in propre.columns else pd.Series(pd.NA, index=df.index)
+    propre["statut"] = statut.fillna(STATUT_PAR_DEFAUT)
+
+    # Colonnes calculées des lignes valides: dans les limites de leur NUMERIC(p, s)
+    deja_invalides = np.unique(np.concatenate([e["ligne"].to_numpy() - 1 for e in erreurs])) if erreurs else []
+    valides = propre.drop(index=df.index[deja_invalides])
+    if not valides.empty:
+        for colonne, valeurs in calculer_colonnes(valides, tarif).items():
+            if colonne not in numeriques:
+                continue
+            precision, echelle = numeriques[colonne]
+            arrondies = np.round(np.asarray(valeurs, dtype=np.float64), echelle)
+            depassement = pd.Series(False, index=df.index)
+            depassement[valides.index] = np.isinf(arrondies) | (np.abs(arrondies) >= 10.0 ** (precision - echelle))
+            signaler(depassement, colonne, f"valeur calculée hors limites (NUMERIC({precision}, {echelle}))",
+                     pd.Series(arrondies, index=valides.index).reindex(df.index))
+
+    if erreurs:
+        erreurs = pd.concat(erreurs, ignore_index=True).sort_values(["ligne", "colonne"], kind="stable")
+        lignes_invalides = erreurs["ligne"].to_numpy() - 1
+        propre = propre.drop(index=df.index[np.unique(lignes_invalides)])
+    else:
+        erreurs = pd.DataFrame(columns=["ligne", "colonne", "valeur", "message"])
+    return propre, erreurs.reset_index(drop=True)
+
+
+def preparer_projets(df_valide, tarif=None):
+    """
+    Ajoute les colonnes calculées (noyau vectorisé) et ordonne les colonnes pour COPY.
+    tarif: tarif versionné (prix.obtenir_prix); sa version est enregistrée dans version_prix.
+    """
+    calcule = calculer_projets(df_valide, prix=tarif)
+    colonnes = (
+        ["nom_projet", "type_structure", "forme_structure"] + COLONNES_NUMERIQUES
+        + [c for c in COLONNES_OPTIONNELLES if c in calcule.columns] + COLONNES_CALCULEES
+    )
+    calcule = calcule[colonnes]
+    if tarif is not None and tarif["version"] is not None:
+        calcule = calcule.assign(version_prix=tarif["version"])
+    return calcule
+
+
+def copier_lot(conn, lot):
+    """Charge un lot dans projets_beton via COPY FROM STDIN (connexion SQLAlchemy en transaction)"""
+    tampon = io.StringIO()
+    lot.to_csv(tampon, index=False, header=False, na_rep="", date_format="%Y-%m-%d %H:%M:%S")
+    tampon.seek(0)
+    colonnes = ", ".join(lot.columns)
+    curseur = conn.connection.dbapi_connection.cursor()
+    try:
+        curseur.copy_expert(f"COPY projets_beton ({colonnes}) FROM STDIN WITH (FORMAT csv)", tampon)
+    finally:
+        curseur.close()
+
+
+def importer_projets(df, engine, taille_lot=TAILLE_LOT, verifier_seulement=False, progression=None):
+    """
+    Valide, calcule et charge un DataFrame de projets.
+
+    Chaque lot de taille_lot lignes est copié dans sa propre transaction: un lot
+    en échec est annulé sans affecter les lots déjà validés.
+    progression: callable optionnel (lignes_traitees, total) appelé après chaque lot.
+
+    Retourne un dict {total, valides, importes, erreurs (DataFrame), lots_en_echec}.
+    """
+    tarif = obtenir_prix(engine)
+    df_valide, erreurs = valider_projets(df, tarif)
+    rapport = {
+        "total": len(df),
+        "valides": len(df_valide),
+        "importes": 0,
+        "erreurs": erreurs,
+        "lots_en_echec": [],
+    }
+    if df_valide.empty or verifier_seulement:
+        return rapport
+
+    projets = preparer_projets(df_valide, tarif)
+    for debut in range(0, len(projets), taille_lot):
+        lot = projets.iloc[debut:debut + taille_lot]
+        try:
+            with engine.begin() as conn:
+                copier_lot(conn, lot)
+            rapport["importes"] += len(lot)
+        except Exception as e:
+            print(f"[IMPORT] ❌ Lot {debut + 1}-{debut + len(lot)} annulé: {str(e)[:200]}")
+            rapport["lots_en_echec"].append((int(lot.index[0]) + 1, int(lot.index[-1]) + 1, str(e)[:200]))
+        if progression is not None:
+            progression(debut + len(lot), len(projets))
+    return rapport
+
+
+def importer_fichier(chemin, engine, taille_lot=TAILLE_LOT, verifier_seulement=False, progression=None):
+    """Lit un fichier CSV/Parquet et l'importe (voir importer_projets)"""
+    return importer_projets(lire_fichier(chemin), engine, taille_lot, verifier_seulement, progression)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import en masse de projets béton (CSV ou Parquet)")
+    parser.add_argument("fichier", help="Fichier .csv ou .parquet à importer")
+    parser.add_argument("--taille-lot", type=int, default=TAILLE_LOT, help=f"Lignes par transaction COPY (défaut: {TAILLE_LOT})")
+    parser.add_argument("--rapport", help="Écrire les erreurs de validation dans ce fichier CSV")
+    parser.add_argument("--verifier", action="store_true", help="Valider le fichier sans rien écrire en base")
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print("Import en masse de projets béton")
+    print("=" * 60)
+
+    if not os.path.exists(args.fichier):
+        print(f"❌ ERREUR: Fichier {args.fichier} introuvable")
+        return 1
+
+    from base_donnees import engine
+
+    def afficher_progression(faites, total):
+        print(f"📥 {faites}/{total} lignes traitées")
+
+    rapport = importer_fichier(args.fichier, engine, args.taille_lot, args.verifier, afficher_progression)
+    erreurs = rapport["erreurs"]
+
+    print(f"📄 Lignes lues: {rapport['total']}")
+    print(f"✅ Lignes valides: {rapport['valides']}")
+    print(f"🚀 Lignes importées: {rapport['importes']}")
+    if not erreurs.empty:
+        print(f"⚠️  {len(erreurs)} erreur(s) de validation sur {erreurs['ligne'].nunique()} ligne(s)")
+        print(erreurs.head(20).to_string(index=False))
+        if args.rapport:
+            erreurs.to_csv(args.rapport, index=False)
+            print(f"📋 Rapport complet écrit dans {args.rapport}")
+    for premiere, derniere, message in rapport["lots_en_echec"]:
+        print(f"❌ Lot lignes {premiere}-{derniere} non importé: {message}")
+
+    return 1 if rapport["lots_en_echec"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,7 @@ Usage:
 from sqlalchemy import create_engine, text
 import os
 from urllib.parse import quote_plus
+from migrations import appliquer_migrations
 
 print("=" * 60)
 print("Initialisation de la base de données PostgreSQL")
@@ -62,6 +63,8 @@ try:
                 print("✅ Table supprimée")
             else:
                 print("❌ Opération annulée. La table existante est conservée.")
+                print("🔧 Application des migrations (index, tables associées)...")
+                appliquer_migrations(engine)
                 exit(0)
         
         # Exécuter le script SQL
@@ -94,6 +97,10 @@ try:
         else:
             print("❌ ERREUR: La table n'a pas été créée")
             exit(1)
+    
+    # Index et évolutions du schéma (CREATE INDEX CONCURRENTLY sur une table existante)
+    print("🔧 Application des migrations...")
+    appliquer_migrations(engine)
 
 except Exception as e:
     print(f"❌ ERREUR lors de l'initialisation: {e}")
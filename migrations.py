@@ -0,0 +1,326 @@
+"""
+Migrations du schéma de la base (projets_beton et tables associées)
+
+Chaque migration est appliquée une seule fois et enregistrée dans la table
+schema_migrations. Les index sur une table existante sont créés avec
+CREATE INDEX CONCURRENTLY (hors transaction): la table reste lisible et
+modifiable pendant la construction. Un index laissé invalide par une
+construction interrompue est supprimé puis reconstruit.
+
+Appliquées au démarrage par init_database_table (app_genie_civil.py) et par
+init_db_railway.py; un verrou consultatif évite que deux processus migrent en même temps.
+Les partitions des mois à venir sont ensuite créées si projets_beton est partitionnée (partitions.py).
+
+Usage:
+    python migrations.py            (applique les migrations en attente)
+    python migrations.py --liste
+"""
+
+import argparse
+import sys
+
+from sqlalchemy import text
+
+import partitions
+import prix
+from schema import charger_schema
+
+# Clé du verrou consultatif (pg_advisory_lock) réservé aux migrations
+CLE_VERROU = 724000
+
+SQL_TABLE_MIGRATIONS = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    date_application TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Texte SQL figé de chaque migration, tel qu'appliqué lors de sa numérotation: les modules
+# (prix, recalcul, evenements, ...) peuvent évoluer, une migration appliquée ne change plus.
+# Toute modification du schéma passe par une nouvelle migration.
+
+SQL_MIGRATION_2 = """
+CREATE TABLE IF NOT EXISTS prix_materiaux (
+    version SERIAL PRIMARY KEY,
+    prix_ciment NUMERIC(10, 4) NOT NULL, -- €/kg
+    prix_sable NUMERIC(10, 4) NOT NULL, -- €/kg
+    prix_gravier NUMERIC(10, 4) NOT NULL, -- €/kg
+    prix_main_oeuvre NUMERIC(10, 2) NOT NULL, -- €/m³
+    date_effet TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    commentaire TEXT
+);
+ALTER TABLE projets_beton ADD COLUMN IF NOT EXISTS version_prix INTEGER REFERENCES prix_materiaux(version);
+"""
+
+SQL_MIGRATION_3 = """
+CREATE TABLE IF NOT EXISTS recalculs_projets (
+    nom_tache VARCHAR(100) PRIMARY KEY,
+    statut VARCHAR(20) NOT NULL, -- (en cours, interrompu, terminé, erreur)
+    dernier_id INTEGER NOT NULL DEFAULT 0, -- point de reprise
+    lignes_traitees BIGINT NOT NULL DEFAULT 0,
+    total_lignes BIGINT,
+    debut TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    mise_a_jour TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    message TEXT
+);
+"""
+
+SQL_MIGRATION_7 = """
+CREATE OR REPLACE FUNCTION notifier_projets_beton() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('projets_beton_modifies', TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_notifier_projets_beton ON projets_beton;
+CREATE TRIGGER trg_notifier_projets_beton
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON projets_beton
+    FOR EACH STATEMENT EXECUTE FUNCTION notifier_projets_beton();
+"""
+
+SQL_MIGRATION_8 = """
+CREATE OR REPLACE FUNCTION notifier_projets_beton() RETURNS trigger AS $$
+DECLARE
+    ids JSON;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT CASE WHEN COUNT(*) <= 500 THEN json_agg(id) END INTO ids FROM nouvelles;
+    END IF;
+    PERFORM pg_notify('projets_beton_modifies', json_build_object('operation', TG_OP, 'ids', ids)::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_notifier_projets_beton ON projets_beton;
+DROP TRIGGER IF EXISTS trg_notifier_insertion_projets_beton ON projets_beton;
+CREATE TRIGGER trg_notifier_insertion_projets_beton
+    AFTER INSERT ON projets_beton REFERENCING NEW TABLE AS nouvelles
+    FOR EACH STATEMENT EXECUTE FUNCTION notifier_projets_beton();
+CREATE TRIGGER trg_notifier_projets_beton
+    AFTER UPDATE OR DELETE OR TRUNCATE ON projets_beton
+    FOR EACH STATEMENT EXECUTE FUNCTION notifier_projets_beton();
+"""
+
+SQL_MIGRATION_9 = """
+CREATE TABLE IF NOT EXISTS resume_projets_type (
+    type_structure VARCHAR(50) PRIMARY KEY,
+    n_projets BIGINT NOT NULL DEFAULT 0,
+    volume_n BIGINT NOT NULL DEFAULT 0,
+    volume_somme NUMERIC NOT NULL DEFAULT 0,
+    volume_carres NUMERIC NOT NULL DEFAULT 0,
+    cout_n BIGINT NOT NULL DEFAULT 0,
+    cout_somme NUMERIC NOT NULL DEFAULT 0,
+    cout_carres NUMERIC NOT NULL DEFAULT 0,
+    resistance_n BIGINT NOT NULL DEFAULT 0,
+    resistance_somme NUMERIC NOT NULL DEFAULT 0,
+    resistance_carres NUMERIC NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION maj_resume_projets_type() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM resume_projets_type;
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO resume_projets_type AS r (type_structure, n_projets, volume_n, volume_somme, volume_carres,
+            cout_n, cout_somme, cout_carres, resistance_n, resistance_somme, resistance_carres) SELECT
+            type_structure, -COUNT(*), -COUNT(volume_beton_m3), -COALESCE(SUM(volume_beton_m3), 0),
+            -COALESCE(SUM(volume_beton_m3 * volume_beton_m3), 0), -COUNT(cout_total_eur),
+            -COALESCE(SUM(cout_total_eur), 0), -COALESCE(SUM(cout_total_eur * cout_total_eur), 0),
+            -COUNT(resistance_mpa), -COALESCE(SUM(resistance_mpa), 0), -COALESCE(SUM(resistance_mpa *
+            resistance_mpa), 0) FROM anciennes GROUP BY type_structure ORDER BY type_structure ON CONFLICT
+            (type_structure) DO UPDATE SET n_projets = r.n_projets + EXCLUDED.n_projets, volume_n = r.volume_n +
+            EXCLUDED.volume_n, volume_somme = r.volume_somme + EXCLUDED.volume_somme, volume_carres =
+            r.volume_carres + EXCLUDED.volume_carres, cout_n = r.cout_n + EXCLUDED.cout_n, cout_somme = r.cout_somme
+            + EXCLUDED.cout_somme, cout_carres = r.cout_carres + EXCLUDED.cout_carres, resistance_n = r.resistance_n
+            + EXCLUDED.resistance_n, resistance_somme = r.resistance_somme + EXCLUDED.resistance_somme,
+            resistance_carres = r.resistance_carres + EXCLUDED.resistance_carres;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO resume_projets_type AS r (type_structure, n_projets, volume_n, volume_somme, volume_carres,
+            cout_n, cout_somme, cout_carres, resistance_n, resistance_somme, resistance_carres) SELECT
+            type_structure, COUNT(*), COUNT(volume_beton_m3), COALESCE(SUM(volume_beton_m3), 0),
+            COALESCE(SUM(volume_beton_m3 * volume_beton_m3), 0), COUNT(cout_total_eur),
+            COALESCE(SUM(cout_total_eur), 0), COALESCE(SUM(cout_total_eur * cout_total_eur), 0),
+            COUNT(resistance_mpa), COALESCE(SUM(resistance_mpa), 0), COALESCE(SUM(resistance_mpa * resistance_mpa),
+            0) FROM nouvelles GROUP BY type_structure ORDER BY type_structure ON CONFLICT (type_structure) DO UPDATE
+            SET n_projets = r.n_projets + EXCLUDED.n_projets, volume_n = r.volume_n + EXCLUDED.volume_n,
+            volume_somme = r.volume_somme + EXCLUDED.volume_somme, volume_carres = r.volume_carres +
+            EXCLUDED.volume_carres, cout_n = r.cout_n + EXCLUDED.cout_n, cout_somme = r.cout_somme +
+            EXCLUDED.cout_somme, cout_carres = r.cout_carres + EXCLUDED.cout_carres, resistance_n = r.resistance_n +
+            EXCLUDED.resistance_n, resistance_somme = r.resistance_somme + EXCLUDED.resistance_somme,
+            resistance_carres = r.resistance_carres + EXCLUDED.resistance_carres;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_resume_insertion ON projets_beton;
+DROP TRIGGER IF EXISTS trg_resume_modification ON projets_beton;
+DROP TRIGGER IF EXISTS trg_resume_suppression ON projets_beton;
+DROP TRIGGER IF EXISTS trg_resume_vidage ON projets_beton;
+CREATE TRIGGER trg_resume_insertion AFTER INSERT ON projets_beton
+    REFERENCING NEW TABLE AS nouvelles FOR EACH STATEMENT EXECUTE FUNCTION maj_resume_projets_type();
+CREATE TRIGGER trg_resume_modification AFTER UPDATE ON projets_beton
+    REFERENCING OLD TABLE AS anciennes NEW TABLE AS nouvelles
+    FOR EACH STATEMENT EXECUTE FUNCTION maj_resume_projets_type();
+CREATE TRIGGER trg_resume_suppression AFTER DELETE ON projets_beton
+    REFERENCING OLD TABLE AS anciennes FOR EACH STATEMENT EXECUTE FUNCTION maj_resume_projets_type();
+CREATE TRIGGER trg_resume_vidage AFTER TRUNCATE ON projets_beton
+    FOR EACH STATEMENT EXECUTE FUNCTION maj_resume_projets_type();
+
+LOCK TABLE projets_beton IN SHARE MODE;
+DELETE FROM resume_projets_type;
+INSERT INTO resume_projets_type AS r (type_structure, n_projets, volume_n, volume_somme, volume_carres,
+    cout_n, cout_somme, cout_carres, resistance_n, resistance_somme, resistance_carres) SELECT
+    type_structure, COUNT(*), COUNT(volume_beton_m3), COALESCE(SUM(volume_beton_m3), 0),
+    COALESCE(SUM(volume_beton_m3 * volume_beton_m3), 0), COUNT(cout_total_eur),
+    COALESCE(SUM(cout_total_eur), 0), COALESCE(SUM(cout_total_eur * cout_total_eur), 0),
+    COUNT(resistance_mpa), COALESCE(SUM(resistance_mpa), 0), COALESCE(SUM(resistance_mpa * resistance_mpa),
+    0) FROM projets_beton GROUP BY type_structure ORDER BY type_structure ON CONFLICT (type_structure) DO
+    UPDATE SET n_projets = r.n_projets + EXCLUDED.n_projets, volume_n = r.volume_n + EXCLUDED.volume_n,
+    volume_somme = r.volume_somme + EXCLUDED.volume_somme, volume_carres = r.volume_carres +
+    EXCLUDED.volume_carres, cout_n = r.cout_n + EXCLUDED.cout_n, cout_somme = r.cout_somme +
+    EXCLUDED.cout_somme, cout_carres = r.cout_carres + EXCLUDED.cout_carres, resistance_n = r.resistance_n +
+    EXCLUDED.resistance_n, resistance_somme = r.resistance_somme + EXCLUDED.resistance_somme,
+    resistance_carres = r.resistance_carres + EXCLUDED.resistance_carres;
+"""
+
+SQL_MIGRATION_10 = """
+CREATE TABLE IF NOT EXISTS versions_tables (
+    nom TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO versions_tables (nom) VALUES ('projets_beton') ON CONFLICT (nom) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION incrementer_version_projets_beton() RETURNS trigger AS $$
+BEGIN
+    UPDATE versions_tables SET version = version + 1 WHERE nom = 'projets_beton';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_version_projets_beton ON projets_beton;
+CREATE TRIGGER trg_version_projets_beton
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON projets_beton
+    FOR EACH STATEMENT EXECUTE FUNCTION incrementer_version_projets_beton();
+"""
+
+# (version, description, SQL, index créé en concurrence: nom de l'index ou None)
+MIGRATIONS = [
+    (1, "Colonnes id et date_creation (tables créées par d'anciens scripts)", """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                           WHERE table_name = 'projets_beton' AND column_name = 'id') THEN
+                ALTER TABLE projets_beton ADD COLUMN id SERIAL PRIMARY KEY;
+            END IF;
+        END $$;
+        ALTER TABLE projets_beton ADD COLUMN IF NOT EXISTS date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+    """, None),
+    (2, "Tarifs versionnés des matériaux (prix_materiaux, projets_beton.version_prix)", SQL_MIGRATION_2, None),
+    (3, "Points de reprise du recalcul des projets (recalculs_projets)", SQL_MIGRATION_3, None),
+    (4, "Index sur nom_projet",
+     "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_projets_nom ON projets_beton (nom_projet)",
+     "idx_projets_nom"),
+    (5, "Index sur type_structure",
+     "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_projets_type ON projets_beton (type_structure)",
+     "idx_projets_type"),
+    (6, "Index (date_creation, id) de la liste paginée des projets",
+     "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_projets_date_id "
+     "ON projets_beton (date_creation DESC NULLS LAST, id DESC)",
+     "idx_projets_date_id"),
+    (7, "Trigger de notification des modifications de projets_beton (cache partagé)",
+     SQL_MIGRATION_7, None),
+    (8, "Notifications avec les id insérés (deltas diffusés aux sessions)", SQL_MIGRATION_8, None),
+    (9, "Synthèse par type de structure tenue à jour par triggers (resume_projets_type)",
+     SQL_MIGRATION_9, None),
+    (10, "Version de projets_beton incrémentée à chaque modification (instantanés d'export)",
+     SQL_MIGRATION_10, None),
+]
+
+
+def versions_appliquees(conn):
+    """Ensemble des versions déjà appliquées"""
+    conn.execute(text(SQL_TABLE_MIGRATIONS))
+    return {ligne[0] for ligne in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def _enregistrer(conn, version, description):
+    conn.execute(text("INSERT INTO schema_migrations (version, description) VALUES (:version, :description)"),
+                 {"version": version, "description": description})
+
+
+def _creer_index_concurrent(engine, nom_index, sql):
+    """CREATE INDEX CONCURRENTLY hors transaction, après suppression d'un index invalide de même nom"""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SET statement_timeout = 0"))  # la construction peut être longue
+        invalide = conn.execute(text("""
+            SELECT NOT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = :nom
+        """), {"nom": nom_index}).scalar()
+        if invalide:
+            print(f"[MIGRATION] Index {nom_index} invalide (construction interrompue): reconstruction")
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {nom_index}"))
+        conn.execute(text(sql))
+
+
+def appliquer_migrations(engine):
+    """Applique les migrations en attente, dans l'ordre; retourne la liste des versions appliquées"""
+    appliquees = []
+    with engine.connect() as verrou:
+        verrou.execute(text("SELECT pg_advisory_lock(:cle)"), {"cle": CLE_VERROU})
+        verrou.commit()
+        try:
+            with engine.begin() as conn:
+                deja = versions_appliquees(conn)
+            for version, description, sql, nom_index in MIGRATIONS:
+                if version in deja:
+                    continue
+                print(f"[MIGRATION] {version}: {description}...")
+                if nom_index is None:
+                    with engine.begin() as conn:
+                        conn.execute(text(sql))
+                        _enregistrer(conn, version, description)
+                else:
+                    _creer_index_concurrent(engine, nom_index, sql)
+                    with engine.begin() as conn:
+                        _enregistrer(conn, version, description)
+                appliquees.append(version)
+            # Table partitionnée par mois (partitions.py): partitions à venir
+            partitions.preparer_partitions(engine)
+            # Tarif initial si la table des prix est vide
+            with engine.begin() as conn:
+                prix.inserer_tarif_initial(conn)
+        finally:
+            verrou.execute(text("SELECT pg_advisory_unlock(:cle)"), {"cle": CLE_VERROU})
+            verrou.commit()
+    if appliquees:
+        print(f"[MIGRATION] ✅ {len(appliquees)} migration(s) appliquée(s): {appliquees}")
+        # Le schéma a changé: recharger le registre partagé
+        charger_schema(engine)
+    return appliquees
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrations du schéma projets_beton")
+    parser.add_argument("--liste", action="store_true", help="Afficher l'état des migrations sans rien appliquer")
+    args = parser.parse_args(argv)
+
+    from base_donnees import engine
+
+    if args.liste:
+        with engine.begin() as conn:
+            deja = versions_appliquees(conn)
+        for version, description, _, _ in MIGRATIONS:
+            print(f"{'✅' if version in deja else '⏳'} {version:>3}  {description}")
+        return 0
+    appliquer_migrations(engine)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
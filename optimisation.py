@@ -0,0 +1,143 @@
+"""
+Optimisation du mélange béton à coût minimal
+
+Choisit les dosages (ciment, eau, sable, gravier) et l'épaisseur qui minimisent
+cout_total_eur sous les contraintes suivantes:
+    - bornes des champs du formulaire (calculs_beton.BORNES)
+    - rapport eau/ciment E/C <= rapport_ec_max
+    - volume absolu des constituants = 1 m³ (air occlus compris)
+    - squelette granulaire: part de sable S/(S+G) dans [RATIO_SABLE_MIN, RATIO_SABLE_MAX]
+    - résistance du mélange (formule de Bolomey) >= résistance demandée et
+      marge_securite = résistance / contrainte >= coefficient_securite
+
+Avec la formule de Bolomey fc = G·σc·(C/E - 0.5), toutes ces contraintes sont
+linéaires en (C, E, S, G): le problème est un programme linéaire résolu en
+quelques millisecondes. Le volume étant proportionnel à l'épaisseur, le coût
+croît avec elle: l'optimum est l'épaisseur minimale autorisée (borne du
+formulaire ou minimum imposé par l'ingénieur).
+
+Les solutions sont mémorisées par signature d'entrée (lru_cache).
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from calculs_beton import (
+    BORNES, COLONNES_ENTREE, PRIX_PAR_DEFAUT, calculer_contrainte_marge, calculer_projet,
+)
+
+# Masses volumiques absolues des constituants (kg/m³)
+MASSE_VOLUMIQUE_CIMENT = 3100
+MASSE_VOLUMIQUE_EAU = 1000
+MASSE_VOLUMIQUE_GRANULATS = 2650
+VOLUME_AIR = 0.02  # m³ d'air occlus par m³ de béton
+
+# Formule de Bolomey: fc28 = G × σc × (C/E - 0.5)
+COEFFICIENT_GRANULAIRE = 0.5  # G, granulats de qualité courante
+CLASSE_CIMENT_MPA = 42.5      # σc, ciment CEM 42.5
+
+RAPPORT_EC_MAX = 0.60  # limite E/C par défaut (classes d'exposition courantes)
+RATIO_SABLE_MIN = 0.30
+RATIO_SABLE_MAX = 0.50
+
+DOSAGES = ["dosage_ciment_kg_m3", "dosage_eau_kg_m3", "dosage_sable_kg_m3", "dosage_gravier_kg_m3"]
+
+# Précision de la signature de cache (décimales des entrées)
+DECIMALES_SIGNATURE = 6
+
+
+def resistance_bolomey(ciment, eau):
+    """Résistance à 28 jours (MPa) d'un mélange selon Bolomey"""
+    return COEFFICIENT_GRANULAIRE * CLASSE_CIMENT_MPA * (np.asarray(ciment) / np.asarray(eau) - 0.5)
+
+
+def signature(valeurs, rapport_ec_max=RAPPORT_EC_MAX, epaisseur_min=None, prix=None):
+    """Clé de cache: entrées du projet et prix qui influencent l'optimum (hors dosages et épaisseur)"""
+    mini, maxi = BORNES["epaisseur_m"]
+    epaisseur_min = mini if epaisseur_min is None else min(max(float(epaisseur_min), mini), maxi)
+    cle = []
+    for nom in COLONNES_ENTREE:
+        if nom in DOSAGES or nom == "epaisseur_m":
+            continue
+        valeur = valeurs[nom]
+        cle.append(round(float(valeur), DECIMALES_SIGNATURE) if nom not in ("type_structure", "forme_structure") else valeur)
+    prix = PRIX_PAR_DEFAUT if prix is None else prix
+    tarif = tuple(float(prix[nom]) for nom in PRIX_PAR_DEFAUT)
+    return tuple(cle) + (tarif, round(float(rapport_ec_max), DECIMALES_SIGNATURE), round(epaisseur_min, DECIMALES_SIGNATURE))
+
+
+def optimiser_melange(valeurs, rapport_ec_max=RAPPORT_EC_MAX, epaisseur_min=None, prix=None):
+    """
+    Mélange et épaisseur de coût minimal pour un projet.
+
+    valeurs: dict {colonne: valeur} (COLONNES_ENTREE; dosages et épaisseur ignorés).
+    epaisseur_min: épaisseur minimale imposée (défaut: borne du formulaire).
+    prix: tarif des matériaux (défaut: calculs_beton.PRIX_PAR_DEFAUT).
+    Retourne un dict {statut, message, dosages..., epaisseur_m, resistance_mpa,
+    rapport_ec, resultat (colonnes calculées du projet optimisé)}.
+    """
+    solution = dict(_optimiser(signature(valeurs, rapport_ec_max, epaisseur_min, prix)))
+    if "resultat" in solution:
+        solution["resultat"] = dict(solution["resultat"])
+    return solution
+
+
+@lru_cache(maxsize=1024)
+def _optimiser(cle):
+    noms = [nom for nom in COLONNES_ENTREE if nom not in DOSAGES and nom != "epaisseur_m"]
+    valeurs = dict(zip(noms, cle[:-3]))
+    tarif, rapport_ec_max, epaisseur_min = cle[-3:]
+    prix = dict(zip(PRIX_PAR_DEFAUT, tarif))
+
+    # Résistance minimale: celle demandée, et celle qui garantit la marge de sécurité
+    charge_totale = sum(valeurs[nom] for nom in
+                        ["charge_statique_kn", "charge_dynamique_kn", "charge_vent_kn", "charge_neige_kn", "charge_seisme_kn"])
+    contrainte_mpa, _ = calculer_contrainte_marge(charge_totale, valeurs["longueur_m"] * valeurs["largeur_m"], 1.0)
+    resistance_requise = max(valeurs["resistance_mpa"], valeurs["coefficient_securite"] * float(contrainte_mpa))
+
+    # C/E >= 0.5 + fc/(G σc)  <=>  k·E - C <= 0
+    k = 0.5 + resistance_requise / (COEFFICIENT_GRANULAIRE * CLASSE_CIMENT_MPA)
+    # Variables x = (C, E, S, G), coût par m³ (la main-d'œuvre est constante)
+    cout_m3 = [prix["prix_ciment"], 0.0, prix["prix_sable"], prix["prix_gravier"]]
+    A_ub = [
+        [-1.0, k, 0.0, 0.0],                                   # résistance / marge
+        [-rapport_ec_max, 1.0, 0.0, 0.0],                      # E/C <= max
+        [0.0, 0.0, -(1 - RATIO_SABLE_MIN), RATIO_SABLE_MIN],   # S/(S+G) >= min
+        [0.0, 0.0, 1 - RATIO_SABLE_MAX, -RATIO_SABLE_MAX],     # S/(S+G) <= max
+    ]
+    b_ub = [0.0, 0.0, 0.0, 0.0]
+    A_eq = [[1 / MASSE_VOLUMIQUE_CIMENT, 1 / MASSE_VOLUMIQUE_EAU,
+             1 / MASSE_VOLUMIQUE_GRANULATS, 1 / MASSE_VOLUMIQUE_GRANULATS]]
+    b_eq = [1 - VOLUME_AIR]
+    bornes = [BORNES[nom] for nom in DOSAGES]
+
+    from scipy.optimize import linprog  # import différé: scipy n'est chargé qu'à la première optimisation
+
+    solution = linprog(cout_m3, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, bounds=bornes, method="highs")
+    if not solution.success:
+        return (
+            ("statut", "infaisable"),
+            ("message", "Aucun mélange ne respecte les contraintes (résistance requise "
+                        f"{resistance_requise:.1f} MPa, E/C <= {rapport_ec_max:.2f})"),
+            ("resistance_requise", resistance_requise),
+        )
+
+    ciment, eau, sable, gravier = (float(x) for x in solution.x)
+    projet = dict(valeurs)
+    projet.update(zip(DOSAGES, (ciment, eau, sable, gravier)))
+    projet["epaisseur_m"] = epaisseur_min
+    projet["resistance_mpa"] = float(resistance_bolomey(ciment, eau))
+    resultat = calculer_projet(projet, prix=prix)
+    return (
+        ("statut", "optimal"),
+        ("message", "Mélange optimal trouvé"),
+        ("resistance_requise", resistance_requise),
+        *((nom, projet[nom]) for nom in DOSAGES),
+        ("epaisseur_m", projet["epaisseur_m"]),
+        ("resistance_mpa", projet["resistance_mpa"]),
+        ("rapport_ec", eau / ciment),
+        ("cout_m3_materiaux", float(solution.fun)),
+        ("cout_m3_total", float(solution.fun) + prix["prix_main_oeuvre"]),
+        ("resultat", tuple(resultat.items())),
+    )
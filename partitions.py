@@ -0,0 +1,359 @@
+"""
+Partitionnement mensuel de projets_beton sur date_creation (facultatif)
+
+projets_beton devient une table partitionnée par intervalle
+(PARTITION BY RANGE (date_creation)), une partition par mois
+(projets_beton_AAAA_MM) plus une partition par défaut (projets_beton_defaut)
+qui reçoit les projets d'un mois pas encore créé. Les requêtes bornées en date
+(filtres de l'onglet Analyste, pages suivantes de la Consultation) ne lisent
+que les partitions des mois concernés.
+
+Conversion (convertir, python partitions.py --convertir), une seule fois et hors
+du démarrage de l'application: toute la table est copiée dans une transaction qui
+garde un verrou ACCESS EXCLUSIVE sur projets_beton (lectures et écritures bloquées
+pendant la copie), à lancer dans une fenêtre de maintenance. Avec
+PROJETS_PARTITIONNES=1, les migrations signalent une table pas encore convertie.
+
+Maintenance (maintenir_partitions): partitions des MOIS_D_AVANCE prochains mois,
+et une partition pour chaque mois présent dans la partition par défaut (projets
+importés). Appliquée par appliquer_migrations (migrations.py), puis une fois par
+jour par le fil planifier_maintenance de l'application.
+
+Les anciens mois sont détachés vers le schéma SCHEMA_ARCHIVE (archiver_mois):
+aucune autre partition n'est lue ni réécrite; la synthèse par type, la version de
+la table et les caches des sessions sont mis à jour.
+
+Clé primaire (id, date_creation): PostgreSQL exige que la clé d'une table partitionnée
+contienne la colonne de partitionnement. date_creation devient NOT NULL à la
+conversion; les projets sans date reçoivent DATE_INCONNUE (classés après les
+autres dans la liste, comme NULLS LAST).
+Les migrations qui créent un index avec CONCURRENTLY ne s'appliquent pas à une table partitionnée.
+
+Usage:
+    python partitions.py                  (crée les partitions manquantes)
+    python partitions.py --convertir      (convertit projets_beton, même sans PROJETS_PARTITIONNES)
+    python partitions.py --liste
+    python partitions.py --archiver 2021-03
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import threading
+import time
+
+from sqlalchemy import text
+
+import resume_types
+from cache_donnees import CANAL
+
+PARTITIONNEMENT = os.getenv("PROJETS_PARTITIONNES", "0") == "1"
+MOIS_D_AVANCE = 3
+SCHEMA_ARCHIVE = os.getenv("SCHEMA_ARCHIVE", "archive")
+PARTITION_DEFAUT = "projets_beton_defaut"
+DATE_INCONNUE = "1970-01-01"
+INTERVALLE_MAINTENANCE_S = 24 * 3600
+
+# Clé du verrou consultatif (pg_advisory_xact_lock) de la création des partitions
+CLE_VERROU = 724002
+
+# Index de projets_beton recréés sur la table partitionnée (propagés à chaque partition);
+# les recherches par id utilisent la clé primaire (id, date_creation)
+INDEX = {
+    "idx_projets_nom": "(nom_projet)",
+    "idx_projets_type": "(type_structure)",
+    "idx_projets_date_id": "(date_creation DESC NULLS LAST, id DESC)",
+}
+
+
+def _debut_mois(date):
+    return datetime.date(date.year, date.month, 1)
+
+
+def _mois_suivant(debut):
+    return datetime.date(debut.year + debut.month // 12, debut.month % 12 + 1, 1)
+
+
+def nom_partition(debut):
+    """Nom de la partition d'un mois (premier jour du mois)"""
+    return f"projets_beton_{debut:%Y_%m}"
+
+
+def est_partitionnee(conn):
+    """True si projets_beton est une table partitionnée"""
+    return bool(conn.execute(text(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('projets_beton')"
+    )).scalar())
+
+
+def lister_partitions(conn):
+    """[(nom, bornes)] des partitions de projets_beton, par nom"""
+    return [tuple(ligne) for ligne in conn.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'projets_beton'::regclass
+        ORDER BY c.relname
+    """))]
+
+
+def _ajouter_mois(conn, debut):
+    """
+    Crée et attache la partition d'un mois, en y déplaçant ses projets de la partition par défaut.
+
+    La table est créée seule puis attachée (verrou léger sur projets_beton); la contrainte
+    CHECK évite de la relire à l'attachement. Le déplacement vise directement les partitions:
+    les triggers de projets_beton (synthèse, notifications) ne sont pas déclenchés.
+    """
+    nom, fin = nom_partition(debut), _mois_suivant(debut)
+    bornes = {"debut": debut, "fin": fin}
+    conn.execute(text(f"CREATE TABLE {nom} (LIKE projets_beton INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    deplaces = conn.execute(text(f"""
+        WITH deplaces AS (
+            DELETE FROM {PARTITION_DEFAUT}
+            WHERE date_creation >= :debut AND date_creation < :fin
+            RETURNING *
+        )
+        INSERT INTO {nom} SELECT * FROM deplaces
+    """), bornes).rowcount
+    conn.execute(text(f"""
+        ALTER TABLE {nom} ADD CONSTRAINT {nom}_bornes
+            CHECK (date_creation IS NOT NULL AND date_creation >= '{debut}' AND date_creation < '{fin}')
+    """))
+    conn.execute(text(f"ALTER TABLE projets_beton ATTACH PARTITION {nom} FOR VALUES FROM ('{debut}') TO ('{fin}')"))
+    conn.execute(text(f"ALTER TABLE {nom} DROP CONSTRAINT {nom}_bornes"))
+    print(f"[PARTITIONS] Partition {nom} créée" + (f" ({deplaces} projet(s) déplacé(s))" if deplaces else ""))
+
+
+def maintenir_partitions(engine, mois_d_avance=MOIS_D_AVANCE):
+    """
+    Crée les partitions manquantes: mois à venir, et mois présents dans la partition par défaut.
+
+    Sans effet si projets_beton n'est pas partitionnée. Retourne les partitions créées.
+    """
+    creees = []
+    with engine.begin() as conn:
+        if not est_partitionnee(conn):
+            return creees
+        existantes = {nom for nom, _ in lister_partitions(conn)}
+        mois = conn.execute(text(f"""
+            SELECT DISTINCT CAST(date_trunc('month', date_creation) AS DATE)
+            FROM {PARTITION_DEFAUT} WHERE date_creation IS NOT NULL
+        """)).scalars().all()
+    debut = _debut_mois(datetime.date.today())
+    for _ in range(mois_d_avance + 1):
+        mois.append(debut)
+        debut = _mois_suivant(debut)
+    for debut in sorted(set(mois)):
+        if nom_partition(debut) in existantes:
+            continue
+        # Une transaction par mois: les verrous de la partition par défaut ne sont pas gardés
+        with engine.begin() as conn:
+            conn.execute(text("SET LOCAL statement_timeout = 0"))
+            # Plusieurs processus (workers, fils de maintenance): le mois est créé une seule fois
+            conn.execute(text("SELECT pg_advisory_xact_lock(:cle)"), {"cle": CLE_VERROU})
+            if conn.execute(text("SELECT to_regclass(:nom) IS NOT NULL"), {"nom": nom_partition(debut)}).scalar():
+                continue
+            _ajouter_mois(conn, debut)
+        creees.append(nom_partition(debut))
+    return creees
+
+
+def _maintenir_periodiquement(engine, intervalle_s):
+    while True:
+        time.sleep(intervalle_s)
+        try:
+            creees = maintenir_partitions(engine)
+            if creees:
+                print(f"[PARTITIONS] {len(creees)} partition(s) créée(s): {', '.join(creees)}")
+        except Exception as e:
+            print(f"[PARTITIONS] ⚠️ Maintenance des partitions en échec: {str(e)[:200]}")
+
+
+_fil = None
+_verrou_fil = threading.Lock()
+
+
+def planifier_maintenance(engine, intervalle_s=INTERVALLE_MAINTENANCE_S):
+    """Démarre le fil qui applique maintenir_partitions tous les intervalle_s (une seule fois par processus)"""
+    global _fil
+    with _verrou_fil:
+        if _fil is not None:
+            return
+        _fil = threading.Thread(target=_maintenir_periodiquement, args=(engine, intervalle_s),
+                                name="partitions-maintenance", daemon=True)
+    _fil.start()
+
+
+def convertir(engine):
+    """
+    Convertit projets_beton en table partitionnée par mois (sans effet si elle l'est déjà).
+
+    Une seule transaction, sous verrou ACCESS EXCLUSIVE (projets_beton ni lue ni modifiée
+    pendant la copie complète): dates vides remplacées par DATE_INCONNUE, renommage de
+    l'ancienne table, création de la table partitionnée (mêmes colonnes, valeurs par défaut
+    et séquence de id, date_creation NOT NULL), partitions des mois présents, copie des projets,
+    clé primaire (id, date_creation), index, clé étrangère du tarif et triggers, puis suppression
+    de l'ancienne table. Retourne True si la table a été convertie.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("SET LOCAL statement_timeout = 0"))
+        conn.execute(text("LOCK TABLE projets_beton IN ACCESS EXCLUSIVE MODE"))
+        if est_partitionnee(conn):
+            return False
+        n_projets = conn.execute(text("SELECT COUNT(*) FROM projets_beton")).scalar()
+        print(f"[PARTITIONS] Conversion de projets_beton ({n_projets} projet(s))...")
+        sequence = conn.execute(text("SELECT pg_get_serial_sequence('projets_beton', 'id')")).scalar()
+        a_prix = conn.execute(text("""
+            SELECT EXISTS (SELECT 1 FROM information_schema.columns
+                           WHERE table_schema = current_schema() AND table_name = 'projets_beton'
+                             AND column_name = 'version_prix')
+        """)).scalar()
+
+        # Triggers posés par les migrations, recréés à l'identique sur la nouvelle table
+        triggers = conn.execute(text(
+            "SELECT pg_get_triggerdef(oid) FROM pg_trigger "
+            "WHERE tgrelid = 'projets_beton'::regclass AND NOT tgisinternal ORDER BY tgname"
+        )).scalars().all()
+
+        # Clé primaire (id, date_creation): plus de date vide. Triggers désactivés: ni la synthèse
+        # par type ni la version ne changent, la table est recréée juste après
+        conn.execute(text("ALTER TABLE projets_beton DISABLE TRIGGER USER"))
+        sans_date = conn.execute(text(
+            "UPDATE projets_beton SET date_creation = :date WHERE date_creation IS NULL"
+        ), {"date": DATE_INCONNUE}).rowcount
+        if sans_date:
+            print(f"[PARTITIONS] {sans_date} projet(s) sans date: date_creation = {DATE_INCONNUE}")
+
+        conn.execute(text("ALTER TABLE projets_beton RENAME TO projets_beton_avant_partition"))
+        # Libère les noms d'index (clé primaire comprise) pour la nouvelle table
+        for (index,) in conn.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() "
+            "AND tablename = 'projets_beton_avant_partition'"
+        )).all():
+            conn.execute(text(f'ALTER INDEX "{index}" RENAME TO "{index[:40]}_avant_partition"'))
+
+        conn.execute(text("""
+            CREATE TABLE projets_beton (
+                LIKE projets_beton_avant_partition INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING COMMENTS
+            ) PARTITION BY RANGE (date_creation)
+        """))
+        conn.execute(text("ALTER TABLE projets_beton ALTER COLUMN date_creation SET NOT NULL"))
+        if sequence:
+            conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY projets_beton.id"))
+        if a_prix:
+            conn.execute(text(
+                "ALTER TABLE projets_beton ADD CONSTRAINT projets_beton_version_prix_fkey "
+                "FOREIGN KEY (version_prix) REFERENCES prix_materiaux(version)"
+            ))
+        conn.execute(text(f"CREATE TABLE {PARTITION_DEFAUT} PARTITION OF projets_beton DEFAULT"))
+
+        mois = conn.execute(text("""
+            SELECT DISTINCT CAST(date_trunc('month', date_creation) AS DATE)
+            FROM projets_beton_avant_partition WHERE date_creation IS NOT NULL
+        """)).scalars().all()
+        for debut in sorted(mois):
+            conn.execute(text(
+                f"CREATE TABLE {nom_partition(debut)} PARTITION OF projets_beton "
+                f"FOR VALUES FROM ('{debut}') TO ('{_mois_suivant(debut)}')"
+            ))
+
+        # Copie avant la création des triggers: la synthèse par type est déjà à jour
+        conn.execute(text("INSERT INTO projets_beton SELECT * FROM projets_beton_avant_partition"))
+        conn.execute(text(
+            "ALTER TABLE projets_beton ADD CONSTRAINT projets_beton_pkey PRIMARY KEY (id, date_creation)"
+        ))
+        for nom_index, colonnes_index in INDEX.items():
+            conn.execute(text(f"CREATE INDEX {nom_index} ON projets_beton {colonnes_index}"))
+        for definition in triggers:
+            conn.execute(text(definition))
+        conn.execute(text("UPDATE versions_tables SET version = version + 1 WHERE nom = 'projets_beton'"))
+        conn.execute(text("DROP TABLE projets_beton_avant_partition"))
+    print(f"[PARTITIONS] ✅ projets_beton partitionnée par mois ({len(mois)} mois, partition par défaut)")
+    return True
+
+
+def preparer_partitions(engine):
+    """
+    Appelé par appliquer_migrations: partitions manquantes si projets_beton est partitionnée.
+
+    La conversion n'est jamais faite ici (copie complète sous verrou exclusif):
+    avec PROJETS_PARTITIONNES=1, une table non convertie est seulement signalée.
+    """
+    with engine.connect() as conn:
+        partitionnee = est_partitionnee(conn)
+    if PARTITIONNEMENT and not partitionnee:
+        print("[PARTITIONS] ⚠️ PROJETS_PARTITIONNES=1 mais projets_beton n'est pas partitionnée: "
+              "lancer python partitions.py --convertir (table bloquée pendant la copie)")
+    if partitionnee:
+        creees = maintenir_partitions(engine)
+        if creees:
+            print(f"[PARTITIONS] {len(creees)} partition(s) créée(s)")
+    return partitionnee
+
+
+def archiver_mois(engine, debut, schema_archive=SCHEMA_ARCHIVE):
+    """
+    Détache la partition d'un mois de projets_beton et la déplace dans le schéma d'archive.
+
+    Seule la partition du mois est lue (retrait de ses projets de la synthèse par type);
+    les projets restent consultables dans schema_archive.nom_partition. Le détachement
+    prend brièvement un verrou exclusif sur projets_beton: lock_timeout évite
+    d'attendre derrière une longue requête en bloquant les autres.
+    """
+    debut = _debut_mois(debut)
+    nom = nom_partition(debut)
+    with engine.begin() as conn:
+        if nom not in {partition for partition, _ in lister_partitions(conn)}:
+            raise ValueError(f"Partition {nom} introuvable")
+        conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+        conn.execute(text(f"ALTER TABLE projets_beton DETACH PARTITION {nom}"))
+        n_projets = conn.execute(text(f"SELECT COUNT(*) FROM {nom}")).scalar()
+        if conn.execute(text("SELECT to_regclass('resume_projets_type') IS NOT NULL")).scalar():
+            resume_types.retirer_resume(conn, nom)
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema_archive}"))
+        conn.execute(text(f"ALTER TABLE {nom} SET SCHEMA {schema_archive}"))
+        # Le détachement ne déclenche aucun trigger: version et notification envoyées ici
+        if conn.execute(text("SELECT to_regclass('versions_tables') IS NOT NULL")).scalar():
+            conn.execute(text("UPDATE versions_tables SET version = version + 1 WHERE nom = 'projets_beton'"))
+        conn.execute(text("SELECT pg_notify(:canal, :evenement)"),
+                     {"canal": CANAL, "evenement": '{"operation": "DETACH", "ids": null}'})
+    print(f"[PARTITIONS] ✅ {nom} archivée dans {schema_archive}.{nom} ({n_projets} projet(s))")
+    return n_projets
+
+
+def _mois(valeur):
+    return datetime.datetime.strptime(valeur, "%Y-%m").date()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Partitions mensuelles de projets_beton")
+    groupe = parser.add_mutually_exclusive_group()
+    groupe.add_argument("--convertir", action="store_true", help="Convertir projets_beton en table partitionnée")
+    groupe.add_argument("--liste", action="store_true", help="Lister les partitions et leur nombre de projets")
+    groupe.add_argument("--archiver", type=_mois, metavar="AAAA-MM", help="Détacher le mois vers le schéma d'archive")
+    args = parser.parse_args(argv)
+
+    from base_donnees import engine
+
+    if args.archiver:
+        archiver_mois(engine, args.archiver)
+        return 0
+    if args.convertir:
+        convertir(engine)
+    if args.liste:
+        with engine.connect() as conn:
+            if not est_partitionnee(conn):
+                print("projets_beton n'est pas partitionnée")
+                return 0
+            for nom, bornes in lister_partitions(conn):
+                n_projets = conn.execute(text(f"SELECT COUNT(*) FROM {nom}")).scalar()
+                print(f"{nom:<28} {n_projets:>10}  {bornes}")
+        return 0
+    creees = maintenir_partitions(engine)
+    print(f"✅ {len(creees)} partition(s) créée(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
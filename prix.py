@@ -0,0 +1,251 @@
+"""
+Tarifs versionnés des matériaux et recalcul des coûts des projets
+
+Les prix unitaires (ciment, sable, gravier, main-d'œuvre) sont stockés dans la
+table prix_materiaux: chaque changement de prix crée une nouvelle version, la
+plus récente étant le tarif courant. Chaque projet enregistre dans
+projets_beton.version_prix la version utilisée pour ses coûts.
+
+Le tarif courant est mis en cache dans le processus; le cache est invalidé à la
+publication d'un nouveau tarif et revalidé (SELECT max(version)) au plus toutes
+les DUREE_CACHE_S secondes pour suivre les changements faits par un autre processus.
+
+La table prix_materiaux et la colonne projets_beton.version_prix sont créées par
+les migrations (migrations.py, migration 2).
+
+Le recalcul des coûts est fait en SQL, par lots de lignes consécutives (clé id),
+chaque lot dans sa propre transaction: seules les lignes du lot sont verrouillées.
+
+Usage:
+    python prix.py liste
+    python prix.py publier --ciment 0.16 --sable 0.05 --gravier 0.04 --main-oeuvre 85 --commentaire "Tarif 2026"
+    python prix.py recalculer [--version 3] [--taille-lot 50000]
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+from sqlalchemy import text
+
+from calculs_beton import PRIX_PAR_DEFAUT
+
+# Durée pendant laquelle le tarif en cache est utilisé sans revalidation (secondes)
+DUREE_CACHE_S = 30
+
+# Lignes mises à jour par transaction lors d'un recalcul
+TAILLE_LOT_RECALCUL = 50000
+
+# Recalcul d'un lot: les coûts sont dérivés des quantités et du volume stockés
+# (mêmes formules que calculs_beton.calculer_colonnes, à partir des valeurs arrondies)
+SQL_RECALCUL_LOT = """
+WITH tarif AS (
+    SELECT CAST(:prix_ciment AS NUMERIC) AS ciment, CAST(:prix_sable AS NUMERIC) AS sable,
+           CAST(:prix_gravier AS NUMERIC) AS gravier, CAST(:prix_main_oeuvre AS NUMERIC) AS main_oeuvre
+),
+lot AS (
+    SELECT id FROM projets_beton
+    WHERE id > :dernier_id AND version_prix IS DISTINCT FROM :version
+    ORDER BY id
+    LIMIT :taille_lot
+),
+maj AS (
+    UPDATE projets_beton p SET
+        cout_ciment_eur = ROUND(p.quantite_ciment_kg * t.ciment, 2),
+        cout_sable_eur = ROUND(p.quantite_sable_kg * t.sable, 2),
+        cout_gravier_eur = ROUND(p.quantite_gravier_kg * t.gravier, 2),
+        cout_main_oeuvre_eur = ROUND(p.volume_beton_m3 * t.main_oeuvre, 2),
+        cout_materiaux_eur = ROUND(p.quantite_ciment_kg * t.ciment + p.quantite_sable_kg * t.sable
+                                   + p.quantite_gravier_kg * t.gravier, 2),
+        cout_total_eur = ROUND(p.quantite_ciment_kg * t.ciment + p.quantite_sable_kg * t.sable
+                               + p.quantite_gravier_kg * t.gravier + p.volume_beton_m3 * t.main_oeuvre, 2),
+        version_prix = :version
+    FROM lot, tarif t
+    WHERE p.id = lot.id
+    RETURNING p.id
+)
+SELECT COUNT(*), MAX(id) FROM maj
+"""
+
+_cache = {"tarif": None, "verifie_a": 0.0}
+_verrou = threading.Lock()
+
+
+def inserer_tarif_initial(conn):
+    """Insère le tarif par défaut (version 1) si prix_materiaux est vide"""
+    conn.execute(text("""
+        INSERT INTO prix_materiaux (prix_ciment, prix_sable, prix_gravier, prix_main_oeuvre, commentaire)
+        SELECT :prix_ciment, :prix_sable, :prix_gravier, :prix_main_oeuvre, 'Tarif initial'
+        WHERE NOT EXISTS (SELECT 1 FROM prix_materiaux)
+    """), PRIX_PAR_DEFAUT)
+
+
+def _lire_tarif(conn, version=None):
+    """Tarif d'une version (la plus récente par défaut) sous forme de dict"""
+    requete = """
+        SELECT version, prix_ciment, prix_sable, prix_gravier, prix_main_oeuvre
+        FROM prix_materiaux
+    """
+    if version is None:
+        ligne = conn.execute(text(requete + " ORDER BY version DESC LIMIT 1")).mappings().first()
+    else:
+        ligne = conn.execute(text(requete + " WHERE version = :version"), {"version": version}).mappings().first()
+    if ligne is None:
+        return None
+    return {nom: (int(valeur) if nom == "version" else float(valeur)) for nom, valeur in ligne.items()}
+
+
+def invalider_cache():
+    """Force la relecture du tarif courant au prochain appel de obtenir_prix"""
+    with _verrou:
+        _cache["tarif"] = None
+        _cache["verifie_a"] = 0.0
+
+
+def obtenir_prix(engine):
+    """
+    Tarif courant {version, prix_ciment, prix_sable, prix_gravier, prix_main_oeuvre}.
+
+    Servi depuis le cache du processus; revalidé au plus toutes les DUREE_CACHE_S
+    secondes. Si la base est inaccessible, retourne le dernier tarif connu, ou le
+    tarif par défaut avec version None.
+    """
+    maintenant = time.monotonic()
+    with _verrou:
+        tarif = _cache["tarif"]
+        if tarif is not None and maintenant - _cache["verifie_a"] < DUREE_CACHE_S:
+            return tarif
+    try:
+        with engine.connect() as conn:
+            if tarif is not None:
+                version = conn.execute(text("SELECT MAX(version) FROM prix_materiaux")).scalar()
+                if version == tarif["version"]:
+                    with _verrou:
+                        _cache["verifie_a"] = maintenant
+                    return tarif
+            nouveau = _lire_tarif(conn)
+    except Exception as e:
+        # Pas de nouvelle tentative avant DUREE_CACHE_S secondes
+        print(f"[PRIX] ⚠️ Lecture du tarif impossible: {str(e)[:200]}")
+        nouveau = None
+    if nouveau is None:
+        nouveau = tarif or {"version": None, **PRIX_PAR_DEFAUT}
+    with _verrou:
+        _cache["tarif"] = nouveau
+        _cache["verifie_a"] = maintenant
+    if nouveau["version"] is not None and (tarif is None or tarif["version"] != nouveau["version"]):
+        print(f"[PRIX] Tarif version {nouveau['version']} chargé")
+    return nouveau
+
+
+def publier_prix(engine, prix_ciment, prix_sable, prix_gravier, prix_main_oeuvre, commentaire=None):
+    """Enregistre un nouveau tarif (nouvelle version) et invalide le cache; retourne la version"""
+    with engine.begin() as conn:
+        version = conn.execute(text("""
+            INSERT INTO prix_materiaux (prix_ciment, prix_sable, prix_gravier, prix_main_oeuvre, commentaire)
+            VALUES (:prix_ciment, :prix_sable, :prix_gravier, :prix_main_oeuvre, :commentaire)
+            RETURNING version
+        """), {
+            "prix_ciment": prix_ciment, "prix_sable": prix_sable, "prix_gravier": prix_gravier,
+            "prix_main_oeuvre": prix_main_oeuvre, "commentaire": commentaire,
+        }).scalar()
+    invalider_cache()
+    print(f"[PRIX] ✅ Tarif version {version} publié")
+    return version
+
+
+def lister_prix(engine):
+    """Historique des tarifs, du plus récent au plus ancien"""
+    with engine.connect() as conn:
+        return conn.execute(text("""
+            SELECT version, prix_ciment, prix_sable, prix_gravier, prix_main_oeuvre, date_effet, commentaire
+            FROM prix_materiaux ORDER BY version DESC
+        """)).mappings().all()
+
+
+def recalculer_couts(engine, version=None, taille_lot=TAILLE_LOT_RECALCUL, progression=None):
+    """
+    Recalcule les coûts des projets dont version_prix diffère de la version donnée
+    (tarif courant par défaut).
+
+    Chaque lot de taille_lot lignes (ordre des id) est mis à jour par une seule
+    requête UPDATE dans sa propre transaction. Un recalcul interrompu peut être
+    relancé: les lignes déjà à jour sont ignorées.
+    progression: callable optionnel (lignes_mises_a_jour) appelé après chaque lot.
+
+    Retourne un dict {version, lignes, lots, duree_s}.
+    """
+    with engine.connect() as conn:
+        tarif = _lire_tarif(conn, version)
+    if tarif is None:
+        raise ValueError(f"Tarif introuvable (version {version})")
+
+    debut = time.perf_counter()
+    parametres = dict(tarif, taille_lot=taille_lot, dernier_id=0)
+    lignes = 0
+    lots = 0
+    while True:
+        with engine.begin() as conn:
+            nombre, dernier_id = conn.execute(text(SQL_RECALCUL_LOT), parametres).one()
+        if not nombre:
+            break
+        lignes += nombre
+        lots += 1
+        parametres["dernier_id"] = dernier_id
+        if progression is not None:
+            progression(lignes)
+    duree = time.perf_counter() - debut
+    print(f"[PRIX] {lignes} projet(s) recalculé(s) avec le tarif version {tarif['version']} en {duree:.1f} s")
+    return {"version": tarif["version"], "lignes": lignes, "lots": lots, "duree_s": duree}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gestion des tarifs des matériaux")
+    commandes = parser.add_subparsers(dest="commande", required=True)
+    commandes.add_parser("liste", help="Afficher l'historique des tarifs")
+    publier = commandes.add_parser("publier", help="Publier un nouveau tarif")
+    publier.add_argument("--ciment", type=float, required=True, help="Prix du ciment (€/kg)")
+    publier.add_argument("--sable", type=float, required=True, help="Prix du sable (€/kg)")
+    publier.add_argument("--gravier", type=float, required=True, help="Prix du gravier (€/kg)")
+    publier.add_argument("--main-oeuvre", type=float, required=True, help="Coût de main-d'œuvre (€/m³)")
+    publier.add_argument("--commentaire", help="Description du tarif")
+    publier.add_argument("--recalculer", action="store_true", help="Recalculer ensuite les coûts de tous les projets")
+    recalculer = commandes.add_parser("recalculer", help="Recalculer les coûts des projets")
+    recalculer.add_argument("--version", type=int, help="Version du tarif (défaut: la plus récente)")
+    recalculer.add_argument("--taille-lot", type=int, default=TAILLE_LOT_RECALCUL,
+                            help=f"Lignes par transaction (défaut: {TAILLE_LOT_RECALCUL})")
+    args = parser.parse_args(argv)
+
+    from base_donnees import engine
+    from schema import table_existe
+
+    if not table_existe(engine, "prix_materiaux"):
+        print("❌ ERREUR: table prix_materiaux absente, appliquer d'abord les migrations (python migrations.py)")
+        return 1
+    with engine.begin() as conn:
+        inserer_tarif_initial(conn)
+
+    if args.commande == "liste":
+        for tarif in lister_prix(engine):
+            print(f"v{tarif['version']:>3}  {tarif['date_effet']:%Y-%m-%d %H:%M}  ciment {tarif['prix_ciment']} €/kg, "
+                  f"sable {tarif['prix_sable']} €/kg, gravier {tarif['prix_gravier']} €/kg, "
+                  f"main-d'œuvre {tarif['prix_main_oeuvre']} €/m³  {tarif['commentaire'] or ''}")
+        return 0
+
+    version = args.version if args.commande == "recalculer" else None
+    taille_lot = args.taille_lot if args.commande == "recalculer" else TAILLE_LOT_RECALCUL
+    if args.commande == "publier":
+        version = publier_prix(engine, args.ciment, args.sable, args.gravier, args.main_oeuvre, args.commentaire)
+        if not args.recalculer:
+            return 0
+
+    def afficher_progression(lignes):
+        print(f"💶 {lignes} projet(s) mis à jour")
+
+    recalculer_couts(engine, version, taille_lot, afficher_progression)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
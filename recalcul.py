@@ -0,0 +1,243 @@
+"""
+Recalcul en arrière-plan de toutes les colonnes dérivées de projets_beton
+
+À lancer après un changement de formule ou de constante du noyau
+(calculs_beton.py): les projets sont lus par un curseur côté serveur, recalculés
+par blocs avec le noyau vectorisé, puis réécrits avec un UPDATE ... FROM (VALUES ...)
+par bloc. Les coûts sont recalculés au tarif courant (prix.py).
+
+Chaque bloc est écrit dans sa propre transaction, avec le point de reprise
+(dernier id traité) dans la table recalculs_projets: après un redémarrage, le
+recalcul reprend au bloc suivant au lieu de repartir de zéro. Un verrou
+consultatif PostgreSQL garantit qu'un seul recalcul tourne à la fois.
+La table recalculs_projets est créée par les migrations (migrations.py, migration 3).
+
+Usage:
+    python recalcul.py                     (reprend le recalcul interrompu s'il existe)
+    python recalcul.py --depuis-le-debut --taille-bloc 20000
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+from sqlalchemy import text
+
+from calculs_beton import COLONNES_ENTREE, COLONNES_NUMERIQUES, COLONNES_CALCULEES, calculer_projets
+from prix import obtenir_prix
+
+NOM_TACHE = "recalcul_projets"
+TAILLE_BLOC = 20000
+
+# Clé du verrou consultatif (pg_try_advisory_lock) réservé au recalcul
+CLE_VERROU = 724001
+
+COLONNES_ECRITES = COLONNES_CALCULEES + ["version_prix"]
+SQL_MISE_A_JOUR = (
+    "UPDATE projets_beton AS p SET "
+    + ", ".join(f"{nom} = v.{nom}" for nom in COLONNES_ECRITES)
+    + " FROM (VALUES %s) AS v(id, " + ", ".join(COLONNES_ECRITES) + ") WHERE p.id = v.id"
+)
+MODELE_VALEURS = "(%s::integer, " + ", ".join(
+    "%s::integer" if nom in ("duree_projet_jours", "version_prix") else "%s::numeric"
+    for nom in COLONNES_ECRITES
+) + ")"
+
+# État du recalcul en cours dans ce processus (lu par l'interface)
+_etat = {"statut": "inactif", "lignes": 0, "total": 0, "ignorees": 0, "debit": 0.0, "message": ""}
+_verrou_etat = threading.Lock()
+_arret = threading.Event()
+_fil = None
+
+
+def etat_recalcul():
+    """Copie de l'état du recalcul {statut, lignes, total, ignorees, debit (lignes/s), message}"""
+    with _verrou_etat:
+        return dict(_etat)
+
+
+def _maj_etat(**valeurs):
+    with _verrou_etat:
+        _etat.update(valeurs)
+
+
+def _point_de_reprise(conn, reprendre):
+    """(dernier_id, lignes_traitees) de départ; enregistre le recalcul comme en cours"""
+    ligne = conn.execute(text(
+        "SELECT statut, dernier_id, lignes_traitees FROM recalculs_projets WHERE nom_tache = :nom"
+    ), {"nom": NOM_TACHE}).first()
+    if reprendre and ligne is not None and ligne.statut != "terminé":
+        dernier_id, lignes = ligne.dernier_id, ligne.lignes_traitees
+    else:
+        dernier_id, lignes = 0, 0
+    total = conn.execute(text("SELECT COUNT(*) FROM projets_beton WHERE id > :id"), {"id": dernier_id}).scalar()
+    conn.execute(text("""
+        INSERT INTO recalculs_projets (nom_tache, statut, dernier_id, lignes_traitees, total_lignes)
+        VALUES (:nom, 'en cours', :dernier_id, :lignes, :total)
+        ON CONFLICT (nom_tache) DO UPDATE SET
+            statut = 'en cours', dernier_id = EXCLUDED.dernier_id, lignes_traitees = EXCLUDED.lignes_traitees,
+            total_lignes = EXCLUDED.total_lignes, mise_a_jour = CURRENT_TIMESTAMP, message = NULL,
+            debut = CASE WHEN EXCLUDED.dernier_id = 0 THEN CURRENT_TIMESTAMP ELSE recalculs_projets.debut END
+    """), {"nom": NOM_TACHE, "dernier_id": dernier_id, "lignes": lignes, "total": lignes + total})
+    return dernier_id, lignes, lignes + total
+
+
+def _lignes_a_ecrire(bloc, tarif):
+    """Recalcule un bloc (DataFrame id + COLONNES_ENTREE) et retourne les tuples pour VALUES"""
+    calcule = calculer_projets(bloc, prix=tarif)[["id"] + COLONNES_CALCULEES]
+    calcule["version_prix"] = tarif["version"]
+    calcule = calcule.astype(object).where(calcule.notna(), None)
+    return list(calcule.itertuples(index=False, name=None))
+
+
+def recalculer_projets(engine, taille_bloc=TAILLE_BLOC, reprendre=True, progression=None):
+    """
+    Recalcule les colonnes dérivées de tous les projets, par blocs de taille_bloc lignes.
+
+    reprendre: repartir du point de reprise d'un recalcul non terminé (sinon depuis le début).
+    progression: callable optionnel (etat) appelé après chaque bloc.
+    Les projets dont une entrée est manquante (NULL) sont ignorés.
+
+    Retourne l'état final {statut, lignes, total, ignorees, debit, message}.
+    """
+    _arret.clear()
+    try:
+        return _recalculer(engine, taille_bloc, reprendre, progression)
+    except Exception as e:
+        # Base inaccessible avant le démarrage du recalcul
+        print(f"[RECALCUL] ❌ Erreur: {str(e)[:200]}")
+        _maj_etat(statut="erreur", message=str(e)[:200])
+        return etat_recalcul()
+
+
+def _recalculer(engine, taille_bloc, reprendre, progression):
+    tarif = obtenir_prix(engine)
+    debut = time.perf_counter()
+    with engine.connect() as lecture:
+        if not lecture.execute(text("SELECT pg_try_advisory_lock(:cle)"), {"cle": CLE_VERROU}).scalar():
+            _maj_etat(statut="erreur", message="Un recalcul est déjà en cours dans un autre processus")
+            return etat_recalcul()
+        try:
+            with engine.begin() as conn:
+                if not conn.execute(text("SELECT to_regclass('recalculs_projets') IS NOT NULL")).scalar():
+                    raise RuntimeError("Table recalculs_projets absente: appliquer d'abord les migrations "
+                                       "(python migrations.py)")
+                dernier_id, lignes, total = _point_de_reprise(conn, reprendre)
+            lecture.commit()
+            _maj_etat(statut="en cours", lignes=lignes, total=total, ignorees=0, debit=0.0,
+                      message=f"Reprise après l'id {dernier_id}" if dernier_id else "")
+            print(f"[RECALCUL] Début: {total - lignes} projet(s) à recalculer (après l'id {dernier_id})")
+
+            # Curseur côté serveur: seules taille_bloc lignes sont en mémoire à la fois
+            colonnes = ", ".join(
+                [f"CAST({nom} AS DOUBLE PRECISION) AS {nom}" if nom in COLONNES_NUMERIQUES else nom
+                 for nom in COLONNES_ENTREE]
+            )
+            resultat = lecture.execution_options(stream_results=True, max_row_buffer=taille_bloc).execute(
+                text(f"SELECT id, {colonnes} FROM projets_beton WHERE id > :id ORDER BY id"), {"id": dernier_id}
+            )
+            ignorees = 0
+            traitees_session = 0
+            for lignes_bloc in resultat.partitions(taille_bloc):
+                bloc = pd.DataFrame.from_records(lignes_bloc, columns=["id"] + COLONNES_ENTREE)
+                complet = bloc[COLONNES_ENTREE].notna().all(axis=1).to_numpy()
+                ignorees += int(np.count_nonzero(~complet))
+                valeurs = _lignes_a_ecrire(bloc[complet], tarif) if complet.any() else []
+                dernier_id = int(bloc["id"].iloc[-1])
+                lignes += len(bloc)
+                traitees_session += len(bloc)
+
+                # Mise à jour du bloc et point de reprise dans la même transaction
+                with engine.begin() as conn:
+                    if valeurs:
+                        curseur = conn.connection.dbapi_connection.cursor()
+                        try:
+                            execute_values(curseur, SQL_MISE_A_JOUR, valeurs, template=MODELE_VALEURS,
+                                           page_size=len(valeurs))
+                        finally:
+                            curseur.close()
+                    conn.execute(text("""
+                        UPDATE recalculs_projets SET dernier_id = :dernier_id, lignes_traitees = :lignes,
+                            mise_a_jour = CURRENT_TIMESTAMP
+                        WHERE nom_tache = :nom
+                    """), {"nom": NOM_TACHE, "dernier_id": dernier_id, "lignes": lignes})
+
+                _maj_etat(lignes=lignes, ignorees=ignorees,
+                          debit=traitees_session / max(time.perf_counter() - debut, 1e-9))
+                if progression is not None:
+                    progression(etat_recalcul())
+                if _arret.is_set():
+                    break
+            resultat.close()
+
+            statut = "interrompu" if _arret.is_set() else "terminé"
+            with engine.begin() as conn:
+                conn.execute(text("""
+                    UPDATE recalculs_projets SET statut = :statut, mise_a_jour = CURRENT_TIMESTAMP
+                    WHERE nom_tache = :nom
+                """), {"nom": NOM_TACHE, "statut": statut})
+            duree = time.perf_counter() - debut
+            message = f"{traitees_session} projet(s) traité(s) en {duree:.1f} s"
+            if ignorees:
+                message += f", {ignorees} ignoré(s) (valeurs manquantes)"
+            _maj_etat(statut=statut, message=message)
+            print(f"[RECALCUL] {statut.capitalize()}: {message}")
+        except Exception as e:
+            print(f"[RECALCUL] ❌ Erreur: {str(e)[:200]}")
+            _maj_etat(statut="erreur", message=str(e)[:200])
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text("""
+                        UPDATE recalculs_projets SET statut = 'erreur', message = :message,
+                            mise_a_jour = CURRENT_TIMESTAMP
+                        WHERE nom_tache = :nom
+                    """), {"nom": NOM_TACHE, "message": str(e)[:500]})
+            except Exception:
+                pass
+        finally:
+            lecture.rollback()
+            lecture.execute(text("SELECT pg_advisory_unlock(:cle)"), {"cle": CLE_VERROU})
+            lecture.commit()
+    return etat_recalcul()
+
+
+def lancer_recalcul(engine, taille_bloc=TAILLE_BLOC, reprendre=True):
+    """Lance le recalcul dans un thread d'arrière-plan; retourne False s'il tourne déjà"""
+    global _fil
+    if _fil is not None and _fil.is_alive():
+        return False
+    _maj_etat(statut="en cours", lignes=0, total=0, ignorees=0, debit=0.0, message="Démarrage...")
+    _fil = threading.Thread(target=recalculer_projets, args=(engine, taille_bloc, reprendre),
+                            name="recalcul-projets", daemon=True)
+    _fil.start()
+    return True
+
+
+def arreter_recalcul():
+    """Demande l'arrêt du recalcul après le bloc en cours (reprise possible plus tard)"""
+    _arret.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recalcul des colonnes dérivées de tous les projets")
+    parser.add_argument("--taille-bloc", type=int, default=TAILLE_BLOC,
+                        help=f"Lignes par bloc et par transaction (défaut: {TAILLE_BLOC})")
+    parser.add_argument("--depuis-le-debut", action="store_true",
+                        help="Ignorer le point de reprise d'un recalcul interrompu")
+    args = parser.parse_args(argv)
+
+    from base_donnees import engine
+
+    def afficher_progression(etat):
+        print(f"🔁 {etat['lignes']}/{etat['total']} projets ({etat['debit']:.0f} lignes/s)")
+
+    etat = recalculer_projets(engine, args.taille_bloc, not args.depuis_le_debut, afficher_progression)
+    return 0 if etat["statut"] == "terminé" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
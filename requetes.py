@@ -0,0 +1,294 @@
+"""
+Requêtes SQL paramétrées de l'application (lecture de projets_beton)
+
+Toutes les valeurs venant de l'interface sont passées en paramètres liés,
+jamais interpolées dans le texte SQL.
+
+Les résultats sont des DataFrame typés d'après le registre du schéma (lire_type):
+mesures NUMERIC en float32/float64 (lues en DOUBLE PRECISION, jamais en Decimal),
+textes à faible cardinalité en category.
+"""
+
+import datetime
+import os
+
+import pandas as pd
+from sqlalchemy import text
+
+from schema import table_existe, types_pandas
+
+# Liste des projets de l'onglet Consultation: taille de page (configurable)
+TAILLE_PAGE_PROJETS = int(os.getenv("TAILLE_PAGE_PROJETS", "50"))
+TAILLES_PAGE = sorted({25, 50, 100, 200, TAILLE_PAGE_PROJETS})
+
+COLONNES_LISTE = ["id", "nom_projet", "type_structure", "date_creation", "volume_beton_m3", "cout_total_eur"]
+
+# Colonnes texte à faible cardinalité, chargées en category
+COLONNES_CATEGORIELLES = ["type_structure", "forme_structure", "type_beton", "statut"]
+
+# Lignes converties à la fois par lire_type (curseur côté serveur)
+TAILLE_BLOC_LECTURE = 50000
+
+# Variables numériques de l'onglet Analyste: seules colonnes qui peuvent y être lues
+COLONNES_ANALYSE = [
+    "volume_beton_m3", "resistance_mpa", "charge_totale_kn", "cout_total_eur", "marge_securite",
+    "longueur_m", "largeur_m", "hauteur_m", "epaisseur_m",
+]
+
+
+def motif_recherche(recherche):
+    """Motif ILIKE « contient » avec les jokers % et _ de la saisie échappés"""
+    echappe = recherche.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{echappe}%"
+
+
+def selection_typee(engine, voulues):
+    """
+    Types pandas et expressions SELECT des colonnes voulues présentes dans projets_beton.
+
+    Les colonnes flottantes sont lues en DOUBLE PRECISION: le pilote renvoie des float, pas des Decimal.
+    """
+    types = types_pandas(engine, "projets_beton", voulues, COLONNES_CATEGORIELLES)
+    expressions = [
+        f"CAST({nom} AS DOUBLE PRECISION) AS {nom}" if type_colonne.startswith("float") else nom
+        for nom, type_colonne in types.items()
+    ]
+    return types, expressions
+
+
+def _cadre_type(lignes, types):
+    """DataFrame d'un bloc de lignes, colonnes converties (hors category, appliqué à la fin)"""
+    cadre = pd.DataFrame.from_records(lignes, columns=list(types))
+    return cadre.astype({nom: t for nom, t in types.items() if t != "category"})
+
+
+def lire_type(conn, requete, parametres, types, par_blocs=False):
+    """
+    Exécute une requête SELECT des colonnes de types et retourne un DataFrame typé.
+
+    par_blocs: lecture par un curseur côté serveur, TAILLE_BLOC_LECTURE lignes converties
+    à la fois (grands résultats: jamais toutes les lignes en objets Python en même temps).
+    """
+    if par_blocs:
+        resultat = conn.execution_options(stream_results=True, max_row_buffer=TAILLE_BLOC_LECTURE).execute(
+            text(requete), parametres
+        )
+        blocs = [_cadre_type(lignes, types) for lignes in resultat.partitions(TAILLE_BLOC_LECTURE)]
+    else:
+        blocs = [_cadre_type(conn.execute(text(requete), parametres).all(), types)]
+    cadre = pd.concat(blocs, ignore_index=True) if len(blocs) > 1 else (blocs[0] if blocs else _cadre_type([], types))
+    return cadre.astype({nom: t for nom, t in types.items() if t == "category"})
+
+
+def page_projets(engine, recherche="", apres=None, taille_page=TAILLE_PAGE_PROJETS):
+    """
+    Une page de projets, du plus récent au plus ancien.
+
+    Pagination par clé (date_creation, id): la page suivante reprend après le
+    dernier projet affiché, sans OFFSET, pour un coût constant quelle que soit la page.
+    recherche: texte contenu dans nom_projet (insensible à la casse).
+    apres: curseur (date_creation, id) du dernier projet de la page précédente.
+
+    Retourne (DataFrame COLONNES_LISTE, curseur de la page suivante ou None).
+    """
+    conditions = []
+    parametres = {"limite": taille_page + 1}
+    if recherche:
+        conditions.append("nom_projet ILIKE :motif")
+        parametres["motif"] = motif_recherche(recherche)
+    if apres is not None:
+        date_apres, id_apres = apres
+        parametres["id_apres"] = id_apres
+        if date_apres is None:
+            # Les projets sans date sont listés en dernier
+            conditions.append("(date_creation IS NULL AND id < :id_apres)")
+        else:
+            # (date_creation, id) < curseur, écrit avec une borne simple sur date_creation:
+            # sur une table partitionnée (partitions.py), seuls les mois antérieurs sont lus
+            conditions.append("((date_creation <= :date_apres AND (date_creation < :date_apres OR id < :id_apres))"
+                              " OR date_creation IS NULL)")
+            parametres["date_apres"] = date_apres
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    types, selection = selection_typee(engine, COLONNES_LISTE)
+
+    with engine.connect() as conn:
+        df = lire_type(conn, f"""
+            SELECT {', '.join(selection)}
+            FROM projets_beton
+            {where}
+            ORDER BY date_creation DESC NULLS LAST, id DESC
+            LIMIT :limite
+        """, parametres, types)
+    # Colonnes de résultats absentes des anciennes tables: vides
+    df = df.reindex(columns=COLONNES_LISTE)
+
+    suivant = None
+    if len(df) > taille_page:
+        df = df.iloc[:taille_page]
+        dernier = df.iloc[-1]
+        date_dernier = None if pd.isna(dernier["date_creation"]) else dernier["date_creation"]
+        suivant = (date_dernier, int(dernier["id"]))
+    return df, suivant
+
+
+def filtre_projets(type_structure="Tous", statut="Tous", date_debut=None, date_fin=None, recherche=""):
+    """
+    Conditions et paramètres liés d'un filtre de projets ("Tous" ou vide: pas de filtre).
+
+    date_debut, date_fin: dates (datetime.date) incluses, comparées à date_creation.
+    recherche: texte contenu dans nom_projet (insensible à la casse).
+    """
+    conditions, parametres = [], {}
+    if recherche:
+        conditions.append("nom_projet ILIKE :motif")
+        parametres["motif"] = motif_recherche(recherche)
+    if type_structure and type_structure != "Tous":
+        conditions.append("type_structure = :type_structure")
+        parametres["type_structure"] = type_structure
+    if statut and statut != "Tous":
+        conditions.append("statut = :statut")
+        parametres["statut"] = statut
+    if date_debut is not None:
+        conditions.append("date_creation >= :date_debut")
+        parametres["date_debut"] = date_debut
+    if date_fin is not None:
+        # Jour de fin inclus: avant minuit du lendemain
+        conditions.append("date_creation < :date_fin_exclue")
+        parametres["date_fin_exclue"] = date_fin + datetime.timedelta(days=1)
+    return conditions, parametres
+
+
+def _filtre_type(type_structure, date_debut=None, date_fin=None):
+    """Conditions et paramètres des filtres de l'onglet Analyste ("Tous", pas de dates: pas de filtre)"""
+    return filtre_projets(type_structure, date_debut=date_debut, date_fin=date_fin)
+
+
+def resume_projets(engine, type_structure="Tous", date_debut=None, date_fin=None):
+    """
+    Statistiques globales de l'onglet Analyste.
+
+    Lues dans la synthèse par type (resume_types.py): une ligne par type,
+    quelle que soit la taille de projets_beton; "Tous" additionne les types.
+    Sur une période, ou sans synthèse (migration non appliquée), agrégées sur
+    projets_beton (table partitionnée: seuls les mois de la période sont lus).
+    Retourne {n_projets, volume_total, cout_total, resistance_moyenne}.
+    """
+    conditions, parametres = _filtre_type(type_structure, date_debut, date_fin)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    if date_debut is None and date_fin is None and table_existe(engine, "resume_projets_type"):
+        requete = f"""
+            SELECT COALESCE(SUM(n_projets), 0) AS n_projets,
+                   COALESCE(SUM(volume_somme), 0) AS volume_total,
+                   COALESCE(SUM(cout_somme), 0) AS cout_total,
+                   COALESCE(SUM(resistance_somme) / NULLIF(SUM(resistance_n), 0), 0) AS resistance_moyenne
+            FROM resume_projets_type
+            {where}
+        """
+    else:
+        requete = f"""
+            SELECT COUNT(*) AS n_projets,
+                   COALESCE(SUM(volume_beton_m3), 0) AS volume_total,
+                   COALESCE(SUM(cout_total_eur), 0) AS cout_total,
+                   COALESCE(AVG(resistance_mpa), 0) AS resistance_moyenne
+            FROM projets_beton
+            {where}
+        """
+    with engine.connect() as conn:
+        ligne = conn.execute(text(requete), parametres).one()
+    return {
+        "n_projets": int(ligne.n_projets),
+        "volume_total": float(ligne.volume_total),
+        "cout_total": float(ligne.cout_total),
+        "resistance_moyenne": float(ligne.resistance_moyenne),
+    }
+
+
+def colonnes_analyse(engine, colonnes, type_structure="Tous", date_debut=None, date_fin=None):
+    """
+    Projets réduits aux colonnes demandées, pour les graphiques et corrélations.
+
+    Seules les colonnes de COLONNES_ANALYSE présentes dans la table sont lues,
+    en float32 ou float64 selon leur précision (lire_type, par blocs); les projets
+    ayant une valeur manquante sont exclus par la requête.
+    Retourne un DataFrame (vide si aucune colonne valide).
+    """
+    voulues = [nom for nom in dict.fromkeys(colonnes) if nom in COLONNES_ANALYSE]
+    types, selection = selection_typee(engine, voulues)
+    if not types:
+        return pd.DataFrame()
+    conditions, parametres = _filtre_type(type_structure, date_debut, date_fin)
+    conditions += [f"{nom} IS NOT NULL" for nom in types]
+    with engine.connect() as conn:
+        return lire_type(conn, f"""
+            SELECT {', '.join(selection)}
+            FROM projets_beton
+            WHERE {' AND '.join(conditions)}
+        """, parametres, types, par_blocs=True)
+
+
+def projets_par_ids(engine, ids):
+    """Projets insérés (liste d'id), avec les colonnes de la liste et de l'onglet Analyste"""
+    types, selection = selection_typee(engine, list(dict.fromkeys(COLONNES_LISTE + COLONNES_ANALYSE)))
+    with engine.connect() as conn:
+        return lire_type(conn, f"""
+            SELECT {', '.join(selection)}
+            FROM projets_beton
+            WHERE id = ANY(:ids)
+        """, {"ids": list(ids)}, types)
+
+
+def _cle_tri(date_creation, id_projet):
+    """Clé croissante dans l'ordre inverse de la liste (date_creation DESC NULLS LAST, id DESC)"""
+    return (0, 0, id_projet) if pd.isna(date_creation) else (1, pd.Timestamp(date_creation), id_projet)
+
+
+def inserer_dans_page(page, lignes, recherche="", apres=None, taille_page=TAILLE_PAGE_PROJETS):
+    """
+    Page de projets (résultat de page_projets) mise à jour avec des projets insérés.
+
+    Retourne la page à jour, ou None si elle doit être relue en base.
+    """
+    df, suivant = page
+    if not set(COLONNES_LISTE) <= set(lignes.columns):
+        return None
+    if recherche:
+        lignes = lignes[lignes["nom_projet"].str.contains(recherche, case=False, regex=False, na=False)]
+    if lignes.empty:
+        return page
+    if apres is not None:
+        # Pages suivantes: inchangées tant que les nouveaux projets sont listés avant le curseur
+        curseur = _cle_tri(*apres)
+        if all(_cle_tri(d, i) > curseur for d, i in zip(lignes["date_creation"], lignes["id"])):
+            return page
+        return None
+    fusion = pd.concat([lignes[COLONNES_LISTE], df]) if not df.empty else lignes[COLONNES_LISTE]
+    fusion = fusion.drop_duplicates("id")
+    ordre = sorted(range(len(fusion)), reverse=True,
+                   key=lambda k: _cle_tri(fusion["date_creation"].iloc[k], fusion["id"].iloc[k]))
+    fusion = fusion.iloc[ordre]
+    if len(fusion) > taille_page or suivant is not None:
+        fusion = fusion.iloc[:taille_page]
+        dernier = fusion.iloc[-1]
+        date_dernier = None if pd.isna(dernier["date_creation"]) else dernier["date_creation"]
+        suivant = (date_dernier, int(dernier["id"]))
+    return fusion.reset_index(drop=True), suivant
+
+
+def inserer_dans_colonnes(df, lignes, type_structure="Tous", date_debut=None, date_fin=None):
+    """
+    Colonnes analysées (résultat de colonnes_analyse) complétées par des projets insérés.
+
+    Retourne le DataFrame à jour, ou None s'il doit être relu en base.
+    """
+    if df.columns.empty or not set(df.columns) <= set(lignes.columns):
+        return None
+    if type_structure and type_structure != "Tous":
+        lignes = lignes[lignes["type_structure"] == type_structure]
+    if date_debut is not None:
+        lignes = lignes[lignes["date_creation"] >= pd.Timestamp(date_debut)]
+    if date_fin is not None:
+        lignes = lignes[lignes["date_creation"] < pd.Timestamp(date_fin + datetime.timedelta(days=1))]
+    lignes = lignes[list(df.columns)].dropna().astype(df.dtypes.to_dict())
+    if lignes.empty:
+        return df
+    return pd.concat([df, lignes], ignore_index=True)
@@ -0,0 +1,77 @@
+"""
+Table de synthèse de projets_beton par type de structure
+
+resume_projets_type garde, pour chaque type_structure, le nombre de projets et,
+pour le volume, le coût et la résistance, le nombre de valeurs renseignées,
+leur somme et la somme de leurs carrés (moyennes et écarts-types sans relire
+les projets). Elle est tenue à jour par des triggers de niveau instruction sur
+projets_beton (tables de transition): un import de 100 000 lignes met à jour
+une ligne par type, pas une ligne par projet.
+
+Les statistiques de l'onglet Analyste sont lues ici (requetes.resume_projets):
+le coût est le même quelle que soit la taille de projets_beton; "Tous" est
+l'agrégat des lignes par type.
+
+Usage:
+    python resume_types.py            (reconstruit la table depuis projets_beton)
+"""
+
+import sys
+
+from sqlalchemy import text
+
+# (colonne de projets_beton, préfixe des colonnes de synthèse)
+MESURES = [("volume_beton_m3", "volume"), ("cout_total_eur", "cout"), ("resistance_mpa", "resistance")]
+
+_COLONNES = ["n_projets"] + [f"{prefixe}_{suffixe}" for _, prefixe in MESURES for suffixe in ("n", "somme", "carres")]
+
+
+def _agregats(source, signe):
+    """SELECT des agrégats par type d'une table de transition (signe: '' ou '-')"""
+    expressions = ["COUNT(*)"]
+    for colonne, _ in MESURES:
+        expressions += [f"COUNT({colonne})", f"COALESCE(SUM({colonne}), 0)",
+                        f"COALESCE(SUM({colonne} * {colonne}), 0)"]
+    return (f"SELECT type_structure, {', '.join(signe + e for e in expressions)} "
+            f"FROM {source} GROUP BY type_structure ORDER BY type_structure")
+
+
+def _cumul(source, signe):
+    """Ajoute (ou retire) les agrégats d'une table de transition à la synthèse"""
+    return (f"INSERT INTO resume_projets_type AS r (type_structure, {', '.join(_COLONNES)}) "
+            f"{_agregats(source, signe)} "
+            f"ON CONFLICT (type_structure) DO UPDATE SET "
+            + ", ".join(f"{nom} = r.{nom} + EXCLUDED.{nom}" for nom in _COLONNES))
+
+
+# Remplissage complet (écritures bloquées pendant le calcul); table et triggers trg_resume_*: migration 9
+# (migrations.py)
+SQL_RECONSTRUCTION = f"""
+LOCK TABLE projets_beton IN SHARE MODE;
+DELETE FROM resume_projets_type;
+{_cumul('projets_beton', '')};
+"""
+
+
+def reconstruire_resume(conn):
+    """Recalcule entièrement la synthèse depuis projets_beton (les triggers doivent exister)"""
+    conn.execute(text(SQL_RECONSTRUCTION))
+
+
+def retirer_resume(conn, source):
+    """Retire de la synthèse les projets d'une table détachée de projets_beton (partition archivée)"""
+    conn.execute(text(_cumul(source, "-")))
+
+
+def main(argv=None):
+    from base_donnees import engine
+
+    with engine.begin() as conn:
+        reconstruire_resume(conn)
+        n_types = conn.execute(text("SELECT COUNT(*) FROM resume_projets_type")).scalar()
+    print(f"✅ Synthèse reconstruite: {n_types} type(s) de structure")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Registre du schéma de la base, partagé par tout le processus
+
+Les colonnes de toutes les tables du schéma courant sont lues une seule fois
+(une requête sur information_schema.columns) puis servies depuis la mémoire.
+Le registre est rechargé après l'application de migrations (migrations.py) ou
+sur invalidation explicite (invalider_schema), jamais à chaque requête.
+
+Il fournit aussi le type pandas de chaque colonne (types_pandas): NUMERIC lu en
+float32 quand sa précision le permet (float64 sinon), entiers en entiers
+nullables, textes listés en category; ni Decimal ni colonnes object pour les mesures.
+"""
+
+import threading
+
+from sqlalchemy import text
+
+# NUMERIC(p, s) avec p <= PRECISION_FLOAT32 chiffres significatifs survit à un aller-retour float32 (FLT_DIG)
+PRECISION_FLOAT32 = 6
+
+_registre = {"tables": None}
+_verrou = threading.Lock()
+
+
+def charger_schema(engine):
+    """Lit les colonnes de toutes les tables du schéma courant et remplace le registre"""
+    with engine.connect() as conn:
+        lignes = conn.execute(text("""
+            SELECT table_name, column_name, data_type, numeric_precision
+            FROM information_schema.columns
+            WHERE table_schema = current_schema()
+            ORDER BY table_name, ordinal_position
+        """)).all()
+    tables = {}
+    for table, colonne, type_donnee, precision in lignes:
+        tables.setdefault(table, {})[colonne] = (type_donnee, precision)
+    with _verrou:
+        _registre["tables"] = tables
+    print(f"[SCHEMA] Registre chargé: {len(tables)} table(s)")
+    return tables
+
+
+def _tables(engine):
+    with _verrou:
+        tables = _registre["tables"]
+    return tables if tables is not None else charger_schema(engine)
+
+
+def invalider_schema():
+    """Vide le registre: il sera relu à la prochaine consultation"""
+    with _verrou:
+        _registre["tables"] = None
+
+
+def table_existe(engine, table):
+    """True si la table existe dans le schéma courant"""
+    return table in _tables(engine)
+
+
+def colonnes(engine, table):
+    """Colonnes d'une table {nom: type}, dans l'ordre de la table (dict vide si absente)"""
+    return {nom: type_donnee for nom, (type_donnee, _) in _tables(engine).get(table, {}).items()}
+
+
+def colonnes_presentes(engine, table, voulues):
+    """Sous-liste des colonnes voulues qui existent dans la table (ordre conservé)"""
+    existantes = _tables(engine).get(table, {})
+    return [nom for nom in voulues if nom in existantes]
+
+
+def type_pandas(type_donnee, precision, categorielle=False):
+    """Type pandas d'une colonne PostgreSQL (data_type, numeric_precision d'information_schema)"""
+    if type_donnee == "numeric":
+        return "float32" if precision is not None and precision <= PRECISION_FLOAT32 else "float64"
+    if type_donnee in ("real", "double precision"):
+        return "float32" if type_donnee == "real" else "float64"
+    if type_donnee in ("smallint", "integer"):
+        return "Int32"
+    if type_donnee == "bigint":
+        return "Int64"
+    if type_donnee.startswith("timestamp") or type_donnee == "date":
+        return "datetime64[ns]"
+    return "category" if categorielle else "object"
+
+
+def types_pandas(engine, table, voulues, categorielles=()):
+    """{colonne: type pandas} des colonnes voulues présentes dans la table (ordre conservé)"""
+    existantes = _tables(engine).get(table, {})
+    return {
+        nom: type_pandas(*existantes[nom], categorielle=nom in categorielles)
+        for nom in voulues if nom in existantes
+    }
@@ -0,0 +1,117 @@
+"""
+File d'écriture groupée des projets soumis depuis l'onglet Ingénieur
+
+Lors des campagnes de relevés, des dizaines de sessions enregistrent un projet
+au même moment: une transaction et un aller-retour par projet saturent le pool
+de connexions. soumettre_projet dépose le projet dans une file commune au
+processus; une tâche unique prend jusqu'à TAILLE_LOT_SOUMISSIONS projets et les
+insère en une seule instruction INSERT multi-lignes (enregistrer_projets), dans
+une seule transaction. Chaque session reçoit l'id de son propre projet.
+
+Groupage: une soumission seule (file vide derrière elle) est écrite aussitôt; si
+d'autres attendent déjà, la tâche attend DELAI_GROUPAGE_MS pour compléter le lot.
+Pendant l'écriture d'un lot, les soumissions suivantes s'accumulent dans la file
+et forment le lot suivant.
+
+Contre-pression: la file contient au plus CAPACITE_FILE projets; au-delà, une
+soumission attend une place au plus ATTENTE_MAX_S puis échoue (message à
+l'utilisateur) au lieu d'accumuler sans limite. Latence bornée: un projet est
+écrit au plus DELAI_GROUPAGE_MS après la première soumission du lot, plus la
+durée de l'écriture (elle-même bornée par statement_timeout).
+
+Si l'insertion d'un lot est refusée pour ses données (DataError, IntegrityError:
+un projet invalide), ses projets sont réécrits un par un: seule la session
+concernée reçoit l'erreur. Toute autre erreur (connexion, délai dépassé) est
+transmise à toutes les sessions du lot, sans nouvel essai.
+"""
+
+import asyncio
+import os
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+from base_donnees import enregistrer_projet, enregistrer_projets, executer_db
+
+DELAI_GROUPAGE_MS = float(os.getenv("SOUMISSIONS_DELAI_MS", "5"))
+TAILLE_LOT_SOUMISSIONS = int(os.getenv("SOUMISSIONS_TAILLE_LOT", "500"))
+CAPACITE_FILE = int(os.getenv("SOUMISSIONS_CAPACITE", "2000"))
+ATTENTE_MAX_S = float(os.getenv("SOUMISSIONS_ATTENTE_MAX_S", "10"))
+
+# File et tâche d'écriture de la boucle d'événements courante, compteurs pour les benchmarks
+_etat = {"boucle": None, "file": None, "tache": None, "lots": 0, "projets": 0}
+
+
+async def _ecrire_lot(lot):
+    """Insère un lot en une transaction, ou projet par projet si un projet du lot est refusé"""
+    try:
+        ids = await executer_db(enregistrer_projets, [valeurs for valeurs, _ in lot])
+        resultats = [(nouvel_id, None) for nouvel_id in ids]
+    except (DataError, IntegrityError) as e:
+        if len(lot) == 1:
+            resultats = [(None, e)]
+        else:
+            print(f"[SOUMISSIONS] ⚠️ Lot de {len(lot)} projet(s) refusé, enregistrement un par un: {str(e)[:150]}")
+            resultats = []
+            for valeurs, _ in lot:
+                try:
+                    resultats.append((await executer_db(enregistrer_projet, valeurs), None))
+                except Exception as erreur:
+                    resultats.append((None, erreur))
+    _etat["lots"] += 1
+    _etat["projets"] += len(lot)
+    for (_, futur), (nouvel_id, erreur) in zip(lot, resultats):
+        if futur.done():
+            continue  # session terminée entre-temps
+        if erreur is None:
+            futur.set_result(nouvel_id)
+        else:
+            futur.set_exception(erreur)
+
+
+async def _vider(file):
+    """Tâche d'écriture: un lot à la fois, regroupant les soumissions arrivées pendant le délai"""
+    while True:
+        lot = [await file.get()]
+        if 0 < file.qsize() < TAILLE_LOT_SOUMISSIONS - 1:
+            # D'autres soumissions arrivent: attendre de quoi compléter le lot
+            await asyncio.sleep(DELAI_GROUPAGE_MS / 1000)
+        while len(lot) < TAILLE_LOT_SOUMISSIONS and not file.empty():
+            lot.append(file.get_nowait())
+        try:
+            await _ecrire_lot(lot)
+        except Exception as e:
+            print(f"[SOUMISSIONS] ❌ Lot de {len(lot)} projet(s) non enregistré: {str(e)[:150]}")
+            for _, futur in lot:
+                if not futur.done():
+                    futur.set_exception(e)
+
+
+def _file_courante():
+    """File de la boucle courante, créée (avec sa tâche d'écriture) au premier appel"""
+    boucle = asyncio.get_running_loop()
+    if _etat["boucle"] is not boucle or _etat["tache"].done():
+        _etat["boucle"] = boucle
+        _etat["file"] = asyncio.Queue(maxsize=CAPACITE_FILE)
+        _etat["tache"] = boucle.create_task(_vider(_etat["file"]))
+    return _etat["file"]
+
+
+async def soumettre_projet(valeurs):
+    """
+    Enregistre un projet (dict {colonne: valeur}) via la file groupée et retourne son id.
+
+    Même contrat que executer_db(enregistrer_projet, valeurs); lève RuntimeError si
+    la file reste pleine plus de ATTENTE_MAX_S secondes.
+    """
+    file = _file_courante()
+    futur = asyncio.get_running_loop().create_future()
+    try:
+        await asyncio.wait_for(file.put((valeurs, futur)), ATTENTE_MAX_S)
+    except asyncio.TimeoutError:
+        raise RuntimeError(f"Trop d'enregistrements en attente ({CAPACITE_FILE}), réessayez dans un instant") from None
+    return await futur
+
+
+def statistiques():
+    """Nombre de lots écrits et de projets enregistrés par la file depuis le démarrage"""
+    return {"lots": _etat["lots"], "projets": _etat["projets"]}
@@ -0,0 +1,46 @@
+"""
+Configuration pytest: les modules de l'application sont à la racine du dépôt.
+
+Les tests marqués par la fixture base_test utilisent un PostgreSQL de test
+(TEST_DATABASE_URL), dans un schéma temporaire supprimé à la fin; ils sont
+ignorés si la variable n'est pas définie.
+"""
+
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL and TEST_DATABASE_URL.startswith("postgresql://"):
+    TEST_DATABASE_URL = TEST_DATABASE_URL.replace("postgresql://", "postgresql+psycopg2://", 1)
+
+
+@pytest.fixture
+def base_test():
+    """Engine dont le search_path est un schéma vide contenant projets_beton (base_donnees.metadata)"""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL non définie")
+    from sqlalchemy import create_engine, text
+
+    from base_donnees import metadata
+    from schema import invalider_schema
+
+    schema_test = f"test_{uuid.uuid4().hex[:12]}"
+    administration = create_engine(TEST_DATABASE_URL)
+    with administration.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {schema_test}"))
+    engine = create_engine(TEST_DATABASE_URL, connect_args={"options": f"-c search_path={schema_test}"})
+    metadata.create_all(engine)
+    invalider_schema()
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+        invalider_schema()
+        with administration.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema_test} CASCADE"))
+        administration.dispose()
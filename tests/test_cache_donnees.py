@@ -0,0 +1,52 @@
+"""Cache partagé des lectures (cache_donnees.py)"""
+
+import threading
+
+import pytest
+
+import cache_donnees
+from cache_donnees import appliquer_insertions, etat_cache, lire_en_cache, marquer_ecoute, nouvelle_version
+
+
+@pytest.fixture(autouse=True)
+def cache_actif():
+    marquer_ecoute(True)
+    nouvelle_version()
+    yield
+    nouvelle_version()
+    marquer_ecoute(False)
+
+
+def test_insertion_fusionnee_sans_relire():
+    lectures = []
+
+    def charger():
+        lectures.append(1)
+        return (1, 2)
+
+    assert lire_en_cache("liste", charger, insertion=lambda valeur, lignes: valeur + tuple(lignes)) == (1, 2)
+    lire_en_cache("autre", lambda: "sans insertion")
+    appliquer_insertions([3])
+    assert lire_en_cache("liste", charger) == (1, 2, 3)
+    assert len(lectures) == 1
+    assert etat_cache()["entrees"] == 1  # "autre" évincée
+
+
+def test_fusion_hors_du_verrou():
+    """Une lecture du cache pendant une fusion n'attend pas sa fin: elle lit la base"""
+    debut_fusion, fin_fusion = threading.Event(), threading.Event()
+
+    def inserer(valeur, lignes):
+        debut_fusion.set()
+        assert fin_fusion.wait(5)
+        return valeur + lignes
+
+    lire_en_cache("liste", lambda: [1], insertion=inserer)
+    fil = threading.Thread(target=appliquer_insertions, args=([2],))
+    fil.start()
+    assert debut_fusion.wait(5)
+    assert not cache_donnees._verrou.locked()
+    assert lire_en_cache("autre", lambda: "lu en base") == "lu en base"
+    fin_fusion.set()
+    fil.join(5)
+    assert lire_en_cache("liste", lambda: pytest.fail("relecture inutile")) == [1, 2]
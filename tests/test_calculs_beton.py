@@ -0,0 +1,129 @@
+"""
+Le noyau vectorisé (calculs_beton.calculer_colonnes) reproduit le calcul
+historique de handle_submission, formule par formule.
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from calculs_beton import (
+    COLONNES_CALCULEES, COLONNES_ENTREE, FORMES_STRUCTURE, MODULE_ELASTICITE_BETON,
+    PRIX_CIMENT, PRIX_GRAVIER, PRIX_MAIN_OEUVRE, PRIX_SABLE, RENDEMENT_MAIN_OEUVRE,
+    arrondir_resultat, calculer_colonnes, calculer_projet,
+)
+
+TYPES = ["Bâtiment", "Pont", "Route", "Fondation", "Barrage"]
+
+
+def calcul_historique(v):
+    """Arithmétique de handle_submission avant l'extraction du noyau (un projet à la fois)"""
+    longueur, largeur, hauteur, epaisseur = v["longueur_m"], v["largeur_m"], v["hauteur_m"], v["epaisseur_m"]
+    if v["forme_structure"] == "Rectangulaire":
+        volume_beton = longueur * largeur * epaisseur
+    elif v["forme_structure"] == "Circulaire":
+        rayon = longueur / 2
+        volume_beton = np.pi * (rayon ** 2) * epaisseur
+    elif v["forme_structure"] == "Trapézoïdale":
+        volume_beton = ((longueur + largeur) / 2) * largeur * epaisseur
+    else:
+        volume_beton = longueur * largeur * epaisseur * 0.8
+
+    quantite_ciment = volume_beton * v["dosage_ciment_kg_m3"]
+    quantite_eau = volume_beton * v["dosage_eau_kg_m3"]
+    quantite_sable = volume_beton * v["dosage_sable_kg_m3"]
+    quantite_gravier = volume_beton * v["dosage_gravier_kg_m3"]
+    charge_totale = (v["charge_statique_kn"] + v["charge_dynamique_kn"] + v["charge_vent_kn"]
+                     + v["charge_neige_kn"] + v["charge_seisme_kn"])
+    surface_m2 = longueur * largeur
+    contrainte_mpa = (charge_totale * 1000) / (surface_m2 * 1000000) if surface_m2 > 0 else 0
+    resistance = v["resistance_mpa"]
+    marge_securite = resistance / contrainte_mpa if contrainte_mpa > 0 else 999
+
+    cout_ciment = quantite_ciment * PRIX_CIMENT
+    cout_sable = quantite_sable * PRIX_SABLE
+    cout_gravier = quantite_gravier * PRIX_GRAVIER
+    cout_main_oeuvre = volume_beton * PRIX_MAIN_OEUVRE
+    cout_materiaux = cout_ciment + cout_sable + cout_gravier
+    duree_projet_jours = max(1, int(np.ceil(volume_beton / RENDEMENT_MAIN_OEUVRE)))
+
+    if v["type_structure"] in ["Bâtiment", "Fondation"]:
+        largeur_poutre, hauteur_poutre, largeur_colonne = max(0.2, epaisseur * 1.5), max(0.3, epaisseur * 2), \
+            max(0.3, epaisseur * 1.5)
+    else:
+        largeur_poutre, hauteur_poutre, largeur_colonne = max(0.3, epaisseur * 2), max(0.5, epaisseur * 3), \
+            max(0.4, epaisseur * 2)
+    facteur = 0.85 if v["forme_structure"] == "Rectangulaire" else 0.75
+    resistance_structure = resistance * facteur * (1 / v["coefficient_securite"])
+    if contrainte_mpa > 0:
+        deformation = contrainte_mpa / MODULE_ELASTICITE_BETON
+        deplacement_mm = deformation * max(longueur, largeur, hauteur) * 1000
+    else:
+        deformation = deplacement_mm = 0
+
+    return {
+        "volume_beton_m3": volume_beton,
+        "quantite_ciment_kg": quantite_ciment,
+        "quantite_eau_kg": quantite_eau,
+        "quantite_sable_kg": quantite_sable,
+        "quantite_gravier_kg": quantite_gravier,
+        "cout_ciment_eur": cout_ciment,
+        "cout_sable_eur": cout_sable,
+        "cout_gravier_eur": cout_gravier,
+        "cout_main_oeuvre_eur": cout_main_oeuvre,
+        "cout_total_eur": cout_materiaux + cout_main_oeuvre,
+        "charge_totale_kn": charge_totale,
+        "contrainte_mpa": contrainte_mpa,
+        "marge_securite": marge_securite,
+        "duree_projet_jours": duree_projet_jours,
+        "largeur_poutre_m": largeur_poutre,
+        "hauteur_poutre_m": hauteur_poutre,
+        "largeur_colonne_m": largeur_colonne,
+        "epaisseur_dalle_m": epaisseur,
+        "resistance_structure_mpa": resistance_structure,
+        "deformation": deformation,
+        "deplacement_mm": deplacement_mm,
+        "cout_materiaux_eur": cout_materiaux,
+    }
+
+
+def projet(type_structure, forme_structure, **autres):
+    valeurs = {
+        "type_structure": type_structure, "forme_structure": forme_structure,
+        "longueur_m": 12.5, "largeur_m": 8.0, "hauteur_m": 3.2, "epaisseur_m": 0.25,
+        "charge_statique_kn": 5000.0, "charge_dynamique_kn": 800.0, "charge_vent_kn": 120.0,
+        "charge_neige_kn": 60.0, "charge_seisme_kn": 40.0, "resistance_mpa": 30.0,
+        "coefficient_securite": 1.5, "dosage_ciment_kg_m3": 350.0, "dosage_eau_kg_m3": 175.0,
+        "dosage_sable_kg_m3": 700.0, "dosage_gravier_kg_m3": 1100.0,
+    }
+    valeurs.update(autres)
+    return valeurs
+
+
+CAS = [projet(t, f) for t, f in itertools.product(TYPES, FORMES_STRUCTURE)] + [
+    projet("Pont", "Rectangulaire", charge_statique_kn=0.0, charge_dynamique_kn=0.0, charge_vent_kn=0.0,
+           charge_neige_kn=0.0, charge_seisme_kn=0.0),  # aucune contrainte: marge 999
+    projet("Bâtiment", "Circulaire", epaisseur_m=0.05, longueur_m=0.1, largeur_m=0.1),  # minimums
+    projet("Barrage", "Trapézoïdale", epaisseur_m=5.0, longueur_m=1000.0, largeur_m=300.0, hauteur_m=500.0),
+]
+
+
+@pytest.mark.parametrize("valeurs", CAS)
+def test_projet_identique_au_calcul_historique(valeurs):
+    attendu = calcul_historique(valeurs)
+    obtenu = calculer_projet(valeurs)
+    assert set(obtenu) == set(COLONNES_CALCULEES)
+    for nom in COLONNES_CALCULEES:
+        assert obtenu[nom] == pytest.approx(attendu[nom], rel=1e-12, abs=1e-12), nom
+    # Valeurs stockées en base: mêmes arrondis
+    assert arrondir_resultat(obtenu) == pytest.approx(arrondir_resultat(attendu), abs=1e-9)
+
+
+def test_lot_vectorise_identique_projet_par_projet():
+    colonnes = {nom: np.array([cas[nom] for cas in CAS]) for nom in COLONNES_ENTREE}
+    resultats = calculer_colonnes(colonnes)
+    for i, cas in enumerate(CAS):
+        attendu = calcul_historique(cas)
+        for nom in COLONNES_CALCULEES:
+            assert resultats[nom][i] == pytest.approx(attendu[nom], rel=1e-12, abs=1e-12), (i, nom)
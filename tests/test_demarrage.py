@@ -0,0 +1,34 @@
+"""Démarrage non bloquant et point /ready (demarrage.py)"""
+
+import asyncio
+
+import pytest
+
+import demarrage
+
+
+@pytest.fixture(autouse=True)
+def etat_initial(monkeypatch):
+    monkeypatch.setattr(demarrage, "SYNCHRONE", True)  # un seul essai, dans le fil du test
+    demarrage._maj_etat(pret=False, etape="démarrage", tentatives=0, erreur=None, base_prete_s=None)
+
+
+def statut_pret():
+    return asyncio.run(demarrage.point_pret(None)).status_code
+
+
+def test_migration_en_echec_pas_prete():
+    def initialisation():
+        raise RuntimeError("migration 9 en échec")
+
+    demarrage.lancer_initialisation(initialisation)
+    etat = demarrage.etat_demarrage()
+    assert not etat["pret"]
+    assert "migration 9" in etat["erreur"]
+    assert statut_pret() == 503
+
+
+def test_base_prete():
+    demarrage.lancer_initialisation(lambda: True)
+    assert demarrage.etat_demarrage()["pret"]
+    assert statut_pret() == 200
@@ -0,0 +1,68 @@
+"""Balayage de l'espace de conception et front de Pareto (exploration.py)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import exploration
+from calculs_beton import calculer_colonnes
+from exploration import balayer, front_pareto, iterer_grille, taille_grille
+
+BASE = {
+    "type_structure": "Bâtiment", "forme_structure": "Rectangulaire",
+    "longueur_m": 10.0, "largeur_m": 5.0, "hauteur_m": 3.0, "epaisseur_m": 0.2,
+    "charge_statique_kn": 20000.0, "charge_dynamique_kn": 5000.0, "charge_vent_kn": 1000.0,
+    "charge_neige_kn": 500.0, "charge_seisme_kn": 0.0, "resistance_mpa": 30.0, "coefficient_securite": 1.5,
+    "dosage_ciment_kg_m3": 350.0, "dosage_eau_kg_m3": 175.0, "dosage_sable_kg_m3": 700.0,
+    "dosage_gravier_kg_m3": 1100.0,
+}
+
+PLAGES = {
+    "epaisseur_m": (0.1, 0.5, 3),
+    "resistance_mpa": (20, 60, 4),
+    "dosage_ciment_kg_m3": (300, 450, 3),
+    "dosage_eau_kg_m3": (150, 200, 2),
+}
+
+
+def dernier_etat(**options):
+    etat = None
+    for etat in balayer(BASE, PLAGES, **options):
+        pass
+    return etat
+
+
+def test_front_pareto_egalites_et_doublons():
+    cout = [10, 10, 12, 8, 8, 15, 12]
+    marge = [2, 3, 3, 1, 1, 5, 4]
+    # (8, 1) en double: un seul conservé; (10, 2) et (12, 3) dominés à coût égal
+    assert front_pareto(cout, marge).tolist() == [3, 1, 6, 5]
+    assert front_pareto([], []).tolist() == []
+
+
+def test_balayage_par_blocs_identique_a_une_passe():
+    total = taille_grille(PLAGES)
+    par_blocs, en_une_passe = dernier_etat(taille_bloc=7), dernier_etat(taille_bloc=total)
+    assert par_blocs["evalues"] == en_une_passe["evalues"] == total
+    assert par_blocs["conformes"] == en_une_passe["conformes"]
+    pd.testing.assert_frame_equal(par_blocs["front"], en_une_passe["front"])
+
+    # Référence: front calculé directement sur toute la grille
+    (grille,) = iterer_grille(BASE, PLAGES, total)
+    resultats = calculer_colonnes(grille)
+    attendu = front_pareto(resultats["cout_total_eur"], resultats["marge_securite"])
+    assert sorted(par_blocs["front"]["cout_total_eur"]) == sorted(resultats["cout_total_eur"][attendu])
+
+
+@pytest.mark.parametrize("graine", range(10))
+def test_echantillon_borne(monkeypatch, graine):
+    monkeypatch.setattr(exploration, "TAILLE_ECHANTILLON", 20)
+    etat = dernier_etat(taille_bloc=5, graine=graine)
+    assert len(etat["echantillon"]) <= 20
+    assert set(etat["echantillon"].columns) == set(etat["front"].columns)
+
+
+def test_petite_grille_entierement_echantillonnee():
+    etat = dernier_etat(taille_bloc=10)
+    assert len(etat["echantillon"]) == taille_grille(PLAGES)
+    assert np.isin(etat["front"]["cout_total_eur"], etat["echantillon"]["cout_total_eur"]).all()
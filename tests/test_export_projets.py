@@ -0,0 +1,44 @@
+"""Instantanés d'export Parquet (export_projets.exporter_projets)"""
+
+import os
+
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy import text
+
+import export_projets
+from export_projets import exporter_projets
+from migrations import appliquer_migrations
+
+
+@pytest.fixture
+def base_versionnee(base_test, tmp_path, monkeypatch):
+    monkeypatch.setattr(export_projets, "DOSSIER_EXPORTS", str(tmp_path))
+    appliquer_migrations(base_test)  # versions_tables et son trigger
+    inserer(base_test, "A")
+    return base_test
+
+
+def inserer(engine, nom):
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO projets_beton (nom_projet, type_structure) VALUES (:nom, 'Pont')"),
+                     {"nom": nom})
+
+
+def test_instantane_reutilise_tant_que_la_table_ne_change_pas(base_versionnee):
+    premier = exporter_projets(base_versionnee)
+    second = exporter_projets(base_versionnee)
+    assert (premier["reutilise"], second["reutilise"]) == (False, True)
+    assert second["chemin"] == premier["chemin"] and premier["lignes"] == 1
+
+
+def test_instantane_ouvert_survit_a_la_purge(base_versionnee):
+    """Un instantané retourné ouvert reste lisible quand une nouvelle version supprime l'ancien fichier"""
+    exporter_projets(base_versionnee)
+    reutilise = exporter_projets(base_versionnee, ouvrir=True)
+    inserer(base_versionnee, "B")
+    nouveau = exporter_projets(base_versionnee, ouvrir=True)
+    assert not os.path.exists(reutilise["chemin"])
+    with reutilise["fichier"] as ancien, nouveau["fichier"] as courant:
+        assert pq.read_table(ancien).num_rows == 1
+        assert pq.read_table(courant).num_rows == 2
@@ -0,0 +1,53 @@
+"""Statistiques de la marge de sécurité Monte Carlo (fiabilite.py)"""
+
+import math
+
+import numpy as np
+import pytest
+
+from calculs_beton import MARGE_SANS_CONTRAINTE
+from fiabilite import combiner, combiner_moments, simuler_bloc
+
+BASE = {
+    "charge_statique_kn": 5000.0, "charge_dynamique_kn": 800.0, "charge_vent_kn": 0.0,
+    "charge_neige_kn": 0.0, "charge_seisme_kn": 0.0, "resistance_mpa": 30.0,
+    "longueur_m": 12.5, "largeur_m": 8.0, "coefficient_securite": 1.5,
+}
+
+
+def test_moments_combines_egaux_aux_moments_globaux():
+    rng = np.random.default_rng(0)
+    # Grande moyenne, faible dispersion: la formule somme des carrés perdait ici sa précision
+    morceaux = [1e8 + rng.normal(0, 1e-2, taille) for taille in (1000, 1, 5000, 250)]
+    blocs = [{"n_charges": m.size, "moyenne": float(m.mean()), "m2": float(np.square(m - m.mean()).sum())}
+             for m in morceaux]
+    tout = np.concatenate(morceaux)
+    moyenne, variance = combiner_moments(blocs)
+    assert moyenne == pytest.approx(tout.mean(), rel=1e-15)
+    assert variance == pytest.approx(tout.var(), rel=1e-6)
+
+
+def test_tirages_sans_contrainte_exclus_des_moments():
+    # Charge dynamique normale à fort coefficient de variation: une partie des tirages sans charge
+    lois = {"charge_statique_kn": ("fixe", 0.0), "charge_dynamique_kn": ("normale", 2.0)}
+    base = dict(BASE, charge_statique_kn=0.0)
+    bloc = simuler_bloc(base, lois, 20000, 1)
+    assert 0 < bloc["sans_contrainte"] < bloc["n"]
+    assert bloc["n_charges"] + bloc["sans_contrainte"] == bloc["n"]
+    assert (bloc["echantillon"] != MARGE_SANS_CONTRAINTE).all()
+
+    autre = simuler_bloc(base, lois, 20000, 2)
+    resultat = combiner([bloc, autre], base["coefficient_securite"])
+    assert resultat["sans_contrainte"] == bloc["sans_contrainte"] + autre["sans_contrainte"]
+    ponderee = (bloc["moyenne"] * bloc["n_charges"] + autre["moyenne"] * autre["n_charges"]) \
+        / (bloc["n_charges"] + autre["n_charges"])
+    assert resultat["marge_moyenne"] == pytest.approx(ponderee)
+    assert (resultat["echantillon"] != MARGE_SANS_CONTRAINTE).all()
+
+
+def test_aucun_tirage_sous_charge():
+    base = {**BASE, **{nom: 0.0 for nom in ["charge_statique_kn", "charge_dynamique_kn"]}}
+    resultat = combiner([simuler_bloc(base, {}, 100, 0)], base["coefficient_securite"])
+    assert resultat["sans_contrainte"] == 100
+    assert resultat["echecs"] == 0
+    assert math.isnan(resultat["marge_moyenne"])
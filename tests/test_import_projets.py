@@ -0,0 +1,64 @@
+"""Validation des fichiers d'import (import_projets.valider_projets)"""
+
+import pandas as pd
+
+from calculs_beton import BORNES, COLONNES_NUMERIQUES
+from import_projets import importer_projets, valider_projets
+from migrations import appliquer_migrations
+
+
+def fichier(types):
+    lignes = []
+    for i, type_structure in enumerate(types):
+        ligne = {"nom_projet": f"Import-{i}", "type_structure": type_structure, "forme_structure": "Rectangulaire"}
+        ligne.update({nom: BORNES[nom][0] for nom in COLONNES_NUMERIQUES})
+        lignes.append(ligne)
+    return pd.DataFrame(lignes)
+
+
+def test_types_du_formulaire_acceptes():
+    valide, erreurs = valider_projets(fichier(["Bâtiment", "Mur de soutènement", "Autre"]))
+    assert erreurs.empty
+    assert len(valide) == 3
+
+
+def test_type_inconnu_refuse():
+    valide, erreurs = valider_projets(fichier(["Pont", "Tunnel", " Route "]))
+    assert list(valide["type_structure"]) == ["Pont", "Route"]
+    assert erreurs[["ligne", "colonne", "valeur"]].values.tolist() == [[2, "type_structure", "Tunnel"]]
+
+
+def test_date_vide_remplacee_par_la_date_de_l_import():
+    df = fichier(["Pont", "Pont"]).assign(date_creation=["2024-05-02 10:00", None])
+    valide, erreurs = valider_projets(df)
+    assert erreurs.empty
+    assert valide["date_creation"].iloc[0] == pd.Timestamp("2024-05-02 10:00")
+    assert valide["date_creation"].iloc[1].date() == pd.Timestamp.now().date()
+
+
+def test_textes_trop_longs_refuses():
+    df = fichier(["Pont", "Pont", "Pont"]).assign(type_beton=["C25/30", "C" * 51, None],
+                                                  statut=["Terminé", None, "x" * 60])
+    valide, erreurs = valider_projets(df)
+    assert list(valide["nom_projet"]) == ["Import-0"]
+    assert erreurs[["ligne", "colonne"]].values.tolist() == [[2, "type_beton"], [3, "statut"]]
+
+
+def test_colonne_calculee_hors_numeric_refusee_seule():
+    """Marge de sécurité > NUMERIC(6, 2) (grande dalle, charge faible): seule sa ligne est refusée"""
+    df = fichier(["Pont", "Pont", "Pont"])
+    df.loc[1, ["charge_statique_kn", "longueur_m", "largeur_m"]] = [1, 1000, 1000]
+    valide, erreurs = valider_projets(df)
+    assert list(valide["nom_projet"]) == ["Import-0", "Import-2"]
+    ligne = erreurs[erreurs["colonne"] == "marge_securite"]
+    assert ligne["ligne"].tolist() == [2]
+    assert "NUMERIC(6, 2)" in ligne["message"].iloc[0]
+
+
+def test_import_sans_lot_en_echec(base_test):
+    appliquer_migrations(base_test)
+    df = fichier(["Pont", "Pont", "Pont"])
+    df.loc[1, ["charge_statique_kn", "longueur_m", "largeur_m"]] = [1, 1000, 1000]
+    rapport = importer_projets(df, base_test)
+    assert (rapport["importes"], rapport["lots_en_echec"]) == (2, [])
+    assert rapport["erreurs"]["ligne"].tolist() == [2]
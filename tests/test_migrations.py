@@ -0,0 +1,24 @@
+"""Migrations du schéma (migrations.py) sur une base vide"""
+
+from sqlalchemy import text
+
+from migrations import MIGRATIONS, appliquer_migrations
+
+
+def test_migrations_appliquees_une_fois(base_test):
+    assert appliquer_migrations(base_test) == [version for version, *_ in MIGRATIONS]
+    assert appliquer_migrations(base_test) == []
+
+
+def test_triggers_des_migrations(base_test):
+    appliquer_migrations(base_test)
+    with base_test.begin() as conn:
+        conn.execute(text("INSERT INTO projets_beton (nom_projet, type_structure, volume_beton_m3) "
+                          "VALUES ('A', 'Pont', 10), ('B', 'Pont', 30), ('C', 'Route', NULL)"))
+    with base_test.connect() as conn:
+        resume = dict(conn.execute(text(
+            "SELECT type_structure, n_projets FROM resume_projets_type ORDER BY type_structure"
+        )).all())
+        version = conn.execute(text("SELECT version FROM versions_tables WHERE nom = 'projets_beton'")).scalar()
+    assert resume == {"Pont": 2, "Route": 1}
+    assert version == 1
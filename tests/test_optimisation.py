@@ -0,0 +1,88 @@
+"""Optimisation du mélange à coût minimal (optimisation.optimiser_melange)"""
+
+import itertools
+
+import numpy as np
+
+import optimisation
+from calculs_beton import BORNES, PRIX_PAR_DEFAUT
+from optimisation import (
+    DOSAGES, MASSE_VOLUMIQUE_CIMENT, MASSE_VOLUMIQUE_EAU, MASSE_VOLUMIQUE_GRANULATS, RAPPORT_EC_MAX,
+    RATIO_SABLE_MAX, RATIO_SABLE_MIN, VOLUME_AIR, optimiser_melange, resistance_bolomey,
+)
+
+# Petite surface chargée: la marge de sécurité (2 × 13.25 MPa) impose plus que la résistance demandée
+PROJET = {
+    "type_structure": "Pont", "forme_structure": "Rectangulaire",
+    "longueur_m": 2.0, "largeur_m": 1.0, "hauteur_m": 3.0, "epaisseur_m": 0.3,
+    "charge_statique_kn": 20000.0, "charge_dynamique_kn": 5000.0, "charge_vent_kn": 1000.0,
+    "charge_neige_kn": 500.0, "charge_seisme_kn": 0.0, "resistance_mpa": 20.0, "coefficient_securite": 2.0,
+    "dosage_ciment_kg_m3": 350.0, "dosage_eau_kg_m3": 175.0, "dosage_sable_kg_m3": 700.0,
+    "dosage_gravier_kg_m3": 1100.0,
+}
+
+
+def volume_absolu(ciment, eau, sable, gravier):
+    return (ciment / MASSE_VOLUMIQUE_CIMENT + eau / MASSE_VOLUMIQUE_EAU
+            + (sable + gravier) / MASSE_VOLUMIQUE_GRANULATS + VOLUME_AIR)
+
+
+def test_contraintes_du_melange_respectees():
+    solution = optimiser_melange(PROJET)
+    assert solution["statut"] == "optimal"
+    ciment, eau, sable, gravier = (solution[nom] for nom in DOSAGES)
+    assert eau / ciment <= RAPPORT_EC_MAX + 1e-9
+    assert RATIO_SABLE_MIN - 1e-9 <= sable / (sable + gravier) <= RATIO_SABLE_MAX + 1e-9
+    assert abs(volume_absolu(ciment, eau, sable, gravier) - 1.0) < 1e-6
+    for nom in DOSAGES:
+        assert BORNES[nom][0] - 1e-6 <= solution[nom] <= BORNES[nom][1] + 1e-6
+    assert solution["epaisseur_m"] == BORNES["epaisseur_m"][0]
+    assert solution["resistance_mpa"] >= PROJET["resistance_mpa"]
+    assert solution["resultat"]["marge_securite"] >= PROJET["coefficient_securite"] - 1e-6
+
+
+def test_melange_le_moins_cher():
+    """Aucun mélange admissible d'une grille fine n'est moins cher que l'optimum"""
+    solution = optimiser_melange(PROJET)
+    requise = solution["resistance_requise"]
+    plus_bas = np.inf
+    for ciment, eau, part_sable in itertools.product(np.linspace(200, 600, 81), np.linspace(100, 300, 81),
+                                                     np.linspace(RATIO_SABLE_MIN, RATIO_SABLE_MAX, 21)):
+        if eau / ciment > RAPPORT_EC_MAX or resistance_bolomey(ciment, eau) < requise:
+            continue
+        granulats = (1 - VOLUME_AIR - ciment / MASSE_VOLUMIQUE_CIMENT - eau / MASSE_VOLUMIQUE_EAU) \
+            * MASSE_VOLUMIQUE_GRANULATS
+        sable, gravier = part_sable * granulats, (1 - part_sable) * granulats
+        if not (BORNES["dosage_sable_kg_m3"][0] <= sable <= BORNES["dosage_sable_kg_m3"][1]
+                and BORNES["dosage_gravier_kg_m3"][0] <= gravier <= BORNES["dosage_gravier_kg_m3"][1]):
+            continue
+        cout = (ciment * PRIX_PAR_DEFAUT["prix_ciment"] + sable * PRIX_PAR_DEFAUT["prix_sable"]
+                + gravier * PRIX_PAR_DEFAUT["prix_gravier"])
+        plus_bas = min(plus_bas, cout)
+    assert np.isfinite(plus_bas)
+    assert solution["cout_m3_materiaux"] <= plus_bas + 1e-6
+    # Une épaisseur imposée plus grande coûte plus cher
+    plus_epais = optimiser_melange(PROJET, epaisseur_min=0.4)
+    assert plus_epais["resultat"]["cout_total_eur"] > solution["resultat"]["cout_total_eur"]
+
+
+def test_objectif_impossible_signale():
+    impossible = dict(PROJET, longueur_m=0.1, largeur_m=0.1, charge_statique_kn=100000.0)
+    solution = optimiser_melange(impossible)
+    assert solution["statut"] == "infaisable"
+    assert "Aucun mélange" in solution["message"]
+    assert "resultat" not in solution
+    assert optimiser_melange(PROJET, rapport_ec_max=0.1)["statut"] == "infaisable"
+
+
+def test_solution_memorisee_par_signature():
+    optimisation._optimiser.cache_clear()
+    premiere = optimiser_melange(PROJET)
+    # Dosages et épaisseur saisis n'entrent pas dans la signature
+    seconde = optimiser_melange(dict(PROJET, dosage_ciment_kg_m3=500.0, epaisseur_m=1.0))
+    assert optimisation._optimiser.cache_info().hits == 1
+    assert seconde == premiere
+    premiere["resultat"]["cout_total_eur"] = 0  # copie: le cache n'est pas modifié
+    assert optimiser_melange(PROJET)["resultat"] == seconde["resultat"]
+    optimiser_melange(PROJET, prix=dict(PRIX_PAR_DEFAUT, prix_ciment=PRIX_PAR_DEFAUT["prix_ciment"] * 2))
+    assert optimisation._optimiser.cache_info().misses == 2
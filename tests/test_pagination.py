@@ -0,0 +1,66 @@
+"""Pagination par clé (date_creation, id) de la liste des projets (requetes.page_projets)"""
+
+import datetime
+
+import pytest
+from sqlalchemy import text
+
+from requetes import page_projets
+
+
+@pytest.fixture
+def projets(base_test):
+    """23 projets: dates en double (départage par id), projets sans date, noms pour la recherche"""
+    jour = datetime.datetime(2025, 3, 1, 8, 0)
+    lignes = []
+    for i in range(23):
+        date = None if i % 7 == 3 else jour + datetime.timedelta(days=i // 3)
+        lignes.append({"nom": f"{'Pont' if i % 2 else 'Mur'} {i}", "date": date})
+    with base_test.begin() as conn:
+        conn.execute(text("INSERT INTO projets_beton (nom_projet, type_structure, date_creation) "
+                          "VALUES (:nom, 'Pont', :date)"), lignes)
+    return base_test
+
+
+def parcourir(engine, taille_page, recherche=""):
+    ids, curseur, pages = [], None, 0
+    while True:
+        df, curseur = page_projets(engine, recherche, curseur, taille_page)
+        ids += df["id"].tolist()
+        pages += 1
+        if curseur is None:
+            return ids, pages
+
+
+def ordre_attendu(engine, recherche=""):
+    with engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT id FROM projets_beton WHERE nom_projet ILIKE :motif "
+            "ORDER BY date_creation DESC NULLS LAST, id DESC"
+        ), {"motif": f"%{recherche}%"}).scalars().all()
+
+
+@pytest.mark.parametrize("taille_page", [1, 3, 5, 23, 50])
+def test_parcours_complet_sans_doublon(projets, taille_page):
+    ids, pages = parcourir(projets, taille_page)
+    assert ids == ordre_attendu(projets)
+    assert pages == max(1, -(-23 // taille_page))
+
+
+def test_parcours_avec_recherche(projets):
+    ids, _ = parcourir(projets, 2, recherche="pont")
+    assert ids == ordre_attendu(projets, "pont")
+    assert len(ids) == 11
+
+
+def test_insertion_pendant_le_parcours(projets):
+    """Un projet ajouté après la première page (plus récent) ne décale pas les pages suivantes"""
+    premiere, curseur = page_projets(projets, "", None, 4)
+    with projets.begin() as conn:
+        conn.execute(text("INSERT INTO projets_beton (nom_projet, type_structure, date_creation) "
+                          "VALUES ('Nouveau', 'Pont', '2030-01-01')"))
+    suite = []
+    while curseur is not None:
+        df, curseur = page_projets(projets, "", curseur, 4)
+        suite += df["id"].tolist()
+    assert premiere["id"].tolist() + suite == ordre_attendu(projets)[1:]
@@ -0,0 +1,69 @@
+"""Conversion de projets_beton en table partitionnée par mois (partitions.py)"""
+
+import datetime
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from migrations import appliquer_migrations
+from partitions import DATE_INCONNUE, convertir, lister_partitions, maintenir_partitions, nom_partition
+
+
+def triggers(conn):
+    return conn.execute(text(
+        "SELECT tgname FROM pg_trigger WHERE tgrelid = 'projets_beton'::regclass AND NOT tgisinternal ORDER BY tgname"
+    )).scalars().all()
+
+
+@pytest.fixture
+def base_partitionnee(base_test):
+    appliquer_migrations(base_test)
+    with base_test.begin() as conn:
+        conn.execute(text("INSERT INTO projets_beton (nom_projet, type_structure, date_creation) VALUES "
+                          "('A', 'Pont', '2024-01-15'), ('B', 'Pont', '2024-02-03'), ('C', 'Route', NULL)"))
+        avant = triggers(conn)
+    assert convertir(base_test)
+    return base_test, avant
+
+
+def test_cle_primaire_et_triggers(base_partitionnee):
+    engine, triggers_avant = base_partitionnee
+    with engine.connect() as conn:
+        cle = conn.execute(text(
+            "SELECT pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = 'projets_beton'::regclass AND contype = 'p'"
+        )).scalar()
+        assert cle == "PRIMARY KEY (id, date_creation)"
+        assert triggers(conn) == triggers_avant
+        assert conn.execute(text("SELECT date_creation FROM projets_beton WHERE nom_projet = 'C'")).scalar() \
+            == datetime.datetime.fromisoformat(DATE_INCONNUE)
+        partitions = {nom for nom, _ in lister_partitions(conn)}
+    assert {"projets_beton_2024_01", "projets_beton_2024_02", "projets_beton_1970_01"} <= partitions
+    assert not convertir(engine)
+
+
+def test_doublon_refuse(base_partitionnee):
+    engine, _ = base_partitionnee
+    with pytest.raises(IntegrityError):
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO projets_beton (id, nom_projet, type_structure, date_creation) "
+                              "SELECT id, 'Copie', type_structure, date_creation FROM projets_beton "
+                              "WHERE nom_projet = 'A'"))
+    with pytest.raises(IntegrityError):
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO projets_beton (nom_projet, type_structure, date_creation) "
+                              "VALUES ('Sans date', 'Pont', NULL)"))
+
+
+def test_synthese_et_maintenance(base_partitionnee):
+    """Les triggers recréés tiennent la synthèse à jour; les mois à venir sont créés une seule fois"""
+    engine, _ = base_partitionnee
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO projets_beton (nom_projet, type_structure) VALUES ('D', 'Pont')"))
+    with engine.connect() as conn:
+        resume = dict(conn.execute(text("SELECT type_structure, n_projets FROM resume_projets_type")).all())
+    assert resume == {"Pont": 3, "Route": 1}
+    mois_courant = nom_partition(datetime.date.today().replace(day=1))
+    assert mois_courant in maintenir_partitions(engine)
+    assert maintenir_partitions(engine) == []
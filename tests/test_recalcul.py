@@ -0,0 +1,30 @@
+"""Recalcul en arrière-plan des colonnes dérivées (recalcul.recalculer_projets)"""
+
+from sqlalchemy import text
+
+from migrations import appliquer_migrations
+from recalcul import recalculer_projets
+
+
+def test_sans_migrations_erreur_explicite(base_test):
+    etat = recalculer_projets(base_test)
+    assert etat["statut"] == "erreur"
+    assert "migrations" in etat["message"]
+    with base_test.connect() as conn:
+        assert not conn.execute(text("SELECT to_regclass('recalculs_projets') IS NOT NULL")).scalar()
+
+
+def test_recalcul_termine(base_test):
+    appliquer_migrations(base_test)
+    with base_test.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO projets_beton (nom_projet, type_structure, forme_structure, longueur_m, largeur_m,
+                hauteur_m, epaisseur_m, charge_statique_kn, charge_dynamique_kn, charge_vent_kn, charge_neige_kn,
+                charge_seisme_kn, resistance_mpa, coefficient_securite, dosage_ciment_kg_m3, dosage_eau_kg_m3,
+                dosage_sable_kg_m3, dosage_gravier_kg_m3)
+            VALUES ('A', 'Pont', 'Rectangulaire', 10, 5, 3, 0.2, 20000, 5000, 1000, 500, 0, 30, 1.5, 350, 175, 700, 1100)
+        """))
+    etat = recalculer_projets(base_test, taille_bloc=10, reprendre=False)
+    assert (etat["statut"], etat["lignes"]) == ("terminé", 1)
+    with base_test.connect() as conn:
+        assert conn.execute(text("SELECT volume_beton_m3 FROM projets_beton")).scalar() == 10
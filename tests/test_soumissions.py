@@ -0,0 +1,100 @@
+"""File d'écriture groupée des soumissions (soumissions.py), écritures simulées"""
+
+import asyncio
+import concurrent.futures
+import itertools
+
+import pytest
+from sqlalchemy.exc import DataError, OperationalError
+
+import soumissions
+
+
+class BaseSimulee:
+    """enregistrer_projets / enregistrer_projet: ids séquentiels, "invalide" refusé, panne possible"""
+
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.lots, self.unitaires = [], []
+        self.panne = None
+
+    def _verifier(self, valeurs):
+        if self.panne is not None:
+            raise self.panne
+        if valeurs["nom_projet"] == "invalide":
+            raise DataError("INSERT", {}, Exception("numeric field overflow"))
+
+    def enregistrer_projets(self, liste_valeurs):
+        self.lots.append([valeurs["nom_projet"] for valeurs in liste_valeurs])
+        for valeurs in liste_valeurs:
+            self._verifier(valeurs)
+        return [next(self.ids) for _ in liste_valeurs]
+
+    def enregistrer_projet(self, valeurs):
+        self.unitaires.append(valeurs["nom_projet"])
+        self._verifier(valeurs)
+        return next(self.ids)
+
+
+@pytest.fixture
+def base(monkeypatch):
+    simulee = BaseSimulee()
+    monkeypatch.setattr(soumissions, "enregistrer_projets", simulee.enregistrer_projets)
+    monkeypatch.setattr(soumissions, "enregistrer_projet", simulee.enregistrer_projet)
+    monkeypatch.setattr(soumissions, "_etat", {"boucle": None, "file": None, "tache": None, "lots": 0, "projets": 0})
+    return simulee
+
+
+def soumettre(*noms):
+    async def sessions():
+        return await asyncio.gather(*(soumissions.soumettre_projet({"nom_projet": nom}) for nom in noms),
+                                    return_exceptions=True)
+    return asyncio.run(sessions())
+
+
+def test_chaque_session_recoit_son_id(base):
+    resultats = soumettre(*(f"P{i}" for i in range(20)))
+    assert base.lots == [[f"P{i}" for i in range(20)]]
+    assert resultats == list(range(1, 21))
+
+
+def test_soumission_seule_sans_attente(base, monkeypatch):
+    monkeypatch.setattr(soumissions, "DELAI_GROUPAGE_MS", 60000)  # ne serait jamais atteint
+    assert asyncio.run(asyncio.wait_for(soumissions.soumettre_projet({"nom_projet": "seul"}), 5)) == 1
+
+
+def test_projet_invalide_isole(base):
+    resultats = soumettre("A", "invalide", "C")
+    assert base.unitaires == ["A", "invalide", "C"]
+    assert resultats[0] == 1 and resultats[2] == 2
+    assert isinstance(resultats[1], DataError)
+
+
+def test_panne_de_connexion_sans_nouvel_essai(base):
+    base.panne = OperationalError("INSERT", {}, Exception("server closed the connection unexpectedly"))
+    resultats = soumettre("A", "B", "C")
+    assert base.unitaires == []
+    assert all(resultat is base.panne for resultat in resultats)
+
+
+def test_file_pleine_refusee(base, monkeypatch):
+    monkeypatch.setattr(soumissions, "CAPACITE_FILE", 2)
+    monkeypatch.setattr(soumissions, "ATTENTE_MAX_S", 0.05)
+    monkeypatch.setattr(soumissions, "TAILLE_LOT_SOUMISSIONS", 1)
+    ecriture_libre = concurrent.futures.Future()
+
+    def ecriture_bloquee(liste_valeurs):
+        ecriture_libre.result(timeout=5)
+        return [0] * len(liste_valeurs)
+
+    monkeypatch.setattr(soumissions, "enregistrer_projets", ecriture_bloquee)
+
+    async def sessions():
+        taches = [asyncio.ensure_future(soumissions.soumettre_projet({"nom_projet": f"P{i}"})) for i in range(3)]
+        await asyncio.sleep(0.01)  # P0 en écriture (bloquée), P1 et P2 remplissent la file
+        with pytest.raises(RuntimeError, match="Trop d'enregistrements"):
+            await soumissions.soumettre_projet({"nom_projet": "refusé"})
+        ecriture_libre.set_result(None)
+        return await asyncio.gather(*taches)
+
+    assert asyncio.run(sessions()) == [0, 0, 0]